@@ -14,7 +14,9 @@ from ..src.Model import *
 from ..src.Material import *
 from ..src.Types import *
 from ..src.Progress import *
+from ..src.Profiler import profiler
 from ..src.ViewportInterface import *
+from ..src.TexturePrefetcher import TexturePrefetcher
 
 __all__ = [
     'AutodeskInterface'
@@ -56,7 +58,7 @@ class AutodeskInterface(ViewportInterface[rt.Material, Layer, rt.Matrix3, Autode
         self.options = options
         self.unique_meshes = dict()
 
-    def init_materials(self) -> None:
+    def init_materials(self, textures: TexturePrefetcher) -> None:
         pass
 
     def create_material(self, material: Material) -> rt.Material:
@@ -65,6 +67,34 @@ class AutodeskInterface(ViewportInterface[rt.Material, Layer, rt.Matrix3, Autode
     def set_materials(self, materials: List[rt.Material]) -> None:
         self.materials = materials
 
+    def create_prototype_collection(self, display_name: str) -> Layer:
+        layer = rt.LayerManager.newLayerFromName(f'{display_name} prototype')
+        layer.ishidden = True
+        return layer
+
+    def create_model_instance(self, prototype: AutodeskModelState, collection: Layer, display_name: str, world_transform: rt.Matrix3) -> None:
+        # the prototype is built at the origin, so each instance node keeps its own transform relative to the model
+        source_nodes = []
+        for layer in [prototype.root_layer, *prototype.region_layers.values()]:
+            _, nodes = layer.nodes(pymxs.byref(None))
+            source_nodes.extend(nodes)
+
+        if not source_nodes:
+            return
+
+        instance_layer = rt.LayerManager.newLayerFromName(display_name)
+        instance_layer.setParent(collection)
+
+        # the clones keep the bone and marker hierarchy, so only the top level nodes are moved and their children follow
+        source_handles = set(node.inode.handle for node in source_nodes)
+        is_top_level = [node.parent is None or node.parent.inode.handle not in source_handles for node in source_nodes]
+
+        _, newNodes = rt.MaxOps.cloneNodes(source_nodes, cloneType = rt.Name('instance'), newNodes = pymxs.byref(None))
+        for copy, top_level in zip(newNodes, is_top_level):
+            if top_level:
+                copy.transform = copy.transform * world_transform
+            instance_layer.addnode(copy)
+
     def identity_transform(self) -> rt.Matrix3:
         return rt.Matrix3(1)
 
@@ -165,48 +195,75 @@ class AutodeskInterface(ViewportInterface[rt.Material, Layer, rt.Matrix3, Autode
     def create_region(self, model_state: AutodeskModelState, region: ModelRegion, display_name: str) -> rt.MixinInterface:
         region_layer = model_state.create_layer(display_name)
         region_layer.setParent(model_state.root_layer)
-        model_state.region_layers[model_state.model.regions.index(region)] = region_layer
+        model_state.region_layers[region.index] = region_layer
         return region_layer
 
     def build_mesh(self, model_state: AutodeskModelState, region_group: Layer, world_transform: rt.Matrix3, mesh: Mesh, mesh_key: MeshKey, display_name: str) -> None:
-        scene = self.scene
+        scene, model_name = self.scene, model_state.model.name
 
         DECOMPRESSION_TRANSFORM = toMatrix3(mesh.vertex_transform)
 
         if mesh_key in self.unique_meshes.keys():
-            source = self.unique_meshes.get(mesh_key)
-            # methods with byref params return a tuple of (return_value, byref1, byref2, ...)
-            _, newNodes = rt.MaxOps.cloneNodes(source, cloneType = rt.Name('instance'), newNodes = pymxs.byref(None))
-            copy = cast(rt.Mesh, newNodes[0])
-            copy.name = display_name
-            copy.transform = DECOMPRESSION_TRANSFORM * world_transform
-            region_group.addnode(copy)
+            with profiler.measure('mesh instance', model_name, mesh_key):
+                source = self.unique_meshes.get(mesh_key)
+                # methods with byref params return a tuple of (return_value, byref1, byref2, ...)
+                _, newNodes = rt.MaxOps.cloneNodes(source, cloneType = rt.Name('instance'), newNodes = pymxs.byref(None))
+                copy = cast(rt.Mesh, newNodes[0])
+                copy.name = display_name
+                copy.transform = DECOMPRESSION_TRANSFORM * world_transform
+                region_group.addnode(copy)
             return
 
-        index_buffer = scene.index_buffer_pool[mesh.index_buffer_index]
-        vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
+        with profiler.measure('mesh geometry', model_name, mesh_key):
+            index_buffer = scene.index_buffer_pool[mesh.index_buffer_index]
+            vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
 
-        # note 3dsMax uses 1-based indices for triangles, vertices etc
+            # note 3dsMax uses 1-based indices for triangles, vertices etc
 
-        positions = list(toPoint3(v) for v in vertex_buffer.position_channels[0])
-        faces = list(toPoint3(t) + 1 for t in index_buffer.get_triangles(mesh))
+            positions = list(toPoint3(v) for v in vertex_buffer.position_channels[0])
+            faces = list(toPoint3(t) + 1 for t in index_buffer.get_triangles(mesh))
 
-        mesh_obj = cast(rt.Editable_Mesh, rt.Mesh(vertices=positions, faces=faces))
-        mesh_obj.name = display_name
-        mesh_obj.transform = DECOMPRESSION_TRANSFORM
-        region_group.addnode(mesh_obj)
-        self.unique_meshes[mesh_key] = mesh_obj
+            mesh_obj = cast(rt.Editable_Mesh, rt.Mesh(vertices=positions, faces=faces))
+            mesh_obj.name = display_name
+            mesh_obj.transform = DECOMPRESSION_TRANSFORM
+            region_group.addnode(mesh_obj)
+            self.unique_meshes[mesh_key] = mesh_obj
 
         mc: MeshContext = (scene, model_state, mesh, mesh_obj)
-        self._build_normals(mc)
-        self._build_uvw(mc)
-        self._build_matindex(mc)
-        self._build_skin(mc)
-        self._build_colors(mc)
+
+        with profiler.measure('mesh normals', model_name, mesh_key):
+            self._build_normals(mc)
+        with profiler.measure('mesh uvw', model_name, mesh_key):
+            self._build_uvw(mc)
+        with profiler.measure('mesh matindex', model_name, mesh_key):
+            self._build_matindex(mc)
+        with profiler.measure('mesh skin', model_name, mesh_key):
+            self._build_skin(mc)
+        with profiler.measure('mesh colors', model_name, mesh_key):
+            self._build_colors(mc)
 
         # need to decompress BEFORE applying normals, then apply the instance transform AFTER applying normals
         mesh_obj.transform = DECOMPRESSION_TRANSFORM * world_transform
 
+    def create_instances(self, model_state: AutodeskModelState, region_group: Layer, meshes: List[Tuple[Mesh, MeshKey]], instances: List[Tuple[str, rt.Matrix3]]) -> None:
+        model_name = model_state.model.name
+
+        with profiler.measure('mesh instances', model_name):
+            sources = [(mesh, self.unique_meshes[key]) for mesh, key in meshes if key in self.unique_meshes]
+            if not sources:
+                return
+
+            source_nodes = [node for _, node in sources]
+            decompression_transforms = [toMatrix3(mesh.vertex_transform) for mesh, _ in sources]
+
+            # each instance clones every mesh of the permutation in a single call
+            for display_name, world_transform in instances:
+                _, newNodes = rt.MaxOps.cloneNodes(source_nodes, cloneType = rt.Name('instance'), newNodes = pymxs.byref(None))
+                for copy, decompression_transform in zip(newNodes, decompression_transforms):
+                    copy.name = display_name
+                    copy.transform = decompression_transform * world_transform
+                    region_group.addnode(copy)
+
     def _build_normals(self, mc: MeshContext):
         scene, model_state, mesh, mesh_obj = mc
         vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
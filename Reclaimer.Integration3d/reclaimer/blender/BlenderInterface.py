@@ -1,5 +1,5 @@
 import bpy
-import itertools
+import numpy
 import operator
 from typing import cast
 from typing import Dict, Tuple, List
@@ -18,7 +18,9 @@ from ..src.Model import *
 from ..src.Material import *
 from ..src.Types import *
 from ..src.Progress import *
+from ..src.Profiler import profiler
 from ..src.ViewportInterface import *
+from ..src.TexturePrefetcher import TexturePrefetcher
 
 __all__ = [
     'BlenderInterface'
@@ -30,6 +32,14 @@ BL_UNITS: float = 1000.0 # 1 blender unit = 1000mm
 MeshContext = Tuple[Scene, 'BlenderModelState', Mesh, bpy.types.Mesh, Object]
 
 
+def _to_columns(array: numpy.ndarray, columns: int, fill: float = 0.0) -> numpy.ndarray:
+    ''' Copies an array of vectors to a float32 array with exactly `columns` components per vector, truncating or padding with `fill` '''
+    result = numpy.full((len(array), columns), fill, numpy.float32)
+    width = min(columns, array.shape[1])
+    result[:, :width] = array[:, :width]
+    return result
+
+
 class BlenderModelState(ModelState):
     parent_collection: Collection
     root_object: Object
@@ -62,12 +72,16 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
     material_builder: MaterialBuilder = None
     materials: List[bpy.types.Material] = None
     unique_meshes: Dict[MeshKey, Object] = None
+    prototype_collection: Collection = None
+    instance_prototypes: Dict[Tuple[MeshKey, ...], Collection] = None
 
     def init_scene(self, scene: Scene, options: ImportOptions) -> None:
         self.unit_scale = scene.unit_scale / BL_UNITS
         self.scene = scene
         self.options = options
         self.unique_meshes = dict()
+        self.prototype_collection = None
+        self.instance_prototypes = dict()
 
     def pre_import(self, root_collection: bpy.types.Collection):
         self.root_collection = root_collection
@@ -79,9 +93,18 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
     def post_import(self):
         set_collection_exclude(bpy.context.view_layer, self.root_collection, False)
 
-    def init_materials(self) -> None:
+        # prototypes are only displayed through their instances
+        if self.prototype_collection:
+            set_collection_exclude(bpy.context.view_layer, self.prototype_collection, True)
+
+    def _get_prototype_collection(self) -> Collection:
+        if not self.prototype_collection:
+            self.prototype_collection = self.create_collection(f'{self.root_collection.name} prototypes', self.root_collection)
+        return self.prototype_collection
+
+    def init_materials(self, textures: TexturePrefetcher) -> None:
         init_custom_node_groups()
-        self.material_builder = MaterialBuilder(self.scene, self.options)
+        self.material_builder = MaterialBuilder(self.scene, self.options, textures)
 
     def create_material(self, material: Material) -> bpy.types.Material:
         return self.material_builder.create_material(material)
@@ -96,6 +119,18 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
         parent.children.link(collection)
         return collection
 
+    def create_prototype_collection(self, display_name: str) -> Collection:
+        return self.create_collection(f'{display_name} prototype', self._get_prototype_collection())
+
+    def create_model_instance(self, prototype: BlenderModelState, collection: Collection, display_name: str, world_transform: Matrix) -> None:
+        if not collection:
+            collection = bpy.context.scene.collection
+        instance_obj = bpy.data.objects.new(display_name, None)
+        instance_obj.instance_type = 'COLLECTION'
+        instance_obj.instance_collection = prototype.parent_collection
+        instance_obj.matrix_world = world_transform
+        collection.objects.link(instance_obj)
+
     def identity_transform(self) -> Matrix:
         return Matrix.Identity(4)
 
@@ -207,48 +242,96 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
     def create_region(self, model_state: BlenderModelState, region: ModelRegion, display_name: str) -> Object:
         region_obj = model_state.create_group_object(display_name)
         region_obj.parent = model_state.root_object
-        model_state.region_objects[model_state.model.regions.index(region)] = region_obj
+        model_state.region_objects[region.index] = region_obj
         return region_obj
 
     def build_mesh(self, model_state: BlenderModelState, region_group: Object, world_transform: Matrix, mesh: Mesh, mesh_key: MeshKey, display_name: str) -> None:
-        scene = self.scene
+        scene, model_name = self.scene, model_state.model.name
 
         existing_mesh = self.unique_meshes.get(mesh_key, None)
         if existing_mesh:
-            copy = cast(Object, existing_mesh.copy()) # note: use source.data.copy() for a deep copy
-            copy.name = display_name
-            model_state.link_object(copy, region_group)
-            copy.matrix_world = world_transform
-            copy.matrix_parent_inverse = Matrix.Identity(4)
+            with profiler.measure('mesh instance', model_name, mesh_key):
+                copy = cast(Object, existing_mesh.copy()) # note: use source.data.copy() for a deep copy
+                copy.name = display_name
+                model_state.link_object(copy, region_group)
+                copy.matrix_world = world_transform
+                copy.matrix_parent_inverse = Matrix.Identity(4)
             return
 
-        index_buffer = scene.index_buffer_pool[mesh.index_buffer_index]
-        vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
+        with profiler.measure('mesh geometry', model_name, mesh_key):
+            index_buffer = scene.index_buffer_pool[mesh.index_buffer_index]
+            vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
+
+            # the arrays are usually prepared ahead of time, so this only copies them into the mesh
+            # note blender doesnt like if we provide too many dimensions
+            positions = _to_columns(vertex_buffer.position_channels[0].to_array(), 3)
+            segment_faces = [index_buffer.get_triangle_array(s.index_start, s.index_length) for s in mesh.segments]
+            faces = numpy.concatenate(segment_faces) if segment_faces else numpy.empty((0, 3), numpy.uint32)
 
-        # note blender doesnt like if we provide too many dimensions
-        positions = list(Vector(v).to_3d() for v in vertex_buffer.position_channels[0])
-        faces = list(index_buffer.get_triangles(mesh))
+            mesh_data = bpy.data.meshes.new(display_name)
+            mesh_data.vertices.add(len(positions))
+            mesh_data.vertices.foreach_set('co', positions.ravel())
+            mesh_data.loops.add(len(faces) * 3)
+            mesh_data.loops.foreach_set('vertex_index', faces.astype(numpy.int32).ravel())
+            mesh_data.polygons.add(len(faces))
+            mesh_data.polygons.foreach_set('loop_start', numpy.arange(0, len(faces) * 3, 3, dtype=numpy.int32))
 
-        mesh_data = bpy.data.meshes.new(display_name)
-        mesh_data.from_pydata(positions, [], faces)
+            # from 4.0 the loop total is derived from the loop starts and is read only
+            if bpy.app.version < (4, 0):
+                mesh_data.polygons.foreach_set('loop_total', numpy.full(len(faces), 3, numpy.int32))
 
-        DECOMPRESSION_TRANSFORM = Matrix(mesh.vertex_transform).transposed()
-        mesh_data.transform(DECOMPRESSION_TRANSFORM)
+            mesh_data.polygons.foreach_set('use_smooth', numpy.ones(len(faces), bool))
+            mesh_data.update(calc_edges=True)
 
-        for p in mesh_data.polygons:
-            p.use_smooth = True
+            DECOMPRESSION_TRANSFORM = Matrix(mesh.vertex_transform).transposed()
+            mesh_data.transform(DECOMPRESSION_TRANSFORM)
 
-        mesh_obj = bpy.data.objects.new(mesh_data.name, mesh_data)
-        mesh_obj.matrix_world = world_transform
-        model_state.link_object(mesh_obj, region_group)
-        self.unique_meshes[mesh_key] = mesh_obj
+            mesh_obj = bpy.data.objects.new(mesh_data.name, mesh_data)
+            mesh_obj.matrix_world = world_transform
+            model_state.link_object(mesh_obj, region_group)
+            self.unique_meshes[mesh_key] = mesh_obj
 
         mc: MeshContext = (scene, model_state, mesh, mesh_data, mesh_obj)
-        self._build_normals(mc)
-        self._build_uvw(mc, faces)
-        self._build_matindex(mc)
-        self._build_skin(mc)
-        self._build_colors(mc, faces)
+
+        with profiler.measure('mesh normals', model_name, mesh_key):
+            self._build_normals(mc)
+        with profiler.measure('mesh uvw', model_name, mesh_key):
+            self._build_uvw(mc, faces)
+        with profiler.measure('mesh matindex', model_name, mesh_key):
+            self._build_matindex(mc, [len(f) for f in segment_faces])
+        with profiler.measure('mesh skin', model_name, mesh_key):
+            self._build_skin(mc)
+        with profiler.measure('mesh colors', model_name, mesh_key):
+            self._build_colors(mc, faces)
+
+    def create_instances(self, model_state: BlenderModelState, region_group: Object, meshes: List[Tuple[Mesh, MeshKey]], instances: List[Tuple[str, Matrix]]) -> None:
+        model_name = model_state.model.name
+
+        with profiler.measure('mesh instances', model_name):
+            mesh_keys = tuple(key for _, key in meshes)
+
+            # the meshes are added to a prototype collection once, then each instance is an empty that displays the collection
+            prototype = self.instance_prototypes.get(mesh_keys)
+            if not prototype:
+                sources = [self.unique_meshes[key] for key in mesh_keys if key in self.unique_meshes]
+                if not sources:
+                    return
+
+                prototype = bpy.data.collections.new(f'{sources[0].name} prototype')
+                self._get_prototype_collection().children.link(prototype)
+                for source in sources:
+                    copy = cast(Object, source.copy())
+                    copy.parent = None
+                    copy.matrix_world = Matrix.Identity(4)
+                    prototype.objects.link(copy)
+                self.instance_prototypes[mesh_keys] = prototype
+
+            for display_name, world_transform in instances:
+                instance_obj = bpy.data.objects.new(display_name, None)
+                instance_obj.instance_type = 'COLLECTION'
+                instance_obj.instance_collection = prototype
+                instance_obj.matrix_world = world_transform
+                model_state.link_object(instance_obj, region_group)
 
     def _build_normals(self, mc: MeshContext):
         scene, model, mesh, mesh_data, mesh_obj = mc
@@ -257,7 +340,7 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
         if not (self.options.IMPORT_NORMALS and vertex_buffer.normal_channels):
             return
 
-        normals = list(Vector(v).to_3d() for v in vertex_buffer.normal_channels[0])
+        normals = _to_columns(vertex_buffer.normal_channels[0].to_array(), 3)
         mesh_data.normals_split_custom_set_from_vertices(normals)
 
         # prior to 4.1, this is required in order for custom normals to take effect
@@ -265,52 +348,53 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
         if bpy.app.version < (4, 1):
             mesh_data.use_auto_smooth = True
 
-    def _build_uvw(self, mc: MeshContext, faces: List[Triangle]):
+    def _build_uvw(self, mc: MeshContext, faces: 'numpy.ndarray'):
         scene, model_state, mesh, mesh_data, mesh_obj = mc
         vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
 
         if not (self.options.IMPORT_UVW and vertex_buffer.texcoord_channels):
             return
 
-        DECOMPRESSION_TRANSFORM = Matrix(mesh.texture_transform).transposed()
+        # row vector form of the decompression transform, applied to (u, v, 0, 1)
+        DECOMPRESSION_TRANSFORM = numpy.array(mesh.texture_transform, numpy.float32)
+        loop_vertices = faces.ravel()
 
         for texcoord_buffer in vertex_buffer.texcoord_channels:
             # note blender wants 3 uvs per triangle rather than one per vertex
-            # so we iterate the triangle indices rather than directly iterating the buffer
+            # so we index the buffer with the triangle indices rather than using it directly
             uv_layer = mesh_data.uv_layers.new()
-            for i, ti in enumerate(itertools.chain(*faces)):
-                v = texcoord_buffer[ti]
-                vec = DECOMPRESSION_TRANSFORM @ Vector((v[0], v[1], 0))
-                uv_layer.data[i].uv = Vector((vec[0], 1 - vec[1]))
+            coords = _to_columns(texcoord_buffer.to_array(), 2)[loop_vertices]
+            uvs = coords @ DECOMPRESSION_TRANSFORM[:2, :2] + DECOMPRESSION_TRANSFORM[3, :2]
+            uvs[:, 1] = 1 - uvs[:, 1]
+            uv_layer.data.foreach_set('uv', uvs.ravel())
 
-    def _build_matindex(self, mc: MeshContext):
+    def _build_matindex(self, mc: MeshContext, face_counts: List[int]):
         scene, model_state, mesh, mesh_data, mesh_obj = mc
-        index_buffer = scene.index_buffer_pool[mesh.index_buffer_index]
 
         if not self.options.IMPORT_MATERIALS:
             return
 
         # only append materials to the mesh that it actually uses, rather than appening all scene materials
         # this means we need to build a lookup of global mat index -> local mat index
+        # materials that were merged with another material share the same slot
         mat_lookup = dict()
-        for loc, glob in enumerate(set(s.material_index for s in mesh.segments if s.material_index >= 0)):
-            mat_lookup[glob] = loc
+        slot_materials = []
+        for glob in set(s.material_index for s in mesh.segments if s.material_index >= 0):
+            material = self.materials[glob]
+            if material not in slot_materials:
+                slot_materials.append(material)
+            mat_lookup[glob] = slot_materials.index(material)
 
         if not mat_lookup:
             return # no materials on this mesh
 
         # append relevant material(s) to mesh
-        for i in mat_lookup.keys():
-            mesh_data.materials.append(self.materials[i])
-
-        face_start = 0
-        for s in mesh.segments:
-            # TODO: more efficient triangle count
-            face_end = face_start + sum(1 for _ in index_buffer.get_triangles(s))
-            if s.material_index >= 0:
-                for i in range(face_start, face_end):
-                    mesh_data.polygons[i].material_index = mat_lookup[s.material_index]
-            face_start = face_end
+        for material in slot_materials:
+            mesh_data.materials.append(material)
+
+        # each segment is a contiguous run of faces
+        slots = [mat_lookup.get(s.material_index, 0) for s in mesh.segments]
+        mesh_data.polygons.foreach_set('material_index', numpy.repeat(numpy.array(slots, numpy.int32), face_counts))
 
     def _build_skin(self, mc: MeshContext):
         scene, model_state, mesh, mesh_data, mesh_obj = mc
@@ -343,17 +427,18 @@ class BlenderInterface(ViewportInterface[bpy.types.Material, bpy.types.Collectio
                     if bw > 0:
                         mesh_obj.vertex_groups[bi].add([vi], bw, 'ADD')
 
-    def _build_colors(self, mc: MeshContext, faces: List[Triangle]):
+    def _build_colors(self, mc: MeshContext, faces: 'numpy.ndarray'):
         scene, model_state, mesh, mesh_data, mesh_obj = mc
         vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
 
         if not (self.options.IMPORT_COLORS and vertex_buffer.color_channels):
             return
 
+        loop_vertices = faces.ravel()
+
         for color_buffer in vertex_buffer.color_channels:
             # note vertex_colors uses the same triangle loop as uv coords
-            # so we iterate the triangle indices rather than directly iterating the buffer
+            # so we index the buffer with the triangle indices rather than using it directly
             color_layer = mesh_data.vertex_colors.new()
-            for i, ti in enumerate(itertools.chain(*faces)):
-                c = color_buffer[ti]
-                color_layer.data[i].color = c
\ No newline at end of file
+            colors = _to_columns(color_buffer.to_array(), 4, 1.0)[loop_vertices]
+            color_layer.data.foreach_set('color', colors.ravel())
\ No newline at end of file
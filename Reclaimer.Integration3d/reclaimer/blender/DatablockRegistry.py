@@ -0,0 +1,52 @@
+import bpy
+from typing import Dict, Optional
+
+__all__ = [
+    'DatablockRegistry'
+]
+
+_KEY_PROPERTY = 'rmf_key'
+
+
+class DatablockRegistry:
+    '''
+    Finds datablocks that were created by earlier imports so they can be reused. Each registered datablock stores its key as a custom property,
+    so lookups are unaffected by renaming and still work after the .blend file has been saved and reopened.
+    '''
+
+    _collection: bpy.types.bpy_prop_collection
+    _lookup: Dict[str, bpy.types.ID] = None
+
+    def __init__(self, collection: bpy.types.bpy_prop_collection):
+        self._collection = collection
+
+    def get(self, key: str) -> Optional[bpy.types.ID]:
+        if self._lookup is None:
+            self._scan()
+
+        item = self._lookup.get(key)
+        if item is None:
+            return None
+
+        try:
+            if item.get(_KEY_PROPERTY) == key:
+                return item
+        except ReferenceError:
+            pass # the datablock has been deleted
+
+        del self._lookup[key]
+        return None
+
+    def add(self, key: str, item: bpy.types.ID):
+        if self._lookup is None:
+            self._scan()
+
+        item[_KEY_PROPERTY] = key
+        self._lookup[key] = item
+
+    def _scan(self):
+        self._lookup = dict()
+        for item in self._collection:
+            key = item.get(_KEY_PROPERTY)
+            if isinstance(key, str):
+                self._lookup.setdefault(key, item)
@@ -28,6 +28,8 @@ class RmfImportOperator(Operator, bpy_extras.io_utils.ImportHelper):
         ImportOptions.IMPORT_MATERIALS = preferences.import_materials
 
         ImportOptions.SPLIT_MESHES = preferences.split_meshes
+        ImportOptions.INSTANCE_PERMUTATIONS = preferences.instance_permutations
+        ImportOptions.INSTANCE_MODELS = preferences.instance_models
         ImportOptions.IMPORT_NORMALS = preferences.import_normals
         ImportOptions.IMPORT_SKIN = preferences.import_skin
         # ImportOptions.IMPORT_UVW = preferences.import_uvw
@@ -42,6 +44,21 @@ class RmfImportOperator(Operator, bpy_extras.io_utils.ImportHelper):
 
         ImportOptions.BITMAP_ROOT = preferences.bitmap_root
         ImportOptions.BITMAP_EXT = preferences.bitmap_ext
+        ImportOptions.REUSE_MATERIALS = preferences.reuse_materials
+        ImportOptions.MERGE_MATERIALS = preferences.merge_materials
+        ImportOptions.TEXTURE_BUDGET = preferences.texture_budget
+
+        ImportOptions.SCENE_CACHE_SIZE = preferences.scene_cache_size
+        ImportOptions.GEOMETRY_CACHE_DIR = preferences.geometry_cache_dir
+        ImportOptions.GEOMETRY_CACHE_SIZE = preferences.geometry_cache_size
+        ImportOptions.TEXTURE_CACHE_DIR = preferences.texture_cache_dir
+        ImportOptions.TEXTURE_CACHE_SIZE = preferences.texture_cache_size
+        ImportOptions.LINK_TEXTURES = preferences.link_textures
+        ImportOptions.DECODE_WORKERS = preferences.decode_workers
+        ImportOptions.PREFETCH_MESHES = preferences.prefetch_meshes
+        ImportOptions.TEXTURE_THREADS = preferences.texture_threads
+
+        ImportOptions.LOG_LEVEL = 'DEBUG' if preferences.verbose_logging else 'INFO'
 
         bpy.ops.rmf.dialog_operator('EXEC_DEFAULT', filepath=self.filepath)
 
@@ -1,11 +1,18 @@
+import os
 import bpy
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Optional
 
 from ..src.SceneReader import *
+from ..src.TexturePrefetcher import TexturePrefetcher, TextureData
+from ..src.DiskCache import DiskCache
+from ..src.MaterialSignature import material_signature
 from ..src.ImportOptions import *
 from ..src.Scene import *
 from ..src.Material import *
+from ..src.ImportLog import import_log
+from ..src.Profiler import profiler
 from .CustomShaderNodes import *
+from .DatablockRegistry import DatablockRegistry
 
 __all__ = [
     'MaterialBuilder'
@@ -13,6 +20,18 @@ __all__ = [
 
 SPECULAR_SOCKET_NAME = 'Specular' if bpy.app.version[0] < 4 else 'Specular IOR Level'
 
+# change this whenever the node trees being built change so materials from earlier imports are not reused
+_MATERIAL_VERSION = 1
+
+_SUPPORTED_USAGES = (TEXTURE_USAGE.BLEND, TEXTURE_USAGE.DIFFUSE, TEXTURE_USAGE.NORMAL, TEXTURE_USAGE.SPECULAR, TEXTURE_USAGE.TRANSPARENCY)
+
+# node names for the per-texture parameters that get replaced when a material is created from a template
+_TEXTURE_NODE_NAME = 'Texture {}'
+_SCALE_NODE_NAME = 'UV Scale {}'
+_GAMMA_NODE_NAME = 'Gamma {}'
+
+TextureSlot = Tuple[int, Texture, Dict[str, TextureMapping]] # (texture index, texture, usages)
+
 __channel_socket_lookup: Dict[ChannelFlags, str] = {
     ChannelFlags.RGB: 'Color',
     ChannelFlags.RED: 'R',
@@ -31,6 +50,37 @@ def _create_uvscale_node(material: bpy.types.Material, input: TextureMapping, im
     material.node_tree.links.new(image_node.inputs['Vector'], scale_node.outputs['Vector'])
     return scale_node
 
+def _needs_gamma_node(texture: Texture, usage: str) -> bool:
+    return usage != TEXTURE_USAGE.NORMAL and texture.gamma not in (GAMMA_PRESET.SRGB, GAMMA_PRESET.LINEAR)
+
+def _setup_image(image: bpy.types.Image, texture: Texture, usage: str):
+    if usage == TEXTURE_USAGE.NORMAL:
+        image.alpha_mode = 'NONE'
+        image.colorspace_settings.name = 'Non-Color'
+    else:
+        image.alpha_mode = 'CHANNEL_PACKED'
+        if texture.gamma == GAMMA_PRESET.SRGB:
+            image.colorspace_settings.name = 'sRGB'
+        else:
+            image.colorspace_settings.name = 'Linear' if bpy.app.version[0] < 4 else 'Linear Rec.709'
+
+def _get_slot_shape(slot: TextureSlot) -> Tuple:
+    ''' Gets everything about a texture slot that affects the layout of the node tree, as opposed to the values within it '''
+    _, texture, usages = slot
+    default_input = next(iter(usages.values()))
+    return (
+        tuple((usage, _get_channel_socket(input)) for usage, input in usages.items()),
+        int(default_input.blend_channel),
+        default_input.tiling != (1, 1),
+        _needs_gamma_node(texture, default_input.texture_usage)
+    )
+
+def _get_colorspace(texture: Texture, usage: str) -> str:
+    ''' Gets the image settings a texture needs for a particular usage '''
+    if usage == TEXTURE_USAGE.NORMAL:
+        return 'non-color'
+    return 'srgb' if texture.gamma == GAMMA_PRESET.SRGB else 'linear'
+
 def _get_channel_socket(input: TextureMapping):
     mask = input.channel_mask
     if mask == ChannelFlags.DEFAULT:
@@ -54,44 +104,39 @@ class TextureHelper:
     def default_input(self) -> TextureMapping:
         return next(iter(self.input_data.values()))
 
-    def __init__(self, texture: Texture, usages: Dict[str, TextureMapping], material: bpy.types.Material, image: bpy.types.Image):
+    def __init__(self, texture: Texture, usages: Dict[str, TextureMapping], material: bpy.types.Material, image: bpy.types.Image, slot: int):
         self.input_data = usages
         self.texture_data = texture
         self.material = material
 
         # set up texture node
         self.texture_node = material.node_tree.nodes.new('ShaderNodeTexImage')
+        self.texture_node.name = _TEXTURE_NODE_NAME.format(slot)
         self.texture_node.image = image
 
         # append frame first so it can be set as parent for future nodes
         self._append_frame_node()
-        self._append_scale_node()
+        self._append_scale_node(slot)
 
-        if self.default_input.texture_usage == TEXTURE_USAGE.NORMAL:
-            image.alpha_mode = 'NONE'
-            image.colorspace_settings.name = 'Non-Color'
-        else:
-            image.alpha_mode = 'CHANNEL_PACKED'
-            if self.texture_data.gamma == GAMMA_PRESET.SRGB:
-                image.colorspace_settings.name = 'sRGB'
-            else:
-                image.colorspace_settings.name = 'Linear' if bpy.app.version[0] < 4 else 'Linear Rec.709'
-                if self.texture_data.gamma != GAMMA_PRESET.LINEAR:
-                    self._append_gamma_node()
+        _setup_image(image, self.texture_data, self.default_input.texture_usage)
+        if _needs_gamma_node(self.texture_data, self.default_input.texture_usage):
+            self._append_gamma_node(slot)
 
     def _append_frame_node(self):
         self.frame_node = self.material.node_tree.nodes.new('NodeFrame')
         self.frame_node.label = self.default_input.texture_usage
         self.texture_node.parent = self.frame_node
 
-    def _append_scale_node(self):
+    def _append_scale_node(self, slot: int):
         self.scale_node = _create_uvscale_node(self.material, self.default_input, self.texture_node)
         if self.scale_node:
+            self.scale_node.name = _SCALE_NODE_NAME.format(slot)
             self.scale_node.parent = self.frame_node
             self.scale_node.location = (-200, -100)
 
-    def _append_gamma_node(self):
+    def _append_gamma_node(self, slot: int):
         self.gamma_node = self.material.node_tree.nodes.new('ShaderNodeGamma')
+        self.gamma_node.name = _GAMMA_NODE_NAME.format(slot)
         self.gamma_node.inputs['Gamma'].default_value = self.texture_data.gamma
         self.gamma_node.parent = self.frame_node
         self.gamma_node.location = (300, 0)
@@ -130,15 +175,103 @@ class TextureHelper:
 class MaterialBuilder:
     _scene: Scene
     _options: ImportOptions
-    _image_lookup: Dict[int, bpy.types.Image]
-
-    def __init__(self, scene: Scene, options: ImportOptions):
+    _textures: TexturePrefetcher
+    _image_lookup: Dict[Tuple[int, str], bpy.types.Image] # (texture index, colorspace) -> image
+    _texture_data: Dict[int, TextureData]
+    _texture_keys: Dict[int, str]
+    _image_registry: Optional[DatablockRegistry] = None
+    _material_registry: Optional[DatablockRegistry] = None
+    _templates: Dict[Tuple, bpy.types.Material] # material shape -> the first material that was built with that shape
+
+    def __init__(self, scene: Scene, options: ImportOptions, textures: Optional[TexturePrefetcher] = None):
         self._scene = scene
         self._options = options
+        self._textures = textures or TexturePrefetcher(scene, options)
         self._image_lookup = dict()
+        self._texture_data = dict()
+        self._texture_keys = dict()
+        self._templates = dict()
+
+        if options.REUSE_MATERIALS:
+            self._image_registry = DatablockRegistry(bpy.data.images)
+            self._material_registry = DatablockRegistry(bpy.data.materials)
 
     def create_material(self, mat: Material):
-        scene, OPTIONS = self._scene, self._options
+        if not self._material_registry:
+            return self._build_material(mat)
+
+        # identical materials from earlier imports are reused regardless of their name
+        # the gamma of each texture is part of the key because it decides the image colorspace and any gamma node
+        texture_key = lambda i: (self._get_texture_key(i), self._scene.texture_pool[i].gamma)
+        key = DiskCache.hash(repr((_MATERIAL_VERSION, material_signature(mat, texture_key))).encode())
+        result = self._material_registry.get(key)
+        if result:
+            import_log.object('reused materials', 'reusing material: %s', result.name)
+        else:
+            result = self._build_material(mat)
+            self._material_registry.add(key, result)
+
+        # embedded pixel data is only needed until the texture keys have been hashed and any new images created
+        # if a later material needs to create an image from the same texture it will be read again
+        for m in mat.texture_mappings:
+            if self._scene.texture_pool[m.texture_index].size > 0:
+                self._texture_data.pop(m.texture_index, None)
+
+        return result
+
+    def _build_material(self, mat: Material):
+        OPTIONS = self._options
+
+        slots = self._get_texture_slots(mat)
+
+        # materials with the same shape have identical node trees apart from the images and values in each texture slot,
+        # so once a shape has been built, copying it and replacing those is much faster than building the node tree again
+        shape = (mat.alpha_mode, tuple(_get_slot_shape(s) for s in slots))
+        template = self._templates.get(shape)
+        if template:
+            with profiler.measure('material copying'):
+                result = template.copy()
+                result.name = OPTIONS.material_name(mat)
+                self._fill_slots(result, slots)
+            return result
+
+        result = self._build_node_tree(mat, slots)
+        self._templates[shape] = result
+        return result
+
+    def _get_texture_slots(self, mat: Material) -> List[TextureSlot]:
+        texture_lookups = self._scene.get_texture_lookups(mat)
+
+        result = []
+
+        #duplicate textures for different blend channels, but not within the same blend channel
+        for channel in (ChannelFlags.DEFAULT, ChannelFlags.RED, ChannelFlags.GREEN, ChannelFlags.BLUE, ChannelFlags.ALPHA):
+            for i, (texture, usages) in texture_lookups.get(channel, dict()).items():
+                if not any(u in _SUPPORTED_USAGES for u in usages):
+                    continue #ignore texture if no supported usages
+                result.append((i, texture, usages))
+
+        return result
+
+    def _fill_slots(self, result: bpy.types.Material, slots: List[TextureSlot]):
+        nodes = result.node_tree.nodes
+        for slot, (i, texture, usages) in enumerate(slots):
+            default_input = next(iter(usages.values()))
+
+            img = self._get_image(i, default_input.texture_usage)
+            _setup_image(img, texture, default_input.texture_usage)
+            nodes[_TEXTURE_NODE_NAME.format(slot)].image = img
+
+            if default_input.tiling != (1, 1):
+                scale_node = nodes[_SCALE_NODE_NAME.format(slot)]
+                scale_node.inputs['X'].default_value = default_input.tiling[0]
+                scale_node.inputs['Y'].default_value = default_input.tiling[1]
+
+            if _needs_gamma_node(texture, default_input.texture_usage):
+                nodes[_GAMMA_NODE_NAME.format(slot)].inputs['Gamma'].default_value = texture.gamma
+
+    def _build_node_tree(self, mat: Material, slots: List[TextureSlot]) -> bpy.types.Material:
+        OPTIONS = self._options
 
         result = bpy.data.materials.new(OPTIONS.material_name(mat))
         result.use_nodes = True
@@ -168,18 +301,12 @@ class MaterialBuilder:
             ALPHA_MODE.OPAQUE: 'OPAQUE'
         }
 
-        #duplicate textures for different blend channels, but not within the same blend channel
-        for channel in (ChannelFlags.DEFAULT, ChannelFlags.RED, ChannelFlags.GREEN, ChannelFlags.BLUE, ChannelFlags.ALPHA):
-            texture_lookup = scene.create_texture_lookup(mat, channel)
-            for i, (texture, usages) in texture_lookup.items():
-                if not any(u in usage_lookup for u in usages):
-                    continue #ignore texture if no supported usages
-
-                img = self._get_image(i)
-                helper = TextureHelper(texture, usages, result, img)
-                for usage in usages.keys():
-                    if usage in usage_lookup:
-                        usage_lookup[usage].append(helper)
+        for slot, (i, texture, usages) in enumerate(slots):
+            img = self._get_image(i, next(iter(usages.values())).texture_usage)
+            helper = TextureHelper(texture, usages, result, img, slot)
+            for usage in usages.keys():
+                if usage in usage_lookup:
+                    usage_lookup[usage].append(helper)
 
         diffuse_images = usage_lookup[TEXTURE_USAGE.DIFFUSE]
         bump_images = usage_lookup[TEXTURE_USAGE.NORMAL]
@@ -257,30 +384,91 @@ class MaterialBuilder:
 
         return result
 
-    def _get_image(self, index: int) -> bpy.types.Image:
-        scene, OPTIONS = self._scene, self._options
+    def _get_texture_data(self, index: int) -> TextureData:
+        # the file access has usually already been done on a background thread
+        if index not in self._texture_data:
+            with profiler.measure('image reading'):
+                self._texture_data[index] = self._textures.get(index)
+        return self._texture_data[index]
 
-        # ensure each image is only loaded once, regardless of how many materials it gets used in
-        if index not in self._image_lookup:
-            src = scene.texture_pool[index]
+    def _get_texture_key(self, index: int) -> str:
+        ''' Identifies the source of a texture by the hash of its pixel data if it is embedded, or its resolved path if it is external '''
+
+        if index not in self._texture_keys:
+            src, texture_data = self._scene.texture_pool[index], self._get_texture_data(index)
             if src.size > 0:
-                print(f'loading embedded texture: {src.name} @ {src.address}')
-                pixel_data = SceneReader.read_texture(scene, src)
-                print(f'>>> {len(pixel_data)} bytes loaded')
-
-                # create a new empty image and pack it with the embedded pixel data
-                img = bpy.data.images.new(name=src.name, width=1, height=1)
-                img.pack(data=pixel_data, data_len=src.size)
-                img.source = 'FILE' # images.new() initially starts as 'GENERATED'
+                key = 'data:' + (texture_data.content_hash or DiskCache.hash(texture_data.data))
+            elif texture_data.exists:
+                key = 'file:' + os.path.normcase(os.path.abspath(texture_data.path))
             else:
-                src_path = OPTIONS.texture_path(src)
-                print(f'loading texture: {src_path}')
-                try:
-                    img = bpy.data.images.load(src_path)
-                except:
-                    print('>>> unable to load image')
-                    img = bpy.data.images.new(name=src_path, width=1, height=1)
+                key = 'missing:' + texture_data.path
+            self._texture_keys[index] = key
+        return self._texture_keys[index]
 
-            self._image_lookup[index] = img
+    def _get_image(self, index: int, usage: str) -> bpy.types.Image:
+        # the image settings depend on how the texture is used, so a texture used with different settings gets a separate image
+        colorspace = _get_colorspace(self._scene.texture_pool[index], usage)
 
-        return self._image_lookup[index]
\ No newline at end of file
+        # ensure each image is only loaded once, regardless of how many materials it gets used in
+        lookup_key = (index, colorspace)
+        if lookup_key not in self._image_lookup:
+            with profiler.measure('image loading'):
+                if self._image_registry:
+                    key = f'{self._get_texture_key(index)}|{colorspace}'
+                    img = self._image_registry.get(key)
+                    if img is None:
+                        img = self._load_image(index)
+                        self._image_registry.add(key, img)
+                    else:
+                        import_log.object('reused images', 'reusing image: %s', img.name)
+                    self._image_lookup[lookup_key] = img
+                else:
+                    self._image_lookup[lookup_key] = self._load_image(index)
+
+            # embedded pixel data has been packed into the image, so there is no need to hold on to it
+            if self._scene.texture_pool[index].size > 0:
+                self._texture_data.pop(index, None)
+
+        return self._image_lookup[lookup_key]
+
+    def _load_image(self, index: int) -> bpy.types.Image:
+        scene, OPTIONS = self._scene, self._options
+
+        src = scene.texture_pool[index]
+        texture_data = self._get_texture_data(index)
+
+        if src.size > 0 and texture_data.path:
+            import_log.object('cached textures', 'loading cached texture: %s from %s', src.name, texture_data.path)
+
+            # the embedded texture has been extracted to the texture cache
+            try:
+                img = bpy.data.images.load(texture_data.path)
+                img.name = src.name
+                if not OPTIONS.LINK_TEXTURES:
+                    img.pack()
+                return img
+            except:
+                # the cached file is no longer usable, so read the texture from the source file again and pack it instead
+                import_log.object('missing cached textures', 'unable to load cached texture: %s', texture_data.path)
+                texture_data = TextureData(index, data=SceneReader.read_texture(scene, src, OPTIONS.TEXTURE_BUDGET))
+
+        if src.size > 0:
+            pixel_data = texture_data.data
+            import_log.object('embedded textures', 'loaded embedded texture: %s @ %d (%d bytes)', src.name, src.address, len(pixel_data))
+
+            # create a new empty image and pack it with the embedded pixel data
+            img = bpy.data.images.new(name=src.name, width=1, height=1)
+            img.pack(data=pixel_data, data_len=len(pixel_data))
+            img.source = 'FILE' # images.new() initially starts as 'GENERATED'
+        else:
+            src_path = texture_data.path
+            import_log.object('textures', 'loading texture: %s', src_path)
+            try:
+                if not texture_data.exists:
+                    raise FileNotFoundError(src_path)
+                img = bpy.data.images.load(src_path)
+            except:
+                import_log.object('missing textures', 'unable to load image: %s', src_path)
+                img = bpy.data.images.new(name=src_path, width=1, height=1)
+
+        return img
\ No newline at end of file
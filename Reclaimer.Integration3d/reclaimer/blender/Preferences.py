@@ -1,5 +1,5 @@
 from bpy.types import Context, AddonPreferences
-from bpy.props import BoolProperty, StringProperty, FloatProperty
+from bpy.props import BoolProperty, StringProperty, FloatProperty, IntProperty
 
 from .DependencyInstallerOperator import DependencyInstallerOperator
 
@@ -40,6 +40,18 @@ class RmfPreferences(AddonPreferences):
         default = True
     ) # type: ignore
 
+    instance_permutations: BoolProperty(
+        name = 'Instance Permutations',
+        description = 'Determines if repeats of instanced permutations will be created as instances of the first one instead of separate objects',
+        default = False
+    ) # type: ignore
+
+    instance_models: BoolProperty(
+        name = 'Instance Placements',
+        description = 'Determines if each distinct model will be built once in a hidden collection, with each placement of it created as a collection instance',
+        default = False
+    ) # type: ignore
+
     import_normals: BoolProperty(
         name = 'Import Vertex Normals',
         description = 'Determines if vertex normals will be imported',
@@ -94,10 +106,100 @@ class RmfPreferences(AddonPreferences):
 
     bitmap_ext: StringProperty(
         name = 'Bitmap Extension',
-        description = 'The file extension of the source bitmap files',
+        description = 'The file extension of the source bitmap files. Separate several extensions with semicolons to search in that order. Common image types are also tried if no match is found',
         default = 'tif'
     ) # type: ignore
 
+    reuse_materials: BoolProperty(
+        name = 'Reuse Materials',
+        description = 'Determines if identical images and materials created by previous imports will be reused instead of being created again',
+        default = False
+    ) # type: ignore
+
+    merge_materials: BoolProperty(
+        name = 'Merge Duplicate Materials',
+        description = 'Determines if materials that only differ by name will be merged into a single material',
+        default = False
+    ) # type: ignore
+
+    texture_budget: IntProperty(
+        name = 'Max Embedded Texture Size',
+        description = 'The maximum width or height of embedded textures. Larger textures use their first mip level within this size where available. Set to 0 for full resolution',
+        default = 0,
+        min = 0
+    ) # type: ignore
+
+    scene_cache_size: IntProperty(
+        name = 'Scene Cache Size (MB)',
+        description = 'The amount of mesh data to keep in memory so files that were already opened can be imported again without reading them. Set to 0 to disable',
+        default = 1024,
+        min = 0
+    ) # type: ignore
+
+    geometry_cache_dir: StringProperty(
+        name = 'Geometry Cache Folder',
+        description = 'The folder where decoded mesh data is stored so later imports of the same data do not need to decode it again. Leave empty to disable',
+        default = '',
+        subtype = 'DIR_PATH'
+    ) # type: ignore
+
+    geometry_cache_size: IntProperty(
+        name = 'Geometry Cache Size (MB)',
+        description = 'The maximum size of the geometry cache folder. The least recently used data is deleted when the limit is reached',
+        default = 4096,
+        min = 1
+    ) # type: ignore
+
+    texture_cache_dir: StringProperty(
+        name = 'Texture Cache Folder',
+        description = 'The folder where embedded textures are extracted to so they can be loaded by path, and later imports of the same textures do not need to read them again. Leave empty to disable',
+        default = '',
+        subtype = 'DIR_PATH'
+    ) # type: ignore
+
+    texture_cache_size: IntProperty(
+        name = 'Texture Cache Size (MB)',
+        description = 'The maximum size of the texture cache folder. The least recently used textures are deleted when the limit is reached',
+        default = 4096,
+        min = 1
+    ) # type: ignore
+
+    link_textures: BoolProperty(
+        name = 'Link Cached Textures',
+        description = 'Determines if textures extracted to the texture cache folder will be referenced by path instead of being packed into the .blend file. Linked textures will be missing if they are later deleted from the cache',
+        default = False
+    ) # type: ignore
+
+    decode_workers: IntProperty(
+        name = 'Decode Processes',
+        description = 'The number of background processes to decode mesh data on. Set to 0 to decode on the main thread',
+        default = 0,
+        min = 0,
+        max = 64
+    ) # type: ignore
+
+    prefetch_meshes: IntProperty(
+        name = 'Mesh Prefetch Depth',
+        description = 'The number of meshes to prepare ahead of time on a background thread while objects are being created. Set to 0 to disable',
+        default = 0,
+        min = 0,
+        max = 1024
+    ) # type: ignore
+
+    texture_threads: IntProperty(
+        name = 'Texture Read Threads',
+        description = 'The number of threads used to read textures ahead of time. Set to 0 to read each texture when it is needed',
+        default = 4,
+        min = 0,
+        max = 64
+    ) # type: ignore
+
+    verbose_logging: BoolProperty(
+        name = 'Verbose Console Output',
+        description = 'Determines if a console message will be written for every object created during import',
+        default = False
+    ) # type: ignore
+
     def draw(self, context: Context):
         global _first_draw, _was_missing_dependencies
 
@@ -130,6 +232,8 @@ class RmfPreferences(AddonPreferences):
         box = panel.box()
         box.label(icon='MESH_DATA', text='Mesh Options')
         box.prop(self, 'split_meshes')
+        box.prop(self, 'instance_permutations')
+        box.prop(self, 'instance_models')
         box.prop(self, 'import_normals')
         box.prop(self, 'import_skin')
 
@@ -142,9 +246,28 @@ class RmfPreferences(AddonPreferences):
         box.label(icon='MATERIAL_DATA', text='Material Options')
         box.prop(self, 'bitmap_root')
         box.prop(self, 'bitmap_ext')
+        box.prop(self, 'reuse_materials')
+        box.prop(self, 'merge_materials')
+        box.prop(self, 'texture_budget')
 
         box = panel.box()
         box.label(icon='WORLD_DATA', text='Scale Options')
         box.prop(self, 'object_scale')
         box.prop(self, 'bone_scale')
         box.prop(self, 'marker_scale')
+
+        box = panel.box()
+        box.label(icon='MEMORY', text='Performance Options')
+        box.prop(self, 'scene_cache_size')
+        box.prop(self, 'geometry_cache_dir')
+        box.prop(self, 'geometry_cache_size')
+        box.prop(self, 'texture_cache_dir')
+        box.prop(self, 'texture_cache_size')
+        box.prop(self, 'link_textures')
+        box.prop(self, 'decode_workers')
+        box.prop(self, 'prefetch_meshes')
+        box.prop(self, 'texture_threads')
+
+        box = panel.box()
+        box.label(icon='CONSOLE', text='Logging Options')
+        box.prop(self, 'verbose_logging')
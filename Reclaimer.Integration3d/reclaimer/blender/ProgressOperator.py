@@ -33,12 +33,21 @@ class RmfProgressOperator(QtWindowEventLoop):
         task_queue = builder.begin_create_scene()
 
         def execute_next():
-            if task_queue.finished() or dialog.cancel_requested:
-                builder.end_create_scene()
-                return
-
-            task_queue.execute_batch()
-            return 0
-
+            running = False
+            try:
+                if task_queue.finished() or dialog.cancel_requested:
+                    builder.end_create_scene()
+                    return
+
+                task_queue.execute_batch()
+                running = True
+                return 0
+            finally:
+                # the timer is unregistered if the import fails, so the dialog has to go back to its normal rate either way
+                if not running:
+                    self.busy = False
+
+        # reduce the dialog event pumping while the import timer is running
+        self.busy = True
         bpy.app.timers.register(execute_next, first_interval=0.1)
         return dialog
\ No newline at end of file
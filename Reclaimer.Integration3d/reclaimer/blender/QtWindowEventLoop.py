@@ -5,6 +5,7 @@ import os
 import logging
 import bpy
 
+from time import perf_counter
 from typing import Set
 
 __all__ = [
@@ -22,6 +23,34 @@ else:
 
 logger = logging.getLogger('qtutils')
 
+ACTIVE_INTERVAL = 1 / 120 # while the user is interacting with the dialog or qt has pending events
+BUSY_INTERVAL = 1 / 5 # while an import is running, leave the main thread to the import timer
+IDLE_INTERVAL = 1 / 10 # when there has been no recent activity
+ACTIVITY_TIMEOUT = 0.5 # seconds without input before dropping back to the idle rate
+
+
+class ActivityFilter(QtCore.QObject):
+    ''' Records the time of the most recent user input received by the Qt application '''
+
+    INPUT_EVENTS = {
+        QtCore.QEvent.MouseButtonPress,
+        QtCore.QEvent.MouseButtonRelease,
+        QtCore.QEvent.MouseButtonDblClick,
+        QtCore.QEvent.MouseMove,
+        QtCore.QEvent.Wheel,
+        QtCore.QEvent.KeyPress,
+        QtCore.QEvent.KeyRelease,
+        QtCore.QEvent.Enter,
+        QtCore.QEvent.FocusIn
+    }
+
+    last_input: float = 0.0
+
+    def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if event.type() in ActivityFilter.INPUT_EVENTS:
+            self.last_input = perf_counter()
+        return False
+
 
 class QtWindowEventLoop(bpy.types.Operator):
     ''' Allows PyQt or PySide to run inside Blender '''
@@ -33,6 +62,9 @@ class QtWindowEventLoop(bpy.types.Operator):
     event_loop: QtCore.QEventLoop
     dialog: QtWidgets.QDialog
 
+    # set by derived classes while they are running work on the main thread
+    busy: bool = False
+
     def __init__(self, *args, **kwargs):
         self._args = args
         self._kwargs = kwargs
@@ -45,15 +77,45 @@ class QtWindowEventLoop(bpy.types.Operator):
             # if widget is closed
             logger.debug('finish modal operator')
             wm.event_timer_remove(self._timer)
+            self.app.removeEventFilter(self._activity)
             self.dialog_closed()
             return {'FINISHED'}
-        else:
-            logger.debug('process the events for Qt window')
-            self.event_loop.processEvents()
-            self.app.sendPostedEvents(None, 0)
+
+        # modal() receives every blender event, not just our timer, so only pump at the current rate
+        now = perf_counter()
+        if now - self._last_pump < self._interval:
+            return {'PASS_THROUGH'}
+
+        logger.debug('process the events for Qt window')
+        self._last_pump = now
+        self.event_loop.processEvents()
+        self.app.sendPostedEvents(None, 0)
+
+        self._set_interval(context, self._next_interval(now))
 
         return {'PASS_THROUGH'}
 
+    def _next_interval(self, now: float) -> float:
+        if self.busy:
+            return BUSY_INTERVAL
+        if now - self._activity.last_input < ACTIVITY_TIMEOUT or self._has_pending_events():
+            return ACTIVE_INTERVAL
+        return IDLE_INTERVAL
+
+    def _has_pending_events(self) -> bool:
+        # obsolete in Qt5 but still available in the bindings blender users typically have installed
+        has_pending = getattr(self.app, 'hasPendingEvents', None)
+        return bool(has_pending and has_pending())
+
+    def _set_interval(self, context: bpy.types.Context, interval: float):
+        if interval == self._interval:
+            return
+
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        self._timer = wm.event_timer_add(interval, window=context.window)
+        self._interval = interval
+
     def execute(self, context: bpy.types.Context) -> Set[str]:
         logger.debug('execute operator')
 
@@ -71,12 +133,17 @@ class QtWindowEventLoop(bpy.types.Operator):
 
         self.event_loop = QtCore.QEventLoop()
 
+        self._activity = ActivityFilter()
+        self.app.installEventFilter(self._activity)
+
         self.dialog = self.create_dialog()
         self.dialog.show()
 
-        # run modal
+        # run modal, starting at the active rate so the dialog appears promptly
         wm = context.window_manager
-        self._timer = wm.event_timer_add(1 / 120, window=context.window)
+        self._interval = ACTIVE_INTERVAL
+        self._last_pump = 0.0
+        self._timer = wm.event_timer_add(self._interval, window=context.window)
         context.window_manager.modal_handler_add(self)
 
         return {'RUNNING_MODAL'}
@@ -0,0 +1,87 @@
+import os
+import posixpath
+from typing import Dict, Iterable, Optional
+
+__all__ = [
+    'BitmapIndex'
+]
+
+
+def _normalise(path: str) -> str:
+    return path.replace('\\', '/').strip('/').lower()
+
+def _get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class BitmapIndex:
+    '''
+    An index of every file under a bitmap folder, built with a single directory walk.
+    Lookups are by relative path and are case insensitive, so finding a texture does not need to probe the file system.
+    The index for the current bitmap folder is shared between imports, and is only rebuilt when a file is added to or removed from the folder.
+    '''
+
+    root: str
+    _files: Dict[str, Dict[str, str]] # lower case relative path without extension -> lower case extension -> full path
+    _folders: Dict[str, Optional[int]] # full path -> modified time of every folder that was walked
+
+    _instance: Optional['BitmapIndex'] = None
+
+    def __init__(self, root: str):
+        self.root = root
+        self._files = dict()
+        self._folders = dict()
+
+        for dir, _, files in os.walk(root):
+            self._folders[dir] = _get_mtime(dir)
+            rel_dir = os.path.relpath(dir, root)
+            rel_dir = '' if rel_dir == '.' else _normalise(rel_dir)
+            for file in files:
+                stem, ext = posixpath.splitext(file.lower())
+                key = posixpath.join(rel_dir, stem) if rel_dir else stem
+                self._files.setdefault(key, dict()).setdefault(ext.lstrip('.'), os.path.join(dir, file))
+
+    @staticmethod
+    def for_root(root: str) -> 'BitmapIndex':
+        ''' Gets the shared index for a folder, walking the folder again only if it is a different folder or its contents have changed '''
+
+        instance = BitmapIndex._instance
+        if instance is None or instance.root != root or instance.is_stale():
+            instance = BitmapIndex._instance = BitmapIndex(root)
+        return instance
+
+    def is_stale(self) -> bool:
+        ''' Checks whether any of the indexed folders have changed, which only needs one `stat` per folder rather than one per texture '''
+        return any(_get_mtime(dir) != mtime for dir, mtime in self._folders.items())
+
+    def __len__(self) -> int:
+        return sum(len(x) for x in self._files.values())
+
+    def find(self, name: str, extensions: Iterable[str]) -> Optional[str]:
+        '''
+        Finds the file for a texture name relative to the root folder, trying each extension in order.
+        If the name already has an extension it is tried with the full name first, then with its extension replaced.
+        '''
+
+        name = name.replace('\\', '/').strip('/')
+        stem, _ = posixpath.splitext(name)
+        candidates = [name, stem] if stem != name else [name]
+        extensions = [e.lower().lstrip('.') for e in extensions]
+
+        for key in candidates:
+            files = self._files.get(key.lower())
+            if not files:
+                continue
+            for ext in extensions:
+                if ext in files:
+                    return files[ext]
+
+        return None
+
+    def find_all(self, names: Iterable[str], extensions: Iterable[str]) -> Dict[str, Optional[str]]:
+        ''' Finds the file for each texture name. Names that could not be found map to `None` '''
+        extensions = list(extensions)
+        return { name: self.find(name, extensions) for name in names }
@@ -0,0 +1,158 @@
+import struct
+from typing import Tuple, Optional
+
+__all__ = [
+    'DDS_MAX_HEADER_SIZE',
+    'DdsHeader'
+]
+
+_MAGIC = b'DDS '
+_HEADER_SIZE = 4 + 124 # magic + DDS_HEADER
+_DX10_HEADER_SIZE = 20
+DDS_MAX_HEADER_SIZE = _HEADER_SIZE + _DX10_HEADER_SIZE
+
+_DDSD_MIPMAPCOUNT = 0x20000
+_DDSD_LINEARSIZE = 0x80000
+_DDSD_DEPTH = 0x800000
+
+_DDPF_FOURCC = 0x4
+
+_DDSCAPS_COMPLEX = 0x8
+_DDSCAPS_MIPMAP = 0x400000
+_DDSCAPS2_CUBEMAP = 0x200
+_DDSCAPS2_VOLUME = 0x200000
+
+_DX10_TEXTURE2D = 3
+_DX10_MISC_TEXTURECUBE = 0x4
+
+# bytes per 4x4 block for block compressed formats
+_FOURCC_BLOCK_SIZES = {
+    b'DXT1': 8, b'ATI1': 8, b'BC4U': 8, b'BC4S': 8,
+    b'DXT2': 16, b'DXT3': 16, b'DXT4': 16, b'DXT5': 16, b'ATI2': 16, b'BC5U': 16, b'BC5S': 16
+}
+
+_DXGI_BLOCK_SIZES = {
+    **{ f: 8 for f in range(70, 73) }, # BC1
+    **{ f: 16 for f in range(73, 79) }, # BC2, BC3
+    **{ f: 8 for f in range(79, 82) }, # BC4
+    **{ f: 16 for f in range(82, 85) }, # BC5
+    **{ f: 16 for f in range(94, 100) } # BC6H, BC7
+}
+
+# bits per pixel for uncompressed formats
+_DXGI_PIXEL_BITS = {
+    **{ f: 128 for f in range(1, 5) }, # R32G32B32A32
+    **{ f: 64 for f in range(9, 15) }, # R16G16B16A16
+    **{ f: 32 for f in range(23, 26) }, # R10G10B10A2
+    **{ f: 32 for f in range(27, 33) }, # R8G8B8A8
+    **{ f: 32 for f in range(39, 44) }, # R32
+    **{ f: 16 for f in range(48, 53) }, # R8G8
+    **{ f: 16 for f in range(53, 58) }, # R16
+    **{ f: 8 for f in range(60, 66) }, # R8, A8
+    85: 16, 86: 16, # B5G6R5, B5G5R5A1
+    **{ f: 32 for f in range(87, 94) } # B8G8R8A8, B8G8R8X8
+}
+
+
+class DdsHeader:
+    '''
+    The header of a simple 2D DDS texture, used to find and extract individual mip levels without reading the whole file.
+    Cube maps, volume textures, texture arrays and formats with an unknown size per pixel are not supported.
+    '''
+
+    width: int
+    height: int
+    mip_count: int
+    header_size: int # size of the header including the magic number and DX10 extension, ie the offset of the first mip level
+    block_size: int = 0 # bytes per 4x4 block, or 0 if the format is not block compressed
+    pixel_bits: int = 0 # bits per pixel if the format is not block compressed
+
+    _raw: bytes
+
+    @staticmethod
+    def parse(data: bytes) -> Optional['DdsHeader']:
+        ''' Reads the header from the start of a DDS file. Returns `None` if the data is not a supported DDS texture '''
+
+        if len(data) < _HEADER_SIZE or data[:4] != _MAGIC:
+            return None
+
+        flags, height, width, _, depth, mip_count = struct.unpack_from('<6I', data, 8)
+        pf_flags, fourcc, pixel_bits = struct.unpack_from('<I4sI', data, 80)
+        caps, caps2 = struct.unpack_from('<2I', data, 108)
+
+        if caps2 & (_DDSCAPS2_CUBEMAP | _DDSCAPS2_VOLUME) or (flags & _DDSD_DEPTH and depth > 1):
+            return None
+
+        header = DdsHeader()
+        header.width = width
+        header.height = height
+        header.mip_count = max(1, mip_count) if flags & _DDSD_MIPMAPCOUNT or caps & _DDSCAPS_MIPMAP else 1
+        header.header_size = _HEADER_SIZE
+
+        if not pf_flags & _DDPF_FOURCC:
+            header.pixel_bits = pixel_bits
+        elif fourcc in _FOURCC_BLOCK_SIZES:
+            header.block_size = _FOURCC_BLOCK_SIZES[fourcc]
+        elif fourcc == b'DX10':
+            if len(data) < DDS_MAX_HEADER_SIZE:
+                return None
+
+            dxgi_format, dimension, misc_flags, array_size = struct.unpack_from('<4I', data, _HEADER_SIZE)
+            if dimension != _DX10_TEXTURE2D or misc_flags & _DX10_MISC_TEXTURECUBE or array_size > 1:
+                return None
+
+            header.header_size = DDS_MAX_HEADER_SIZE
+            header.block_size = _DXGI_BLOCK_SIZES.get(dxgi_format, 0)
+            header.pixel_bits = _DXGI_PIXEL_BITS.get(dxgi_format, 0)
+        else:
+            return None
+
+        if not (header.block_size or header.pixel_bits) or width == 0 or height == 0:
+            return None
+
+        header._raw = bytes(data[:header.header_size])
+        return header
+
+    def level_dimensions(self, level: int) -> Tuple[int, int]:
+        return (max(1, self.width >> level), max(1, self.height >> level))
+
+    def level_size(self, level: int) -> int:
+        ''' Gets the number of bytes in a mip level '''
+
+        width, height = self.level_dimensions(level)
+        if self.block_size:
+            return max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * self.block_size
+        return (width * self.pixel_bits + 7) // 8 * height
+
+    def level_offset(self, level: int) -> int:
+        ''' Gets the position of a mip level relative to the start of the file '''
+        return self.header_size + sum(self.level_size(i) for i in range(level))
+
+    def select_level(self, max_resolution: int) -> int:
+        ''' Gets the largest mip level that fits within `max_resolution` in both dimensions, or the smallest level if none of them do '''
+
+        for level in range(self.mip_count):
+            if max(self.level_dimensions(level)) <= max_resolution:
+                return level
+        return self.mip_count - 1
+
+    def pack_level(self, level: int, level_data: bytes) -> bytes:
+        ''' Creates a DDS file containing only the given mip level '''
+
+        header = bytearray(self._raw)
+        width, height = self.level_dimensions(level)
+        flags, = struct.unpack_from('<I', header, 8)
+
+        if flags & _DDSD_LINEARSIZE:
+            pitch = len(level_data)
+        elif self.block_size:
+            pitch = max(1, (width + 3) // 4) * self.block_size
+        else:
+            pitch = (width * self.pixel_bits + 7) // 8
+
+        caps, = struct.unpack_from('<I', header, 108)
+        struct.pack_into('<I', header, 108, caps & ~(_DDSCAPS_COMPLEX | _DDSCAPS_MIPMAP))
+        struct.pack_into('<4I', header, 8, flags & ~_DDSD_MIPMAPCOUNT, height, width, pitch)
+        struct.pack_into('<I', header, 28, 1)
+
+        return bytes(header) + level_data
@@ -0,0 +1,222 @@
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Dict, Tuple, Iterable, Optional
+
+from .ImportLog import logger
+from .ImportOptions import ImportOptions
+from .Scene import Scene
+from .Vectors import VectorDescriptor, numpy
+from .VertexBuffer import VectorBuffer
+from .IndexBuffer import IndexBuffer, IndexLayout
+
+__all__ = [
+    'DecodePool',
+    'DecodeBatch'
+]
+
+IndexRange = Tuple[int, int] # offset, count
+
+
+class DecodeBatch:
+    '''
+    The decode work for a batch of buffers. The workers write directly into a single block of shared memory,
+    and once collected the buffers use arrays that view that memory rather than copies.
+    '''
+
+    _block: SharedMemory
+    _vertex_tasks: List[Tuple[Future, List[Tuple[VectorBuffer, int]]]] # channel, byte offset
+    _index_tasks: List[Tuple[Future, IndexBuffer, List[Tuple[int, int, int]]]] # offset, count, byte offset
+    _channels: List[VectorBuffer]
+    _ranges: List[Tuple[IndexBuffer, int, int]]
+
+    def __init__(self, block: SharedMemory):
+        self._block = block
+        self._vertex_tasks = []
+        self._index_tasks = []
+        self._channels = []
+        self._ranges = []
+
+    @property
+    def triangle_ranges(self) -> List[Tuple[IndexBuffer, int, int]]:
+        ''' The (buffer, offset, count) of each index range that has been unpacked, once the batch is collected '''
+        return list(self._ranges)
+
+    def collect(self) -> List[VectorBuffer]:
+        '''
+        Waits for the workers to finish and provides the decoded arrays to each buffer. Returns the channels that were decoded.
+        The index ranges that were unpacked are available from `triangle_ranges`.
+        If a worker fails its buffers are left as they were, so they will be decoded on access instead.
+        '''
+
+        for future, channels in self._vertex_tasks:
+            try:
+                future.result()
+            except Exception:
+                logger.warning('failed to decode vertex buffer on worker process', exc_info=True)
+                continue
+
+            for channel, offset in channels:
+                descriptor = channel.descriptor
+                shape = (len(channel), descriptor.dimensions)
+                channel.set_array(numpy.ndarray(shape, descriptor.array_dtype, self._block.buf, offset))
+                self._channels.append(channel)
+
+        for future, buffer, ranges in self._index_tasks:
+            try:
+                counts = future.result()
+            except Exception:
+                logger.warning('failed to decode index buffer on worker process', exc_info=True)
+                continue
+
+            for (offset, count, byte_offset), triangle_count in zip(ranges, counts):
+                buffer.set_triangles(offset, count, numpy.ndarray((triangle_count, 3), 'uint32', self._block.buf, byte_offset))
+                self._ranges.append((buffer, offset, count))
+
+        self._vertex_tasks.clear()
+        self._index_tasks.clear()
+        return list(self._channels)
+
+    def release(self):
+        ''' Discards the arrays that were provided to the buffers and frees the shared memory '''
+
+        for channel in self._channels:
+            channel.set_array(None)
+        for buffer, offset, count in self._ranges:
+            buffer.set_triangles(offset, count, None)
+
+        self._channels.clear()
+        self._ranges.clear()
+
+        try:
+            self._block.close()
+        except BufferError:
+            # something is still holding one of the arrays, the memory will be freed once it is garbage collected
+            logger.debug('shared memory %s is still in use', self._block.name)
+        self._block.unlink()
+
+
+class DecodePool:
+    '''
+    Decodes vertex channels and unpacks triangles on worker processes, so decoding is spread across cores instead of running on the main thread.
+    Worker processes are started using `sys.executable`, so this is only usable where that is a python interpreter. Requires numpy.
+    '''
+
+    _executor: ProcessPoolExecutor
+    _batches: List[DecodeBatch]
+
+    def __init__(self, workers: int):
+        if numpy is None:
+            raise Exception('numpy is not available')
+
+        # spawn rather than fork so the workers do not inherit the host application's state
+        self._executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        self._batches = []
+
+    @staticmethod
+    def for_options(options: ImportOptions) -> Optional['DecodePool']:
+        ''' Creates a pool for an import, or returns `None` if parallel decoding is disabled or numpy is unavailable '''
+        if options.DECODE_WORKERS <= 0 or numpy is None:
+            return None
+        return DecodePool(options.DECODE_WORKERS)
+
+    def submit(self, scene: Scene, vertex_buffer_indices: Iterable[int], index_ranges: Dict[int, Iterable[IndexRange]]) -> Optional[DecodeBatch]:
+        '''
+        Starts decoding the channels that have been read for the specified vertex buffers, and unpacking the triangles
+        for each range of the specified index buffers. Buffers must already be loaded. Channels that have already been decoded and ranges that already have triangles are skipped.
+        Returns `None` if there was nothing to decode.
+        '''
+
+        vertex_tasks = []
+        index_tasks = []
+        size = 0
+
+        for i in vertex_buffer_indices:
+            channels = []
+            for channel in scene.vertex_buffer_pool[i].loaded_channels():
+                if not channel.decoded:
+                    channels.append((channel, size))
+                    size += len(channel) * channel.descriptor.dimensions * 4
+            if channels:
+                vertex_tasks.append(channels)
+
+        for i, ranges in index_ranges.items():
+            buffer = scene.index_buffer_pool[i]
+            if buffer.index_layout not in (IndexLayout.TRIANGLE_LIST, IndexLayout.TRIANGLE_STRIP):
+                continue
+
+            targets = []
+            for offset, count in sorted(ranges):
+                if buffer.has_triangles(offset, count):
+                    continue
+                targets.append((offset, count, size))
+                # allocate for the maximum number of triangles the range could produce
+                size += _max_triangles(buffer.index_layout, count) * 3 * 4
+            if targets:
+                index_tasks.append((buffer, targets))
+
+        if size == 0:
+            return None
+
+        batch = DecodeBatch(SharedMemory(create=True, size=size))
+        self._batches.append(batch)
+
+        name = batch._block.name
+        for channels in vertex_tasks:
+            tasks = [(c.descriptor.layout, len(c), c.data, offset) for c, offset in channels]
+            batch._vertex_tasks.append((self._executor.submit(_decode_vectors, name, tasks), channels))
+
+        for buffer, targets in index_tasks:
+            future = self._executor.submit(_decode_indices, name, buffer.index_layout, buffer.width, buffer.data, targets)
+            batch._index_tasks.append((future, buffer, targets))
+
+        return batch
+
+    def close(self):
+        ''' Stops the worker processes and frees all shared memory. Arrays provided to buffers by this pool are discarded '''
+
+        for batch in self._batches:
+            for future, _ in batch._vertex_tasks:
+                future.cancel()
+            for future, _, _ in batch._index_tasks:
+                future.cancel()
+
+        self._executor.shutdown(wait=True)
+
+        for batch in self._batches:
+            batch.release()
+        self._batches.clear()
+
+
+def _max_triangles(layout: IndexLayout, count: int) -> int:
+    return count // 3 if layout == IndexLayout.TRIANGLE_LIST else max(0, count - 2)
+
+# the functions below run on the worker processes
+
+def _decode_vectors(block_name: str, tasks: List[Tuple[tuple, int, bytes, int]]):
+    block = SharedMemory(name=block_name)
+    try:
+        for layout, count, data, offset in tasks:
+            array = VectorDescriptor(*layout).decode_array(data, count)
+            target = numpy.ndarray(array.shape, array.dtype, block.buf, offset)
+            target[:] = array
+            del target # the block cannot be closed while a view of it exists
+    finally:
+        block.close()
+
+def _decode_indices(block_name: str, layout: IndexLayout, width: int, data: bytes, targets: List[Tuple[int, int, int]]) -> List[int]:
+    buffer = IndexBuffer(layout, width, data)
+    counts = []
+
+    block = SharedMemory(name=block_name)
+    try:
+        for offset, count, byte_offset in targets:
+            triangles = buffer.get_triangle_array(offset, count)
+            target = numpy.ndarray(triangles.shape, triangles.dtype, block.buf, byte_offset)
+            target[:] = triangles
+            del target
+            counts.append(len(triangles))
+    finally:
+        block.close()
+
+    return counts
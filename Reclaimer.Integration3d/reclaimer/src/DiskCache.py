@@ -0,0 +1,129 @@
+import os
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Set, Tuple, Callable, Optional, BinaryIO
+
+from .ImportLog import logger
+
+__all__ = [
+    'DiskCache'
+]
+
+
+class DiskCache:
+    '''
+    A directory of files keyed by content hash that persists between sessions.
+    The modified time of each file is updated when it is used, and once the total size exceeds `max_size`
+    the least recently used files are deleted. Files are written to a temporary name first so they can be written
+    from multiple threads and a partially written file is never returned. Pinned files are not deleted until they are unpinned.
+    '''
+
+    directory: str
+    max_size: int # bytes
+
+    _files: Dict[str, Tuple[float, int]] # file name -> (last used, size)
+    _pinned: Set[str] # file names that are in use and must not be deleted
+    _total: int
+    _lock: threading.Lock
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self._files = dict()
+        self._pinned = set()
+        self._total = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                self._files[entry.name] = (stat.st_mtime, stat.st_size)
+                self._total += stat.st_size
+
+    @staticmethod
+    def hash(*parts: bytes) -> str:
+        ''' Gets a key for the given content '''
+        h = hashlib.blake2b(digest_size=20)
+        for p in parts:
+            h.update(p)
+        return h.hexdigest()
+
+    @property
+    def total_size(self) -> int:
+        return self._total
+
+    def get(self, key: str, ext: str) -> Optional[str]:
+        ''' Gets the path of the cached file for a key, or `None` if it has not been cached '''
+
+        name = key + ext
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name not in self._files:
+                return None
+            try:
+                os.utime(path)
+            except OSError:
+                # deleted externally
+                self._remove(name)
+                return None
+            self._files[name] = (os.path.getmtime(path), self._files[name][1])
+        return path
+
+    def put(self, key: str, ext: str, write_func: Callable[[BinaryIO], None]) -> str:
+        ''' Writes a file for a key using `write_func` and returns its path. Least recently used files are deleted if the cache is over its size limit '''
+
+        name = key + ext
+        path = os.path.join(self.directory, name)
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write_func(f)
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        stat = os.stat(path)
+        with self._lock:
+            if name in self._files:
+                self._total -= self._files[name][1]
+            self._files[name] = (stat.st_mtime, stat.st_size)
+            self._total += stat.st_size
+            self._trim(name)
+        return path
+
+    def trim(self):
+        with self._lock:
+            self._trim(None)
+
+    def pin(self, key: str, ext: str):
+        ''' Prevents the file for a key from being deleted to make space until `unpin_all()` is called. The file does not need to exist yet '''
+        with self._lock:
+            self._pinned.add(key + ext)
+
+    def unpin_all(self):
+        ''' Allows every pinned file to be deleted again, and deletes files if the cache is over its size limit '''
+        with self._lock:
+            self._pinned.clear()
+            self._trim(None)
+
+    def _trim(self, keep: Optional[str]):
+        if self._total <= self.max_size:
+            return
+
+        for name, _ in sorted(self._files.items(), key=lambda item: item[1][0]):
+            if self._total <= self.max_size:
+                break
+            if name != keep and name not in self._pinned:
+                self._remove(name)
+
+    def _remove(self, name: str):
+        _, size = self._files.pop(name)
+        self._total -= size
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            # files that are still open (such as memory mapped arrays) cannot be deleted on some platforms
+            logger.debug('could not delete cached file %s', name)
@@ -0,0 +1,136 @@
+import struct
+from typing import Dict, Tuple, Iterable, Optional
+
+from .ImportLog import logger
+from .ImportOptions import ImportOptions
+from .DiskCache import DiskCache
+from .Scene import Scene
+from .Vectors import numpy
+from .VertexBuffer import VectorBuffer
+from .IndexBuffer import IndexBuffer, IndexLayout
+
+__all__ = [
+    'GeometryCache'
+]
+
+# increment this if the decoded array format changes so existing cache files are ignored
+_FORMAT_VERSION = 1
+
+IndexRange = Tuple[int, int] # offset, count
+
+
+class GeometryCache:
+    '''
+    Stores decoded vertex channels and unpacked triangle arrays on disk, keyed by the hash of their source data.
+    When the same data is seen again, even from a different file, the decoded array is memory mapped instead of being decoded again.
+    Requires numpy.
+    '''
+
+    _cache: DiskCache
+
+    _instance: Optional['GeometryCache'] = None
+
+    def __init__(self, directory: str, max_size: int):
+        if numpy is None:
+            raise Exception('numpy is not available')
+        self._cache = DiskCache(directory, max_size)
+
+    @staticmethod
+    def for_options(options: ImportOptions) -> Optional['GeometryCache']:
+        ''' Gets the shared cache for the directory in the import options, or `None` if the cache is disabled or numpy is unavailable '''
+
+        if not options.GEOMETRY_CACHE_DIR or numpy is None:
+            return None
+
+        max_size = options.GEOMETRY_CACHE_SIZE * 1024 * 1024
+        instance = GeometryCache._instance
+        if instance is None or instance._cache.directory != options.GEOMETRY_CACHE_DIR:
+            instance = GeometryCache._instance = GeometryCache(options.GEOMETRY_CACHE_DIR, max_size)
+        instance._cache.max_size = max_size
+        return instance
+
+    def decode_buffers(self, scene: Scene, vertex_buffer_indices: Iterable[int], index_ranges: Optional[Dict[int, Iterable[IndexRange]]] = None, load_only: bool = False):
+        '''
+        Decodes every channel that has been read for the specified vertex buffers, and unpacks the triangles for each range of the specified index buffers,
+        using cached arrays where possible. If `load_only` is set, arrays that are not in the cache are left for the caller to decode and `store()`.
+        '''
+        for i in vertex_buffer_indices:
+            for channel in scene.vertex_buffer_pool[i].loaded_channels():
+                if load_only:
+                    self.load(channel)
+                else:
+                    self.decode(channel)
+
+        for i, ranges in (index_ranges or {}).items():
+            buffer = scene.index_buffer_pool[i]
+            if buffer.index_layout not in (IndexLayout.TRIANGLE_LIST, IndexLayout.TRIANGLE_STRIP):
+                continue
+            for offset, count in ranges:
+                if load_only:
+                    self.load_triangles(buffer, offset, count)
+                elif not self.load_triangles(buffer, offset, count):
+                    buffer.set_triangles(offset, count, buffer.get_triangle_array(offset, count))
+                    self.store_triangles(buffer, offset, count)
+
+    def decode(self, buffer: VectorBuffer):
+        if not self.load(buffer):
+            self.store(buffer)
+
+    def load(self, buffer: VectorBuffer) -> bool:
+        ''' Provides the cached array to a buffer, if there is one. Returns `True` if the buffer has been decoded '''
+
+        if buffer.decoded:
+            return True
+
+        path = self._cache.get(_get_key(buffer), '.npy')
+        if not path:
+            return False
+
+        try:
+            buffer.set_array(numpy.load(path, mmap_mode='r'))
+            return True
+        except Exception:
+            logger.debug('ignoring unreadable geometry cache file %s', path, exc_info=True)
+            return False
+
+    def store(self, buffer: VectorBuffer):
+        ''' Adds the decoded array of a buffer to the cache '''
+        array = buffer.to_array()
+        self._cache.put(_get_key(buffer), '.npy', lambda f: numpy.save(f, array))
+
+    def load_triangles(self, buffer: IndexBuffer, offset: int, count: int) -> bool:
+        ''' Provides the cached triangles for a range of an index buffer, if there are any. Returns `True` if the range has triangles '''
+
+        if buffer.has_triangles(offset, count):
+            return True
+
+        path = self._cache.get(_get_triangle_key(buffer, offset, count), '.npy')
+        if not path:
+            return False
+
+        try:
+            buffer.set_triangles(offset, count, numpy.load(path, mmap_mode='r'))
+            return True
+        except Exception:
+            logger.debug('ignoring unreadable geometry cache file %s', path, exc_info=True)
+            return False
+
+    def store_triangles(self, buffer: IndexBuffer, offset: int, count: int):
+        ''' Adds the triangles that were provided for a range of an index buffer to the cache '''
+        array = buffer._triangles[(offset, count)]
+        self._cache.put(_get_triangle_key(buffer, offset, count), '.npy', lambda f: numpy.save(f, array))
+
+
+def _get_key(buffer: VectorBuffer) -> str:
+    return DiskCache.hash(
+        struct.pack('<ii', _FORMAT_VERSION, len(buffer)),
+        repr(buffer.descriptor.layout).encode(),
+        buffer.data
+    )
+
+def _get_triangle_key(buffer: IndexBuffer, offset: int, count: int) -> str:
+    width = buffer.width
+    return DiskCache.hash(
+        struct.pack('<iiii', _FORMAT_VERSION, buffer.index_layout, width, count),
+        buffer.data[offset * width:(offset + count) * width]
+    )
@@ -0,0 +1,84 @@
+import sys
+import logging
+from time import perf_counter
+from typing import Dict, Union
+
+__all__ = [
+    'logger',
+    'ImportLog',
+    'import_log'
+]
+
+logger = logging.getLogger('reclaimer')
+
+
+class ImportLog:
+    '''
+    Counts per-object log events by phase and only formats/writes them when DEBUG output is enabled.
+    Per-object messages are rate limited per phase so large imports cannot flood the console.
+    '''
+
+    max_per_second: int = 20
+
+    _counts: Dict[str, int]
+    _suppressed: Dict[str, int]
+    _windows: Dict[str, float]
+    _window_counts: Dict[str, int]
+
+    def __init__(self):
+        self._counts = dict()
+        self._suppressed = dict()
+        self._windows = dict()
+        self._window_counts = dict()
+
+    def configure(self, level: Union[int, str] = logging.INFO, max_per_second: int = 20):
+        ''' Sets the output level and ensures the logger writes to the host application console '''
+
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.propagate = False
+
+        logger.setLevel(level)
+        self.max_per_second = max_per_second
+
+    def reset(self):
+        self._counts.clear()
+        self._suppressed.clear()
+        self._windows.clear()
+        self._window_counts.clear()
+
+    def object(self, phase: str, msg: str, *args):
+        ''' Records a per-object event. The message is only formatted if DEBUG output is enabled and the phase is under its rate limit '''
+
+        self._counts[phase] = self._counts.get(phase, 0) + 1
+
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        now = perf_counter()
+        if now - self._windows.get(phase, 0.0) >= 1.0:
+            self._windows[phase] = now
+            self._window_counts[phase] = 0
+
+        if self.max_per_second > 0 and self._window_counts[phase] >= self.max_per_second:
+            self._suppressed[phase] = self._suppressed.get(phase, 0) + 1
+            return
+
+        self._window_counts[phase] += 1
+        logger.debug(msg, *args)
+
+    def summary(self):
+        ''' Writes the aggregated object count for each phase '''
+
+        for phase, count in self._counts.items():
+            suppressed = self._suppressed.get(phase, 0)
+            if suppressed:
+                logger.info('%s: %d (%d messages suppressed)', phase, count, suppressed)
+            else:
+                logger.info('%s: %d', phase, count)
+
+
+# shared instance so the builder and viewport interfaces aggregate into the same counts
+import_log = ImportLog()
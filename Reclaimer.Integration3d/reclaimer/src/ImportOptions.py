@@ -1,4 +1,6 @@
+import re
 from pathlib import Path
+from typing import Set, List
 
 from .Material import *
 from .Model import *
@@ -7,6 +9,9 @@ __all__ = [
     'ImportOptions'
 ]
 
+# other image types to look for when a texture is not found with the preferred extension
+_FALLBACK_EXTENSIONS = ['tif', 'tiff', 'png', 'dds', 'tga', 'jpg', 'bmp']
+
 
 class ImportOptions:
     IMPORT_BONES: bool = True
@@ -15,6 +20,8 @@ class ImportOptions:
     IMPORT_MATERIALS: bool = True
 
     SPLIT_MESHES: bool = False
+    INSTANCE_PERMUTATIONS: bool = False # create repeats of instanced permutations as instances of the first one
+    INSTANCE_MODELS: bool = False # build each distinct model once and create each placement of it as an instance
     IMPORT_NORMALS: bool = True
     IMPORT_SKIN: bool = True
     IMPORT_UVW: bool = True
@@ -28,7 +35,41 @@ class ImportOptions:
     MARKER_PREFIX: str = '#'
 
     BITMAP_ROOT: str = ''
-    BITMAP_EXT: str = 'tif'
+    BITMAP_EXT: str = 'tif' # the preferred extension, or several separated by semicolons
+    REUSE_MATERIALS: bool = False # reuse identical images and materials that were created by earlier imports
+    MERGE_MATERIALS: bool = False # create materials that only differ by name once and share them
+    TEXTURE_BUDGET: int = 0 # max width/height for embedded DDS textures, which uses a smaller mip level if available. 0 for full resolution
+
+    SCENE_CACHE_SIZE: int = 1024 # MB of buffer data to keep for previously opened files, 0 to disable
+    GEOMETRY_CACHE_DIR: str = '' # where to store decoded vertex data for later imports, empty to disable
+    GEOMETRY_CACHE_SIZE: int = 4096 # MB
+    TEXTURE_CACHE_DIR: str = '' # where to extract embedded textures so they can be loaded by path, empty to disable
+    TEXTURE_CACHE_SIZE: int = 4096 # MB
+    LINK_TEXTURES: bool = False # reference extracted textures from the cache instead of packing them
+    DECODE_WORKERS: int = 0 # number of processes to decode mesh data on, 0 to decode on the main thread
+    PREFETCH_MESHES: int = 0 # number of meshes to prepare ahead on a background thread, 0 to disable
+    TEXTURE_THREADS: int = 4 # number of threads to read textures on ahead of time, 0 to read them as they are needed
+
+    LOG_LEVEL: str = 'INFO' # DEBUG enables per-object output
+    LOG_SUMMARY: bool = True
+    LOG_RATE_LIMIT: int = 20 # max per-object messages per second for each phase
+
+    TIMING_REPORT: bool = True
+    TIMING_TOP_N: int = 10
+    TIMING_JSON_PATH: str = ''
+
+    def vertex_channels(self) -> Set[str]:
+        ''' Gets the block codes of the vertex channels that should be read for the current options '''
+        channels = {'POSN'}
+        if self.IMPORT_NORMALS:
+            channels.add('NORM')
+        if self.IMPORT_UVW:
+            channels.add('TEXC')
+        if self.IMPORT_COLORS:
+            channels.add('COLR')
+        if self.IMPORT_SKIN:
+            channels.update(('BLID', 'BLWT'))
+        return channels
 
     def model_name(self, model: Model):
         return f'{model.name}'
@@ -48,7 +89,16 @@ class ImportOptions:
     def material_name(self, material: Material):
         return f'{material.name}'
 
+    def texture_extensions(self) -> List[str]:
+        ''' Gets the extensions to look for texture files with, in order of preference '''
+        result = []
+        for ext in re.split(r'[;,\s]+', self.BITMAP_EXT) + _FALLBACK_EXTENSIONS:
+            ext = ext.lstrip('.')
+            if ext and ext.lower() not in (x.lower() for x in result):
+                result.append(ext)
+        return result
+
     def texture_path(self, texture: Texture):
-        ext = self.BITMAP_EXT if self.BITMAP_EXT else 'tif'
-        path = Path(self.BITMAP_ROOT).joinpath(texture.name).with_suffix('.' + ext.lstrip('.'))
+        ext = self.texture_extensions()[0]
+        path = Path(self.BITMAP_ROOT).joinpath(texture.name).with_suffix('.' + ext)
         return str(path)
\ No newline at end of file
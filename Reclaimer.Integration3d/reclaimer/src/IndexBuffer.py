@@ -1,11 +1,16 @@
 import struct
 import itertools
 from enum import IntEnum
-from typing import List, Iterable, Iterator, overload
+from typing import List, Dict, Tuple, Iterable, Iterator, Callable, Optional, overload
 
 from .Types import Triangle
 from .Model import Mesh, MeshSegment
 
+try:
+    import numpy
+except ImportError:
+    numpy = None # get_triangle_array() is unavailable
+
 __all__ = [
     'IndexLayout',
     'IndexBuffer'
@@ -23,20 +28,114 @@ class IndexLayout(IntEnum):
     RECT_LIST = 7
 
 _index_widths = (None, 'B', 'H', None, 'I')
+_array_formats = (None, '<u1', '<u2', None, '<u4')
 
 class IndexBuffer:
     index_layout: IndexLayout
-    indices: List[int]
-
-    def __init__(self, index_layout: IndexLayout, width: int, data: bytes):
+    width: int
+    count: int
+    _binary: bytes = None
+    _indices: List[int] = None # unpacked from _binary on first access
+    _triangles: Dict[Tuple[int, int], 'numpy.ndarray'] = None # triangles that were unpacked in bulk, keyed by index range
+    _loader: Callable[['IndexBuffer'], None] = None # reads the data on first access if it was not provided up front
+
+    def __init__(self, index_layout: IndexLayout, width: int, data: Optional[bytes] = None, count: int = 0):
         if width <= 0 or width > 4 or width == 3:
             raise Exception('Unsupported binary width')
 
         self.index_layout = index_layout
-        self.indices = list(t[0] for t in struct.iter_unpack(_index_widths[width], data))
+        self.width = width
+        self.count = count
+        if data is not None:
+            self.set_data(data)
 
     def __repr__(self) -> str:
-        return f'<{self.__class__.name}|{IndexLayout(self.index_layout).name}|{self.indices.count}>'
+        return f'<{self.__class__.__name__}|{IndexLayout(self.index_layout).name}|{self.count}>'
+
+    @property
+    def loaded(self) -> bool:
+        return self._binary is not None
+
+    @property
+    def data(self) -> bytes:
+        self._ensure_loaded()
+        return self._binary
+
+    @property
+    def indices(self) -> List[int]:
+        if self._indices is None:
+            self._ensure_loaded()
+            self._indices = list(t[0] for t in struct.iter_unpack(_index_widths[self.width], self._binary))
+        return self._indices
+
+    def set_data(self, data: bytes):
+        self._binary = data
+        self._indices = None
+        self._triangles = None
+        self.count = len(data) // self.width
+
+    def _ensure_loaded(self):
+        if self._binary is None:
+            if not self._loader:
+                raise Exception('Index buffer data has not been loaded')
+            self._loader(self)
+
+    @property
+    def loaded_size(self) -> int:
+        ''' Gets the approximate number of bytes of index data currently held in memory '''
+        if self._binary is None:
+            return 0
+        # each list entry is at least a pointer
+        return len(self._binary) + (0 if self._indices is None else len(self._indices) * 8)
+
+    def release(self):
+        ''' Drops the index data so it will be read again on next access. Buffers without a loader are left unchanged '''
+        if self._loader:
+            self._binary = None
+            self._indices = None
+            self._triangles = None
+
+    def has_triangles(self, offset: int, count: int) -> bool:
+        ''' Determines if triangles have been provided for a range of source indices using `set_triangles()` '''
+        return bool(self._triangles) and (offset, count) in self._triangles
+
+    def set_triangles(self, offset: int, count: int, triangles: Optional['numpy.ndarray']):
+        '''
+        Provides the triangles for a range of source indices as an array with a row per triangle, as returned by `get_triangle_array()`.
+        They will be used by `get_triangles()` for the same range. Pass `None` to discard them.
+        '''
+        if self._triangles is None:
+            self._triangles = dict()
+        if triangles is None:
+            self._triangles.pop((offset, count), None)
+        else:
+            self._triangles[(offset, count)] = triangles
+
+    def get_triangle_array(self, offset: int = 0, count: int = -1) -> 'numpy.ndarray':
+        '''
+        Unpacks the triangles for a given range of source indices into a uint32 array with a row per triangle. Requires numpy.
+        If triangles have been provided for the range using `set_triangles()` they are returned instead.
+        '''
+
+        if self.has_triangles(offset, count):
+            return self._triangles[(offset, count)]
+
+        if numpy is None:
+            raise Exception('numpy is not available')
+
+        end = self.count if count < 0 else offset + count
+        indices = numpy.frombuffer(self.data, _array_formats[self.width], end - offset, offset * self.width).astype(numpy.uint32)
+
+        if self.index_layout == IndexLayout.TRIANGLE_LIST:
+            return indices[:len(indices) // 3 * 3].reshape(-1, 3)
+        elif self.index_layout == IndexLayout.TRIANGLE_STRIP:
+            # same as _unpack_triangle_list: every odd triangle has its winding reversed and degenerate triangles are skipped
+            i0, i1, i2 = indices[:-2], indices[1:-1], indices[2:]
+            odd = (numpy.arange(len(i0)) % 2) == 1
+            triangles = numpy.stack((i0, numpy.where(odd, i2, i1), numpy.where(odd, i1, i2)), axis=1)
+            return triangles[(i0 != i1) & (i0 != i2) & (i1 != i2)]
+        else:
+            raise Exception('Unsupported index layout')
 
     @overload
     def count_triangles(self, offset: int = 0, count: int = -1) -> int:
@@ -78,6 +177,12 @@ class IndexBuffer:
             return from_mesh(arg1)
         return from_range(arg1, arg2)
 
+    def estimate_triangles(self, mesh: Mesh) -> int:
+        ''' Gets the number of triangles across every `MeshSegment` of a `Mesh` without unpacking triangle strips (degenerate triangles are included) '''
+        if self.index_layout == IndexLayout.TRIANGLE_STRIP:
+            return sum(max(0, s.index_length - 2) for s in mesh.segments)
+        return sum(s.index_length // 3 for s in mesh.segments)
+
     @overload
     def get_triangles(self, offset: int = 0, count: int = -1) -> Iterator[Triangle]:
         ''' Iterates the triangles for a given range of source indices '''
@@ -95,7 +200,7 @@ class IndexBuffer:
 
     def get_triangles(self, arg1, arg2 = None) -> Iterator[Triangle]:
         def get_indices(offset: int, count: int) -> Iterator[int]:
-            end = self.indices.count if count < 0 else offset + count
+            end = self.count if count < 0 else offset + count
             subset = (self.indices[i] for i in range(offset, end))
             if self.index_layout == IndexLayout.TRIANGLE_LIST:
                 return subset
@@ -105,6 +210,8 @@ class IndexBuffer:
                 raise Exception('Unsupported index layout')
 
         def from_range(offset: int, count: int) -> Iterator[Triangle]:
+            if self.has_triangles(offset, count):
+                return map(tuple, self._triangles[(offset, count)].tolist())
             indices = get_indices(offset, count)
             return iter(lambda: tuple(itertools.islice(indices, 3)), ())
         
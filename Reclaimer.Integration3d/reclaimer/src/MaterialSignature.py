@@ -0,0 +1,29 @@
+from typing import Tuple, Hashable, Callable, Optional
+
+from .Material import *
+
+__all__ = [
+    'material_signature'
+]
+
+
+def material_signature(material: Material, texture_key: Optional[Callable[[int], Hashable]] = None) -> Tuple:
+    '''
+    Gets a canonical description of everything that affects how a material is built, ignoring its name.
+    Textures are identified by their index in the texture pool unless `texture_key` is given, which allows materials from different scenes to be compared.
+    '''
+
+    if texture_key is None:
+        texture_key = lambda i: i
+
+    mappings = tuple(
+        (m.texture_usage, int(m.blend_channel), texture_key(m.texture_index), int(m.channel_mask), tuple(m.tiling) if m.tiling else None)
+        for m in material.texture_mappings
+    )
+
+    tints = tuple(
+        (t.tint_usage, int(t.blend_channel), tuple(t.tint_color) if t.tint_color else None)
+        for t in material.tints
+    )
+
+    return (material.alpha_mode, mappings, tints)
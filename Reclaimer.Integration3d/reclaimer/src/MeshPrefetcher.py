@@ -0,0 +1,157 @@
+import threading
+from queue import Queue
+from time import perf_counter
+from typing import List, Dict, Set, Tuple, Iterable
+
+from .ImportLog import logger
+from .Scene import Scene
+from .Model import Mesh
+from .IndexBuffer import IndexLayout, numpy
+from .ViewportInterface import MeshKey
+
+__all__ = [
+    'MeshPrefetcher'
+]
+
+_STOPPED = object() # queued by the prefetch thread when it finishes early
+
+
+class MeshPrefetcher:
+    '''
+    Decodes vertex channels and unpacks triangles for upcoming meshes on a background thread, in the order they will be built.
+    The bulk numpy operations release the GIL, so this runs alongside the main thread rather than competing with it.
+    The thread stays at most `depth` meshes ahead, and once every planned mesh that uses a buffer has been built, the decoded
+    arrays for that buffer are discarded so memory use stays bounded. Requires numpy.
+    '''
+
+    depth: int
+    producer_stall: float = 0.0 # time the prefetch thread spent waiting for the main thread
+    consumer_stall: float = 0.0 # time the main thread spent waiting for the prefetch thread
+
+    _scene: Scene
+    _plan: List[Tuple[MeshKey, Mesh]]
+    _pending: Set[MeshKey] # planned meshes that have not been waited for yet
+    _building: Set[MeshKey] # meshes that have been waited for but not finished
+    _vertex_users: Dict[int, int] # remaining planned meshes for each vertex buffer
+    _index_users: Dict[int, int]
+    _index_ranges: Dict[int, Set[Tuple[int, int]]] # the ranges that will be unpacked for each index buffer
+    _queue: Queue
+    _slots: threading.Semaphore # released as the main thread takes each mesh, so the thread stays at most `depth` meshes ahead
+    _thread: threading.Thread
+    _stop_requested: bool = False
+
+    def __init__(self, scene: Scene, meshes: Iterable[Tuple[MeshKey, Mesh]], depth: int):
+        if numpy is None:
+            raise Exception('numpy is not available')
+
+        self.depth = depth
+        self._scene = scene
+        self._plan = []
+        self._pending = set()
+        self._building = set()
+        self._vertex_users = dict()
+        self._index_users = dict()
+        self._index_ranges = dict()
+
+        # meshes with the same key are only built once, the rest are instances
+        for mesh_key, mesh in meshes:
+            if mesh_key in self._pending:
+                continue
+            self._plan.append((mesh_key, mesh))
+            self._pending.add(mesh_key)
+            self._vertex_users[mesh.vertex_buffer_index] = self._vertex_users.get(mesh.vertex_buffer_index, 0) + 1
+            self._index_users[mesh.index_buffer_index] = self._index_users.get(mesh.index_buffer_index, 0) + 1
+            self._index_ranges.setdefault(mesh.index_buffer_index, set()).update((s.index_start, s.index_length) for s in mesh.segments)
+
+        self._queue = Queue()
+        self._slots = threading.Semaphore(max(1, depth))
+        self._thread = threading.Thread(target=self._run, name='rmf prefetch', daemon=True)
+
+    def start(self):
+        logger.info('prefetching %d meshes', len(self._plan))
+        self._thread.start()
+
+    def wait(self, mesh_key: MeshKey):
+        ''' Blocks until the data for a mesh has been prepared. Meshes that were not planned, or were already prepared, return immediately '''
+
+        if mesh_key not in self._pending:
+            return
+
+        start = perf_counter()
+        while self._pending:
+            key = self._queue.get()
+            if key is _STOPPED:
+                # anything that was not prepared will be decoded on access instead
+                self._pending.clear()
+                break
+            self._slots.release()
+            self._pending.discard(key)
+            self._building.add(key)
+            if key == mesh_key:
+                break
+
+        self.consumer_stall += perf_counter() - start
+
+    def done(self, mesh_key: MeshKey, mesh: Mesh):
+        ''' Signals that a mesh has been built, so the prepared data for its buffers can be discarded if no later mesh needs it '''
+
+        if mesh_key not in self._building:
+            return
+
+        self._building.discard(mesh_key)
+
+        vb_index, ib_index = mesh.vertex_buffer_index, mesh.index_buffer_index
+        self._vertex_users[vb_index] -= 1
+        self._index_users[ib_index] -= 1
+
+        if self._vertex_users[vb_index] == 0:
+            for channel in self._scene.vertex_buffer_pool[vb_index].loaded_channels():
+                channel.set_array(None)
+
+        if self._index_users[ib_index] == 0:
+            index_buffer = self._scene.index_buffer_pool[ib_index]
+            for offset, count in self._index_ranges[ib_index]:
+                index_buffer.set_triangles(offset, count, None)
+
+    def stop(self):
+        ''' Stops the prefetch thread and reports the time each side spent waiting for the other '''
+
+        self._stop_requested = True
+        if self._thread.is_alive():
+            # unblock the thread if it is waiting for the main thread to catch up
+            self._slots.release()
+            self._thread.join()
+
+        logger.info('prefetch stalls: main thread %.3fs, prefetch thread %.3fs', self.consumer_stall, self.producer_stall)
+
+    def _run(self):
+        try:
+            for mesh_key, mesh in self._plan:
+                start = perf_counter()
+                self._slots.acquire()
+                self.producer_stall += perf_counter() - start
+
+                if self._stop_requested:
+                    return
+
+                self._prepare(mesh)
+                self._queue.put(mesh_key)
+        except Exception:
+            logger.warning('mesh prefetch failed', exc_info=True)
+            self._queue.put(_STOPPED)
+
+    def _prepare(self, mesh: Mesh):
+        scene = self._scene
+
+        # buffers are read up front, so anything that is not loaded is not needed
+        vertex_buffer = scene.vertex_buffer_pool[mesh.vertex_buffer_index]
+        for channel in vertex_buffer.loaded_channels():
+            channel.to_array()
+
+        index_buffer = scene.index_buffer_pool[mesh.index_buffer_index]
+        if not index_buffer.loaded or index_buffer.index_layout not in (IndexLayout.TRIANGLE_LIST, IndexLayout.TRIANGLE_STRIP):
+            return
+
+        for s in mesh.segments:
+            if not index_buffer.has_triangles(s.index_start, s.index_length):
+                index_buffer.set_triangles(s.index_start, s.index_length, index_buffer.get_triangle_array(s.index_start, s.index_length))
@@ -16,10 +16,12 @@ __all__ = [
 
 
 class Model(SceneObject):
+    index: int = -1 # position in Scene.model_pool
     regions: List['ModelRegion']
     markers: List['Marker']
     bones: List['Bone']
     meshes: List['Mesh']
+    bone_children: List[List[int]] = None # child bone indices for each bone
 
     def get_bone_lineage(self, bone: 'Bone') -> List['Bone']:
         lineage = [bone]
@@ -30,15 +32,26 @@ class Model(SceneObject):
         return lineage
     
     def get_bone_children(self, bone: 'Bone') -> List['Bone']:
-        index = self.bones.index(bone)
-        return [b for b in self.bones if b.parent_index == index]
+        if self.bone_children is None:
+            self.index_bones()
+        return [self.bones[i] for i in self.bone_children[bone.index]]
+
+    def index_bones(self):
+        ''' Assigns bone indices and builds the bone_children adjacency list '''
+        self.bone_children = [[] for _ in self.bones]
+        for i, b in enumerate(self.bones):
+            b.index = i
+            if 0 <= b.parent_index < len(self.bones):
+                self.bone_children[b.parent_index].append(i)
 
 
 class ModelRegion(INamed):
+    index: int = -1 # position in Model.regions
     permutations: List['ModelPermutation']
 
 
 class ModelPermutation(INamed):
+    index: int = -1 # position in ModelRegion.permutations
     instanced: bool
     mesh_index: int
     mesh_count: int
@@ -64,6 +77,7 @@ class MarkerInstance:
 
 
 class Bone(INamed):
+    index: int = -1 # position in Model.bones
     parent_index: int
     transform: Matrix4x4
 
@@ -0,0 +1,137 @@
+import json
+from time import perf_counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Iterator, Optional
+
+__all__ = [
+    'PhaseRecord',
+    'ImportProfiler',
+    'profiler'
+]
+
+RecordKey = Tuple[str, Optional[str], Optional[tuple]] # phase, model name, mesh key
+
+
+@dataclass
+class PhaseRecord:
+    phase: str = None
+    model: str = None
+    mesh_key: tuple = None
+    elapsed: float = 0.0
+    count: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'phase': self.phase,
+            'model': self.model,
+            'mesh_key': list(self.mesh_key) if self.mesh_key is not None else None,
+            'elapsed': round(self.elapsed, 6),
+            'count': self.count
+        }
+
+
+class ImportProfiler:
+    ''' Accumulates elapsed time and call counts for each import phase, tagged by model and mesh key '''
+
+    _records: Dict[RecordKey, PhaseRecord]
+
+    def __init__(self):
+        self._records = dict()
+
+    def reset(self):
+        self._records.clear()
+
+    def add(self, phase: str, elapsed: float, model: Optional[str] = None, mesh_key: Optional[tuple] = None, count: int = 1):
+        key = (phase, model, mesh_key)
+        record = self._records.get(key)
+        if not record:
+            record = self._records[key] = PhaseRecord(phase, model, mesh_key)
+        record.elapsed += elapsed
+        record.count += count
+
+    @contextmanager
+    def measure(self, phase: str, model: Optional[str] = None, mesh_key: Optional[tuple] = None) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, perf_counter() - start, model, mesh_key)
+
+    @contextmanager
+    def capture(self) -> Iterator[List[PhaseRecord]]:
+        ''' Collects the time added to each record while the context is active, without resetting the existing timings '''
+
+        before = { key: (r.elapsed, r.count) for key, r in self._records.items() }
+        captured: List[PhaseRecord] = []
+        try:
+            yield captured
+        finally:
+            for key, r in self._records.items():
+                elapsed, count = before.get(key, (0.0, 0))
+                if r.count > count:
+                    captured.append(PhaseRecord(r.phase, r.model, r.mesh_key, r.elapsed - elapsed, r.count - count))
+
+    def records(self) -> List[PhaseRecord]:
+        return list(self._records.values())
+
+    def phase_totals(self) -> List[PhaseRecord]:
+        ''' Gets the combined time and count of each phase across all models and meshes, in order of first use '''
+
+        totals: Dict[str, PhaseRecord] = dict()
+        for r in self._records.values():
+            total = totals.get(r.phase)
+            if not total:
+                total = totals[r.phase] = PhaseRecord(r.phase)
+            total.elapsed += r.elapsed
+            total.count += r.count
+        return list(totals.values())
+
+    def mesh_totals(self) -> List[Tuple[PhaseRecord, List[PhaseRecord]]]:
+        ''' Gets tuples of (total, phases) for each mesh key, sorted by total time with the slowest first '''
+
+        meshes: Dict[Tuple[str, tuple], Tuple[PhaseRecord, List[PhaseRecord]]] = dict()
+        for r in self._records.values():
+            if r.mesh_key is None:
+                continue
+            entry = meshes.get((r.model, r.mesh_key))
+            if not entry:
+                entry = meshes[(r.model, r.mesh_key)] = (PhaseRecord('mesh', r.model, r.mesh_key), [])
+            entry[0].elapsed += r.elapsed
+            entry[0].count = max(entry[0].count, r.count)
+            entry[1].append(r)
+        return sorted(meshes.values(), key=lambda e: e[0].elapsed, reverse=True)
+
+    def to_dict(self, top_n: int = 10) -> dict:
+        return {
+            'phases': [r.to_dict() for r in self.phase_totals()],
+            'slowest_meshes': [
+                dict(total.to_dict(), phases={p.phase: round(p.elapsed, 6) for p in phases})
+                for total, phases in self.mesh_totals()[:top_n]
+            ],
+            'records': [r.to_dict() for r in self._records.values()]
+        }
+
+    def to_json(self, top_n: int = 10, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(top_n), indent=indent)
+
+    def format_table(self, top_n: int = 10) -> str:
+        lines = ['phase timings:']
+        lines.append(f'  {"phase":<24} {"calls":>8} {"total ms":>12} {"avg ms":>10}')
+        for r in self.phase_totals():
+            lines.append(f'  {r.phase:<24} {r.count:>8} {r.elapsed * 1000:>12.1f} {r.elapsed * 1000 / max(r.count, 1):>10.2f}')
+
+        meshes = self.mesh_totals()[:top_n]
+        if meshes:
+            lines.append(f'slowest {len(meshes)} meshes:')
+            lines.append(f'  {"total ms":>10}  {"slowest phase":<24} {"mesh key":<16} model')
+            for total, phases in meshes:
+                slowest = max(phases, key=lambda p: p.elapsed)
+                key = '/'.join(str(k) for k in total.mesh_key)
+                lines.append(f'  {total.elapsed * 1000:>10.1f}  {slowest.phase:<24} {key:<16} {total.model}')
+
+        return '\n'.join(lines)
+
+
+# shared instance so the reader, builder and viewport interfaces all report into the same timings
+profiler = ImportProfiler()
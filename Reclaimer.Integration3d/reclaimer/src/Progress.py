@@ -1,3 +1,5 @@
+from time import perf_counter
+
 from ..src.SceneFilter import SceneFilter
 from ..src.ImportOptions import ImportOptions
 
@@ -5,13 +7,23 @@ from ..src.ImportOptions import ImportOptions
 class ProgressCallback:
     cancel_requested: bool = False
 
+    # increments are coalesced so _refresh is called at most this often
+    refresh_interval: float = 1 / 30
+
     material_count: int = 0
     mesh_count: int = 0
     object_count: int = 0
+    vertex_count: int = 0
+    triangle_count: int = 0
 
     material_progress: int = 0
     mesh_progress: int = 0
     object_progress: int = 0
+    vertex_progress: int = 0
+    triangle_progress: int = 0
+
+    _last_refresh: float = float('-inf')
+    _refresh_pending: bool = False
 
     @property
     def material_percent(self) -> float:
@@ -25,27 +37,52 @@ class ProgressCallback:
     def object_percent(self) -> float:
         return 0 if self.object_count == 0 else int(self.object_progress / self.object_count * 100) / 100
 
+    @property
+    def work_percent(self) -> float:
+        ''' Mesh progress weighted by vertex and triangle count rather than number of meshes '''
+        total = self.vertex_count + self.triangle_count
+        if total == 0:
+            return self.mesh_percent
+        return int((self.vertex_progress + self.triangle_progress) / total * 100) / 100
+
     def __init__(self, filter: SceneFilter, options: ImportOptions):
         self.object_count = filter.count_objects()
         if options.IMPORT_MATERIALS:
             self.material_count = filter.count_materials()
         if options.IMPORT_MESHES:
             self.mesh_count = filter.count_meshes()
+            self.vertex_count = filter.count_vertices()
+            self.triangle_count = filter.count_triangles()
 
     def increment_materials(self):
         self.material_progress = self.material_progress + 1
-        self._refresh()
+        self._request_refresh()
 
-    def increment_meshes(self):
+    def increment_meshes(self, vertices: int = 0, triangles: int = 0):
         self.mesh_progress = self.mesh_progress + 1
-        self._refresh()
+        self.vertex_progress = self.vertex_progress + vertices
+        self.triangle_progress = self.triangle_progress + triangles
+        self._request_refresh()
 
     def increment_objects(self):
         self.object_progress = self.object_progress + 1
-        self._refresh()
+        self._request_refresh()
+
+    def flush(self):
+        ''' Delivers any progress that is still being held back by the rate limit '''
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self._last_refresh = perf_counter()
+            self._refresh()
 
     def complete(self):
-        ''' Override in derived class '''
+        ''' Override in derived class. Overrides must call the base method so the final progress is delivered '''
+        self.flush()
+
+    def _request_refresh(self):
+        self._refresh_pending = True
+        if perf_counter() - self._last_refresh >= self.refresh_interval:
+            self.flush()
 
     def _refresh(self):
-        ''' Override in derived class '''
\ No newline at end of file
+        ''' Override in derived class '''
@@ -2,20 +2,25 @@ from dataclasses import dataclass
 from typing import List, Union, Dict, Tuple
 
 from .Types import *
+from .DataBlock import DataBlock
 from .Model import *
 from .Material import *
 from .Vectors import VectorDescriptor
 from .VertexBuffer import *
 from .IndexBuffer import *
+from .Profiler import PhaseRecord
 
 __all__ = [
     'Version',
+    'TextureLookup',
     'Scene',
     'SceneGroup',
     'Placement',
     'ModelRef'
 ]
 
+TextureLookup = Dict[int, Tuple[Texture, Dict[str, TextureMapping]]] # texture index -> (texture, usage -> mapping)
+
 
 @dataclass
 class Version:
@@ -30,6 +35,10 @@ class Version:
 
 class Scene(INamed):
     _source_file: str
+    _vertex_buffer_blocks: List[DataBlock] # source location of each vertex buffer, used to read its data on demand
+    _index_buffer_blocks: List[DataBlock]
+    _read_timings: List[PhaseRecord] = None # profiler records from reading the file, added to the timings of each import
+    _imported: bool = False
     version: Version
     unit_scale: float
     world_matrix: Matrix4x4
@@ -41,21 +50,54 @@ class Scene(INamed):
     index_buffer_pool: List[IndexBuffer]
     material_pool: List[Material]
     texture_pool: List[Texture]
+    _texture_lookups: Dict[int, Tuple[Material, Dict[ChannelFlags, 'TextureLookup']]] = None # id(material) -> (material, lookups)
+
+    def count_vertices(self, mesh: Mesh) -> int:
+        return self.vertex_buffer_pool[mesh.vertex_buffer_index].count
+
+    def estimate_triangles(self, mesh: Mesh) -> int:
+        return self.index_buffer_pool[mesh.index_buffer_index].estimate_triangles(mesh)
+
+    def get_texture_lookups(self, material: Material) -> Dict[ChannelFlags, TextureLookup]:
+        '''
+        Gets the textures used by a material grouped by blend channel, with the mappings for each texture keyed by usage.
+        The result is built the first time it is requested for each material and must not be modified.
+        '''
+
+        if self._texture_lookups is None:
+            self._texture_lookups = dict()
+
+        # the material is kept with its lookups so its id cannot be reused by another material
+        entry = self._texture_lookups.get(id(material))
+        if entry is None or entry[0] is not material:
+            entry = (material, self._build_texture_lookups(material))
+            self._texture_lookups[id(material)] = entry
+
+        return entry[1]
+
+    def create_texture_lookup(self, material: Material, blend_channel: ChannelFlags) -> TextureLookup:
+        return dict(self.get_texture_lookups(material).get(blend_channel, dict()))
+
+    def _build_texture_lookups(self, material: Material) -> Dict[ChannelFlags, TextureLookup]:
+        channel_inputs: Dict[ChannelFlags, List[TextureMapping]] = dict()
+        for m in material.texture_mappings:
+            channel_inputs.setdefault(m.blend_channel, []).append(m)
 
-    def create_texture_lookup(self, material: Material, blend_channel: ChannelFlags) -> Dict[int, Tuple[Texture, Dict[str, TextureMapping]]]:
-        channel_inputs = [m for m in material.texture_mappings if m.blend_channel == blend_channel]
+        result = dict()
+        for channel, inputs in channel_inputs.items():
+            #only include textures that are actually in use
+            unique_indices = set(m.texture_index for m in inputs)
 
-        #only include textures that are actually in use
-        unique_indices = set(m.texture_index for m in channel_inputs)
+            lookup = dict()
+            for i in unique_indices:
+                lookup[i] = (self.texture_pool[i], dict())
 
-        lookup = dict()
-        for i in unique_indices:
-            lookup[i] = (self.texture_pool[i], dict())
+            for m in inputs:
+                lookup[m.texture_index][1][m.texture_usage] = m
 
-        for m in channel_inputs:
-            lookup[m.texture_index][1][m.texture_usage] = m
+            result[channel] = lookup
 
-        return lookup
+        return result
 
 
 class SceneGroup(INamed):
@@ -1,12 +1,23 @@
-from typing import Optional, Any, Union
+from typing import Optional, Any, Union, Iterator, Tuple, Dict, List
 from queue import Queue, LifoQueue as Stack
 from time import time
 from functools import partial
 
 from .ImportOptions import *
+from .ImportLog import logger, import_log
+from .Profiler import profiler
 from .Progress import *
 from .Scene import *
+from .Model import Mesh
+from .Material import Texture
 from .SceneFilter import *
+from .SceneReader import SceneReader
+from .SceneCache import scene_cache
+from .GeometryCache import GeometryCache
+from .DecodePool import DecodePool
+from .MaterialSignature import material_signature
+from .MeshPrefetcher import MeshPrefetcher
+from .TexturePrefetcher import TexturePrefetcher
 from .ViewportInterface import *
 
 __all__ = [
@@ -57,6 +68,10 @@ class SceneBuilder():
     _filter: SceneFilter
     _options: ImportOptions
     _progress: ProgressCallback
+    _decode_pool: Optional[DecodePool] = None
+    _prefetcher: Optional[MeshPrefetcher] = None
+    _textures: TexturePrefetcher
+    _model_prototypes: Dict[Tuple, ModelState] # (model index, selected permutations) -> the model state the prototype was built with
     _start_time: float
 
     def __init__(self, interface: ViewportInterface, scene: Scene, filter: Optional[SceneFilter] = None, options: Optional[ImportOptions] = None, callback: Optional[ProgressCallback] = None):
@@ -72,14 +87,28 @@ class SceneBuilder():
         self._filter = filter
         self._options = options
         self._progress = callback
+        self._textures = TexturePrefetcher(scene, options)
+        self._model_prototypes = dict()
 
     def begin_create_scene(self) -> TaskQueue:
         interface, scene, filter, options, progress = self._interface, self._scene, self._filter, self._options, self._progress
 
         self._start_time = time()
 
-        print(f'scene name: {scene.name}')
-        print(f'scene scale: {scene.unit_scale}')
+        # each import starts a new set of timings, including imports of a scene that was already open or came from the scene cache
+        profiler.reset()
+
+        # the read timings carry over from when the scene was opened, and are marked as cached if the scene was imported before
+        for r in scene._read_timings or []:
+            phase = f'{r.phase} (cached)' if scene._imported else r.phase
+            profiler.add(phase, r.elapsed, r.model, r.mesh_key, r.count)
+        scene._imported = True
+
+        import_log.configure(options.LOG_LEVEL, options.LOG_RATE_LIMIT)
+        import_log.reset()
+
+        logger.info('scene name: %s', scene.name)
+        logger.info('scene scale: %s', scene.unit_scale)
 
         interface.init_scene(scene, options)
 
@@ -87,7 +116,13 @@ class SceneBuilder():
         root_collection = interface.create_collection(scene.name, None)
         interface.pre_import(root_collection)
 
+        # start reading textures straight away so the reads overlap with reading the mesh data
+        if options.IMPORT_MATERIALS:
+            self._textures.start(self._iterate_textures(), options.TEXTURE_THREADS)
+
         q = Queue()
+        q.put(partial(self._load_buffers))
+        q.put(partial(self._start_prefetch))
         q.put(partial(self._create_materials))
 
         for group in filter.selected_groups():
@@ -102,9 +137,145 @@ class SceneBuilder():
 
     def end_create_scene(self):
         self._interface.post_import()
+        self._textures.stop()
+
+        if self._prefetcher:
+            self._prefetcher.stop()
+            profiler.add('prefetch wait', self._prefetcher.consumer_stall)
+            self._prefetcher = None
+
+        if self._decode_pool:
+            self._decode_pool.close()
+            self._decode_pool = None
         end_time = time()
         seconds = round(end_time - self._start_time, 3)
-        print(f'finished in {seconds} seconds')
+        logger.info('finished in %s seconds', seconds)
+
+        if self._options.LOG_SUMMARY:
+            import_log.summary()
+
+        self._write_timings()
+
+        # buffers read during the import count towards the cache budget
+        scene_cache.trim()
+
+    def _write_timings(self):
+        options = self._options
+
+        if options.TIMING_REPORT:
+            logger.info('%s', profiler.format_table(options.TIMING_TOP_N))
+
+        if options.TIMING_JSON_PATH:
+            with open(options.TIMING_JSON_PATH, 'w') as f:
+                f.write(profiler.to_json(options.TIMING_TOP_N))
+            logger.info('timings written to %s', options.TIMING_JSON_PATH)
+
+    def _load_buffers(self) -> Union[None, Queue]:
+        scene, filter, options = self._scene, self._filter, self._options
+
+        if not options.IMPORT_MESHES:
+            return
+
+        # only read the buffers that the selection actually uses, in batches so the host stays responsive
+        vertex_buffers, index_buffers = (sorted(s) for s in filter.selected_buffers())
+        channels = options.vertex_channels()
+        geometry_cache = GeometryCache.for_options(options)
+        decode_pool = self._decode_pool = DecodePool.for_options(options)
+        logger.info('loading %d vertex buffers and %d index buffers', len(vertex_buffers), len(index_buffers))
+
+        # the index ranges that will be triangulated, so the workers can unpack them ahead of time or they can be read from the cache
+        index_ranges = dict()
+        if decode_pool or geometry_cache:
+            selected = set(index_buffers)
+            for model in scene.model_pool:
+                for mesh in model.meshes:
+                    if mesh.index_buffer_index in selected:
+                        index_ranges.setdefault(mesh.index_buffer_index, set()).update((s.index_start, s.index_length) for s in mesh.segments)
+
+        batches = []
+
+        def load_func(vertex_buffers, index_buffers):
+            with profiler.measure('buffer loading'):
+                SceneReader.load_buffers(scene, vertex_buffers, index_buffers, channels)
+            if geometry_cache:
+                # when there is a decode pool, channels that are not in the cache are left for the workers
+                with profiler.measure('geometry cache'):
+                    geometry_cache.decode_buffers(scene, vertex_buffers, { i: index_ranges.get(i, ()) for i in index_buffers }, load_only=decode_pool is not None)
+            if decode_pool:
+                batches.append(decode_pool.submit(scene, vertex_buffers, { i: index_ranges.get(i, ()) for i in index_buffers }))
+
+        def collect_func(index):
+            batch = batches[index] if index < len(batches) else None
+            if not batch:
+                return
+
+            # the workers decode the later batches while earlier ones are being collected
+            with profiler.measure('decode wait'):
+                decoded = batch.collect()
+            if geometry_cache:
+                with profiler.measure('geometry cache'):
+                    for channel in decoded:
+                        geometry_cache.store(channel)
+                    for buffer, offset, count in batch.triangle_ranges:
+                        geometry_cache.store_triangles(buffer, offset, count)
+
+        BATCH_SIZE = 64
+        q = Queue()
+        batch_count = 0
+        for i in range(0, max(len(vertex_buffers), len(index_buffers)), BATCH_SIZE):
+            q.put(partial(load_func, vertex_buffers[i:i + BATCH_SIZE], index_buffers[i:i + BATCH_SIZE]))
+            batch_count += 1
+        if decode_pool:
+            for i in range(batch_count):
+                q.put(partial(collect_func, i))
+        return q
+
+    def _start_prefetch(self):
+        options = self._options
+
+        if not (options.IMPORT_MESHES and options.PREFETCH_MESHES > 0):
+            return
+
+        # buffers have been read by this point, so the thread only needs to decode them
+        try:
+            self._prefetcher = MeshPrefetcher(self._scene, self._iterate_meshes(), options.PREFETCH_MESHES)
+        except Exception:
+            logger.warning('mesh prefetch is unavailable', exc_info=True)
+            return
+
+        self._prefetcher.start()
+
+    def _iterate_meshes(self) -> Iterator[Tuple[MeshKey, Mesh]]:
+        ''' Iterates the meshes that will be built, in the same order that the queued tasks will build them '''
+
+        def from_models(models: Iterator[ModelFilter]):
+            for filter_item in models:
+                model = filter_item._model
+                if not model.meshes:
+                    continue
+                for rf in filter_item.selected_regions():
+                    for pf in rf.selected_permutations():
+                        p = pf._permutation
+                        for mesh_index in range(p.mesh_index, p.mesh_index + p.mesh_count):
+                            yield (model.index, mesh_index, -1), model.meshes[mesh_index]
+
+        def from_group(group: FilterGroup):
+            for child in group.selected_groups():
+                yield from from_group(child)
+            yield from from_models(group.selected_models())
+
+        for group in self._filter.selected_groups():
+            yield from from_group(group)
+        yield from from_models(self._filter.selected_models())
+
+    def _iterate_textures(self) -> List[Tuple[int, Texture]]:
+        ''' Gets the selected textures in the order the materials will request them '''
+
+        order = dict()
+        for _, m in self._filter.selected_materials():
+            for mapping in m.texture_mappings:
+                order.setdefault(mapping.texture_index, len(order))
+        return sorted(self._filter.selected_textures(), key=lambda t: order.get(t[0], len(order)))
 
     def _create_materials(self) -> Union[None, Queue]:
         interface, scene, filter, options, progress = self._interface, self._scene, self._filter, self._options, self._progress
@@ -116,18 +287,38 @@ class SceneBuilder():
             interface.set_materials(result)
             return
 
-        print(f'creating {scene.name}/materials')
+        logger.info('creating %s/materials', scene.name)
+
+        selected = list(filter.selected_materials())
+
+        # materials that only differ by name are created once and shared
+        duplicates: Dict[int, int] = dict()
+        if options.MERGE_MATERIALS:
+            first_lookup = dict()
+            for i, m in selected:
+                first = first_lookup.setdefault(material_signature(m), i)
+                if first != i:
+                    duplicates[i] = first
+            logger.info('merging %d duplicate materials', len(duplicates))
 
         q = Queue()
-        q.put(partial(interface.init_materials))
+        q.put(partial(interface.init_materials, self._textures))
 
-        for i, m in filter.selected_materials():
+        for i, m in selected:
             def create_material(mat, idx):
-                print(f'creating material: {mat.name}')
-                material = interface.create_material(mat)
+                import_log.object('materials', 'creating material: %s', mat.name)
+                with profiler.measure('material creation'):
+                    material = interface.create_material(mat)
                 result[idx] = material
                 progress.increment_materials()
-            q.put(partial(create_material, m, i))
+
+            def share_material(mat, idx):
+                import_log.object('merged materials', 'merging material: %s', mat.name)
+                result[idx] = result[duplicates[idx]]
+                progress.increment_materials()
+
+            # duplicates always come after the material they share, so it will already have been created
+            q.put(partial(share_material if i in duplicates else create_material, m, i))
 
         q.put(partial(interface.set_materials, result))
         return q
@@ -135,7 +326,7 @@ class SceneBuilder():
     def _create_scene_group(self, filter_item: FilterGroup, parent: Any) -> Queue:
         interface, scene, filter, options, progress = self._interface, self._scene, self._filter, self._options, self._progress
 
-        print(f'creating scene group: {filter_item.path}')
+        import_log.object('scene groups', 'creating scene group: %s', filter_item.path)
 
         # TODO: enforce unique collection names
         collection = interface.create_collection(filter_item.label, parent)
@@ -154,10 +345,64 @@ class SceneBuilder():
         interface, scene, filter, options, progress = self._interface, self._scene, self._filter, self._options, self._progress
         model = filter_item._model
 
+        if options.INSTANCE_MODELS and filter_item._placement:
+            return self._create_model_instance(filter_item, collection)
+
         model_state = interface.init_model(model, filter_item, collection, options.model_name(model))
 
         q = Queue()
 
+        self._queue_model_contents(q, model_state)
+
+        def transform_func():
+            with profiler.measure('transforms', model.name):
+                interface.apply_transform(model_state, self._get_model_transform(filter_item))
+
+        q.put(partial(transform_func))
+        q.put(partial(progress.increment_objects))
+
+        return q
+
+    def _create_model_instance(self, filter_item: ModelFilter, collection: Any) -> Queue:
+        interface, scene, options, progress = self._interface, self._scene, self._options, self._progress
+        model = filter_item._model
+
+        q = Queue()
+
+        # placements of the same model with the same permutations selected share a single prototype
+        selection = tuple((rf._region.index, tuple(pf._permutation.index for pf in rf.selected_permutations())) for rf in filter_item.selected_regions())
+        prototype_key = (model.index, selection)
+
+        # the prototype meshes are only built for the first placement, but are counted for every placement so progress still reaches the total
+        count_meshes = prototype_key in self._model_prototypes and options.IMPORT_MESHES
+
+        if prototype_key not in self._model_prototypes:
+            import_log.object('model prototypes', 'creating prototype: %s', model.name)
+            prototype_collection = interface.create_prototype_collection(options.model_name(model))
+            prototype_state = interface.init_model(model, filter_item, prototype_collection, options.model_name(model))
+            self._model_prototypes[prototype_key] = prototype_state
+            self._queue_model_contents(q, prototype_state)
+
+        def instance_func():
+            import_log.object('model instances', 'creating instance: %s', filter_item.label)
+            with profiler.measure('model instances', model.name):
+                interface.create_model_instance(self._model_prototypes[prototype_key], collection, filter_item.label, self._get_model_transform(filter_item))
+
+            if count_meshes:
+                for rf in filter_item.selected_regions():
+                    for pf in rf.selected_permutations():
+                        p = pf._permutation
+                        for mesh in model.meshes[p.mesh_index:p.mesh_index + p.mesh_count]:
+                            progress.increment_meshes(scene.count_vertices(mesh), scene.estimate_triangles(mesh))
+
+        q.put(partial(instance_func))
+        q.put(partial(progress.increment_objects))
+
+        return q
+
+    def _queue_model_contents(self, q: Queue, model_state: ModelState):
+        options, model = self._options, model_state.model
+
         if options.IMPORT_BONES and model.bones:
             q.put(partial(self._create_bones, model_state))
         if options.IMPORT_MESHES and model.meshes:
@@ -165,34 +410,31 @@ class SceneBuilder():
         if options.IMPORT_MARKERS and model.markers:
             q.put(partial(self._create_markers, model_state))
 
-        def transform_func():
-            target_sys = interface.identity_transform()
-            source_sys = interface.create_transform(self._scene.world_matrix, True)
-            world_transform = interface.create_transform(filter_item.transform, True)
-
-            conversion = interface.multiply_transform(interface.invert_transform(source_sys), target_sys)
-            final_transform = interface.multiply_transform(conversion, world_transform)
+    def _get_model_transform(self, filter_item: ModelFilter) -> Any:
+        interface = self._interface
 
-            interface.apply_transform(model_state, final_transform)
+        target_sys = interface.identity_transform()
+        source_sys = interface.create_transform(self._scene.world_matrix, True)
+        world_transform = interface.create_transform(filter_item.transform, True)
 
-        q.put(partial(transform_func))
-        q.put(partial(progress.increment_objects))
-
-        return q
+        conversion = interface.multiply_transform(interface.invert_transform(source_sys), target_sys)
+        return interface.multiply_transform(conversion, world_transform)
 
     def _create_bones(self, model_state: ModelState):
-        print(f'creating {model_state.model.name}/bones')
-        self._interface.create_bones(model_state)
+        import_log.object('bone sets', 'creating %s/bones', model_state.model.name)
+        with profiler.measure('bones', model_state.model.name):
+            self._interface.create_bones(model_state)
 
     def _create_markers(self, model_state: ModelState):
-        print(f'creating {model_state.model.name}/markers')
-        self._interface.create_markers(model_state)
+        import_log.object('marker sets', 'creating %s/markers', model_state.model.name)
+        with profiler.measure('markers', model_state.model.name):
+            self._interface.create_markers(model_state)
 
     def _create_meshes(self, model_state: ModelState) -> Queue:
         interface, scene, options, progress = self._interface, self._scene, self._options, self._progress
         model, filter = model_state.model, model_state.filter
 
-        print(f'creating {model.name}/meshes')
+        import_log.object('mesh sets', 'creating %s/meshes', model.name)
 
         q = Queue()
 
@@ -201,22 +443,56 @@ class SceneBuilder():
             r = rf._region
             region_name = f'{model_state.display_name}::{options.region_name(r)}'
             region_group = interface.create_region(model_state, r, region_name)
+
+            # (mesh_index, mesh_count) -> (display_name, world_transform) of each repeat of an instanced permutation
+            instance_lookup: Dict[Tuple[int, int], List[Tuple[str, Any]]] = dict()
+
             for j, pf in enumerate(rf.selected_permutations()):
                 p = pf._permutation
 
                 world_transform = interface.create_transform(p.transform)
+
+                # the first instanced permutation for a set of meshes is built as normal, and the rest become instances of it
+                if options.INSTANCE_PERMUTATIONS and p.instanced:
+                    instances = instance_lookup.get((p.mesh_index, p.mesh_count))
+                    if instances is not None:
+                        instances.append((options.permutation_name(r, p, p.mesh_index), world_transform))
+                        continue
+                    instance_lookup[(p.mesh_index, p.mesh_count)] = []
+
                 for mesh_index in range(p.mesh_index, p.mesh_index + p.mesh_count):
                     mesh = model.meshes[mesh_index]
-                    mesh_key = (scene.model_pool.index(model), mesh_index, -1) # TODO: last element reserved for submesh index if mesh splitting enabled
-                    message = f'creating mesh {total_meshes:03d}: {model.name}/{r.name}/{p.name}/{mesh_index} [{i:02d}/{j:02d}/{mesh_index:02d}]'
+                    mesh_key = (model.index, mesh_index, -1) # TODO: last element reserved for submesh index if mesh splitting enabled
+                    message_args = (total_meshes, model.name, r.name, p.name, mesh_index, i, j, mesh_index)
                     mesh_name = options.permutation_name(r, p, mesh_index)
 
-                    def mesh_func(message, model_state, region_group, transform, mesh, mesh_key, mesh_name):
-                        print(message)
+                    def mesh_func(message_args, model_state, region_group, transform, mesh, mesh_key, mesh_name):
+                        import_log.object('meshes', 'creating mesh %03d: %s/%s/%s/%d [%02d/%02d/%02d]', *message_args)
+                        prefetcher = self._prefetcher
+                        if prefetcher:
+                            prefetcher.wait(mesh_key)
                         interface.build_mesh(model_state, region_group, transform, mesh, mesh_key, mesh_name)
-                        progress.increment_meshes()
+                        if prefetcher:
+                            prefetcher.done(mesh_key, mesh)
+                        progress.increment_meshes(scene.count_vertices(mesh), scene.estimate_triangles(mesh))
 
-                    q.put(partial(mesh_func, message, model_state, region_group, world_transform, mesh, mesh_key, mesh_name))
+                    q.put(partial(mesh_func, message_args, model_state, region_group, world_transform, mesh, mesh_key, mesh_name))
                     total_meshes += 1
 
+            for (mesh_index, mesh_count), instances in instance_lookup.items():
+                if not instances:
+                    continue
+
+                meshes = [(model.meshes[k], (model.index, k, -1)) for k in range(mesh_index, mesh_index + mesh_count)]
+
+                def instances_func(model_state, region_group, meshes, instances):
+                    import_log.object('instances', 'creating %d instances of %s', len(instances), instances[0][0])
+                    interface.create_instances(model_state, region_group, meshes, instances)
+                    for _ in instances:
+                        for mesh, _ in meshes:
+                            progress.increment_meshes(scene.count_vertices(mesh), scene.estimate_triangles(mesh))
+
+                q.put(partial(instances_func, model_state, region_group, meshes, instances))
+                total_meshes += len(meshes) * len(instances)
+
         return q
\ No newline at end of file
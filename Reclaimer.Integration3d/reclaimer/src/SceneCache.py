@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple, Optional
+
+from .ImportLog import logger
+from .Scene import Scene
+
+__all__ = [
+    'SceneCache',
+    'scene_cache'
+]
+
+CacheKey = Tuple[str, int, int] # normalised path, file size, modified time
+
+
+class SceneCache:
+    '''
+    Keeps recently opened scenes so importing the same file again does not need to read it.
+    Entries are only reused while the file size and modified time are unchanged.
+    When the buffer data held by the cached scenes exceeds `max_size` the least recently used scenes are removed and their buffers released.
+    '''
+
+    max_size: int # bytes
+    max_count: int
+
+    _entries: 'OrderedDict[CacheKey, Scene]'
+    _lock: threading.Lock
+
+    def __init__(self, max_size: int = 1024 * 1024 * 1024, max_count: int = 8):
+        self.max_size = max_size
+        self.max_count = max_count
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fileName: str) -> Optional[Scene]:
+        ''' Gets the cached scene for a file, or `None` if the file has not been cached or has changed since it was read '''
+
+        key = _get_key(fileName)
+        if key is None:
+            return None
+
+        with self._lock:
+            # remove any stale entries for the same file
+            for k in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._remove(k)
+
+            scene = self._entries.get(key)
+            if scene is not None:
+                self._entries.move_to_end(key)
+                logger.debug('scene cache hit: %s', fileName)
+            return scene
+
+    def add(self, fileName: str, scene: Scene):
+        key = _get_key(fileName)
+        if key is None:
+            return
+
+        with self._lock:
+            self._entries[key] = scene
+            self._entries.move_to_end(key)
+            self._trim()
+
+    def trim(self):
+        ''' Releases buffers until the cache is within its limits. Call this after reading buffers from a cached scene '''
+        with self._lock:
+            self._trim()
+
+    def clear(self):
+        with self._lock:
+            for k in list(self._entries):
+                self._remove(k)
+
+    def size(self) -> int:
+        ''' Gets the number of bytes of buffer data currently held by the cached scenes '''
+        with self._lock:
+            return sum(_get_size(s) for s in self._entries.values())
+
+    def _trim(self):
+        while len(self._entries) > self.max_count:
+            self._remove(next(iter(self._entries)))
+
+        # the most recent scene is never evicted, even if it is over the limit by itself
+        total = sum(_get_size(s) for s in self._entries.values())
+        while total > self.max_size and len(self._entries) > 1:
+            key, scene = next(iter(self._entries.items()))
+            total -= _get_size(scene)
+            self._remove(key)
+
+    def _remove(self, key: CacheKey):
+        scene = self._entries.pop(key)
+        logger.debug('scene cache evicted: %s', key[0])
+        _release_buffers(scene)
+
+
+def _get_key(fileName: str) -> Optional[CacheKey]:
+    try:
+        stat = os.stat(fileName)
+    except OSError:
+        return None
+    return (os.path.normcase(os.path.abspath(fileName)), stat.st_size, stat.st_mtime_ns)
+
+def _get_size(scene: Scene) -> int:
+    return sum(b.loaded_size for b in scene.vertex_buffer_pool) + sum(b.loaded_size for b in scene.index_buffer_pool)
+
+def _release_buffers(scene: Scene):
+    # the scene may still be referenced by an import that is in progress, in which case its buffers will be read again when needed
+    for b in scene.vertex_buffer_pool:
+        b.release()
+    for b in scene.index_buffer_pool:
+        b.release()
+
+
+# shared instance so scenes are reused across every import in the session
+scene_cache = SceneCache()
@@ -1,6 +1,9 @@
+import zlib
+import base64
 from enum import Enum
+from dataclasses import dataclass
 from typing import cast
-from typing import List, Dict, Iterator, Optional, Tuple, Union
+from typing import List, Dict, Set, Iterator, Optional, Tuple, Union
 
 from .Scene import *
 from .Model import *
@@ -9,6 +12,7 @@ from .Types import *
 
 __all__ = [
     'IFilterNode',
+    'SelectionStats',
     'FilterGroup',
     'SceneFilter',
     'ModelFilter',
@@ -23,40 +27,144 @@ class CheckState(Enum):
     CHECKED = 2
 
 
+@dataclass
+class PermutationCost:
+    meshes: int = 0
+    vertices: int = 0
+    triangles: int = 0
+    materials: Dict[int, int] = None # material index -> number of segments using it
+
+
+class SelectionStats:
+    ''' Reference counted totals for the content used by the selected permutations, updated as nodes are toggled '''
+
+    _scene: Scene
+    _costs: Dict[ModelPermutation, PermutationCost]
+    _material_textures: Dict[int, List[int]]
+    _materials: Dict[int, int] # material index -> number of selected segments using it
+    _textures: Dict[int, int] # texture index -> number of selected materials using it
+
+    objects: int = 0
+    meshes: int = 0
+    vertices: int = 0
+    triangles: int = 0
+
+    @property
+    def material_count(self) -> int:
+        return len(self._materials)
+
+    @property
+    def texture_count(self) -> int:
+        return len(self._textures)
+
+    def __init__(self, scene: Scene):
+        self._scene = scene
+        self._costs = dict()
+        self._material_textures = dict()
+        self._materials = dict()
+        self._textures = dict()
+
+    def clear(self):
+        self.objects = self.meshes = self.vertices = self.triangles = 0
+        self._materials.clear()
+        self._textures.clear()
+
+    def copy(self) -> 'SelectionStats':
+        ''' Copies the current totals. Cached costs are shared with the copy '''
+        result = SelectionStats(self._scene)
+        result._costs = self._costs
+        result._material_textures = self._material_textures
+        result._materials = dict(self._materials)
+        result._textures = dict(self._textures)
+        result.objects, result.meshes, result.vertices, result.triangles = self.objects, self.meshes, self.vertices, self.triangles
+        return result
+
+    def material_indices(self) -> List[int]:
+        return sorted(self._materials.keys())
+
+    def texture_indices(self) -> List[int]:
+        return sorted(self._textures.keys())
+
+    def add_permutation(self, model: Model, permutation: ModelPermutation):
+        self._apply(self._get_cost(model, permutation), 1)
+
+    def remove_permutation(self, model: Model, permutation: ModelPermutation):
+        self._apply(self._get_cost(model, permutation), -1)
+
+    def _get_cost(self, model: Model, permutation: ModelPermutation) -> PermutationCost:
+        # costs are shared by every placement of the same model
+        cost = self._costs.get(permutation)
+        if cost:
+            return cost
+
+        cost = self._costs[permutation] = PermutationCost(permutation.mesh_count, 0, 0, dict())
+        for mesh in permutation.get_meshes(model):
+            cost.vertices += self._scene.count_vertices(mesh)
+            cost.triangles += self._scene.estimate_triangles(mesh)
+            for segment in mesh.segments:
+                if segment.material_index >= 0:
+                    cost.materials[segment.material_index] = cost.materials.get(segment.material_index, 0) + 1
+        return cost
+
+    def _apply(self, cost: PermutationCost, sign: int):
+        self.meshes += cost.meshes * sign
+        self.vertices += cost.vertices * sign
+        self.triangles += cost.triangles * sign
+        for index, count in cost.materials.items():
+            refs = self._materials.get(index, 0)
+            _update_refs(self._materials, index, refs + count * sign)
+            if refs == 0 or refs + count * sign == 0:
+                # material came into or went out of use, so update the textures it references
+                for t in self._get_textures(index):
+                    _update_refs(self._textures, t, self._textures.get(t, 0) + sign)
+
+    def _get_textures(self, material_index: int) -> List[int]:
+        textures = self._material_textures.get(material_index)
+        if textures is None:
+            material = self._scene.material_pool[material_index]
+            textures = self._material_textures[material_index] = list(set(t.texture_index for t in material.texture_mappings))
+        return textures
+
+
+def _update_refs(refs: Dict[int, int], index: int, count: int):
+    if count > 0:
+        refs[index] = count
+    else:
+        refs.pop(index, None)
+
+
 class IFilterNode:
+    '''
+    Check state is not stored on the node. Each node covers a contiguous range of leaf slots in a bitset
+    owned by the `SceneFilter`; leaves hold the state and partial states of other nodes are derived on demand.
+    '''
+
     _node_type: str = None
     _parent: 'IFilterNode' = None
+    _root: 'SceneFilter' = None
+    _leaf_start: int = 0
+    _leaf_end: int = 0
     label: str = None
-    state: CheckState = CheckState.CHECKED
 
     @property
     def node_type(self) -> str:
         return self._node_type
 
+    @property
+    def state(self) -> CheckState:
+        return self._root._get_state(self._leaf_start, self._leaf_end)
+
     @property
     def selected(self) -> bool:
-        return self.state != CheckState.UNCHECKED
+        return self._root._bits.find(1, self._leaf_start, self._leaf_end) >= 0
 
     def __init__(self, parent: 'IFilterNode'):
         self._parent = parent
+        self._root = parent._root if parent else self
 
     def enumerate_children(self) -> Iterator['IFilterNode']:
         yield from ()
 
-    def _refresh_state(self, bubble: bool = True):
-        ''' Refresh state of self and all anscestors to reflect states of children '''
-
-        states = set(c.state for c in self.enumerate_children())
-        if len(states) == 0:
-            return # no children
-        elif len(states) > 1:
-            self.state = CheckState.PARTIAL
-        else:
-            self.state = states.pop()
-
-        if bubble and self._parent:
-            self._parent._refresh_state()
-
     def toggle(self, state: Optional[Union[CheckState, int]] = None):
         ''' Toggle state of self and all descendants '''
 
@@ -64,23 +172,12 @@ class IFilterNode:
             state = CheckState(state)
 
         # use state param if provided, else invert state
-        if state != None:
-            self.state = state
-        else:
-            self.state = CheckState.CHECKED if self.state != CheckState.CHECKED else CheckState.UNCHECKED
+        if state == None:
+            state = CheckState.CHECKED if self.state != CheckState.CHECKED else CheckState.UNCHECKED
 
-        # set all descendants to match the new state
-        self._push_state()
-
-        if self._parent:
-            self._parent._refresh_state()
-
-    def _push_state(self):
-        ''' Push current state to all descendants '''
-
-        for c in self.enumerate_children():
-            c.state = self.state
-            c._push_state()
+        # partial states are derived from the leaves so there is nothing to apply
+        if state != CheckState.PARTIAL:
+            self._root._set_range(self._leaf_start, self._leaf_end, state == CheckState.CHECKED)
 
     def __str__(self) -> str:
         return self.label
@@ -141,50 +238,219 @@ class FilterGroup(IFilterNode):
 class SceneFilter(FilterGroup):
     _node_type: str = 'Scene'
     _scene: Scene
+    _stats: SelectionStats = None # calculated on first use so a filter can be created before the buffer pools are read
+    _all_stats: SelectionStats = None # totals with every leaf checked
+    _bits: bytearray # one byte per leaf, 1 if checked
+    _leaves: List[IFilterNode]
+    _leaf_models: List[int] # model ordinal of each leaf, or -1 for leaves outside a model
+    _model_counts: List[int] # number of checked leaves in each model
+    _all_model_counts: List[int]
+
+    @property
+    def stats(self) -> SelectionStats:
+        if self._stats is None:
+            self._stats = self._calculate_stats()
+        return self._stats
 
     def __init__(self, scene: Scene):
         super().__init__(None, scene, scene.root_node)
         self._scene = scene
         self.label = scene.name
 
+        self._leaves = []
+        self._leaf_models = []
+        self._all_model_counts = []
+        self._assign_leaves(self, -1)
+
+        # everything starts checked
+        self._bits = bytearray(b'\x01' * len(self._leaves))
+        self._model_counts = list(self._all_model_counts)
+
+        for m in self._models_recursive():
+            for s in m.permutation_sets:
+                s._leaf_indices = [p._leaf_start for p in s._permutations]
+
+    def _assign_leaves(self, node: IFilterNode, model_ordinal: int):
+        ''' Assigns leaf ranges in depth first order so every subtree covers a contiguous range '''
+
+        if type(node) == ModelFilter:
+            model_ordinal = len(self._all_model_counts)
+            self._all_model_counts.append(0)
+
+        node._leaf_start = len(self._leaves)
+        for c in node.enumerate_children():
+            self._assign_leaves(c, model_ordinal)
+
+        if len(self._leaves) == node._leaf_start:
+            # no children, so this node holds its own state
+            self._leaves.append(node)
+            self._leaf_models.append(model_ordinal)
+            if model_ordinal >= 0:
+                self._all_model_counts[model_ordinal] += 1
+        node._leaf_end = len(self._leaves)
+
+    def _calculate_stats(self) -> SelectionStats:
+        stats = SelectionStats(self._scene)
+        stats.objects = sum(1 for c in self._model_counts if c > 0)
+
+        i = self._bits.find(1)
+        while i >= 0:
+            leaf = self._leaves[i]
+            if type(leaf) == PermutationFilter:
+                stats.add_permutation(leaf._model_filter._model, leaf._permutation)
+            i = self._bits.find(1, i + 1)
+
+        if self._bits.count(1) == len(self._bits):
+            self._all_stats = stats.copy()
+        return stats
+
+    def _models_recursive(self) -> Iterator['ModelFilter']:
+        groups = [self]
+        while groups:
+            g = groups.pop()
+            groups.extend(g.groups)
+            yield from g.models
+
+    def _get_state(self, start: int, end: int) -> CheckState:
+        checked = self._bits.count(1, start, end)
+        if checked == 0:
+            return CheckState.UNCHECKED
+        return CheckState.CHECKED if checked == end - start else CheckState.PARTIAL
+
+    def _set_range(self, start: int, end: int, checked: bool):
+        if start == 0 and end == len(self._bits):
+            # whole scene, so the totals are already known
+            self._bits[:] = (b'\x01' if checked else b'\x00') * end
+            if checked:
+                self._stats = self._all_stats.copy() if self._all_stats else None
+                self._model_counts = list(self._all_model_counts)
+            else:
+                if self._stats:
+                    self._stats.clear()
+                self._model_counts = [0] * len(self._all_model_counts)
+            return
+
+        # only visit the leaves that are actually changing
+        old_value = 0 if checked else 1
+        i = self._bits.find(old_value, start, end)
+        while i >= 0:
+            self._set_leaf(i, checked)
+            i = self._bits.find(old_value, i + 1, end)
+
+    def _set_leaves(self, indices: List[int], checked: bool):
+        for i in indices:
+            if self._bits[i] != checked:
+                self._set_leaf(i, checked)
+
+    def _set_leaf(self, index: int, checked: bool):
+        self._bits[index] = checked
+        delta = 1 if checked else -1
+
+        # totals that have not been calculated yet will include this change when they are
+        stats = self._stats
+
+        leaf = self._leaves[index]
+        if stats and type(leaf) == PermutationFilter:
+            if checked:
+                stats.add_permutation(leaf._model_filter._model, leaf._permutation)
+            else:
+                stats.remove_permutation(leaf._model_filter._model, leaf._permutation)
+
+        ordinal = self._leaf_models[index]
+        if ordinal >= 0:
+            count = self._model_counts[ordinal]
+            self._model_counts[ordinal] = count + delta
+            if stats and (count == 0 or count + delta == 0):
+                stats.objects += delta
+
+    def _get_signature(self) -> int:
+        ''' Checksum of the tree structure and labels, used to verify a preset belongs to this scene '''
+
+        crc = 0
+        for leaf in self._leaves:
+            node = leaf
+            while node:
+                crc = zlib.crc32(f'{node.node_type}:{node.label}/'.encode('utf-8'), crc)
+                node = node._parent
+        return crc
+
+    def export_preset(self) -> str:
+        ''' Gets the current selection as a compact string that can be restored with `import_preset()` '''
+
+        packed = bytearray((len(self._bits) + 7) // 8)
+        i = self._bits.find(1)
+        while i >= 0:
+            packed[i >> 3] |= 1 << (i & 7)
+            i = self._bits.find(1, i + 1)
+
+        data = base64.b64encode(zlib.compress(bytes(packed))).decode('ascii')
+        return f'{len(self._bits)}:{self._get_signature():08x}:{data}'
+
+    def import_preset(self, preset: str):
+        try:
+            count, signature, data = preset.split(':')
+            count, signature = int(count), int(signature, 16)
+            packed = zlib.decompress(base64.b64decode(data))
+            if len(packed) < (count + 7) // 8:
+                raise ValueError()
+        except Exception:
+            raise Exception('Invalid selection preset')
+
+        if count != len(self._bits) or signature != self._get_signature():
+            raise Exception('Selection preset does not match this scene')
+
+        self._set_range(0, count, False)
+        for i in range(count):
+            if packed[i >> 3] & (1 << (i & 7)):
+                self._set_leaf(i, True)
+
     def selected_materials(self) -> Iterator[Tuple[int, Material]]:
         ''' Iterates over tuples of (material_index, material) only for materials in use by selected meshes '''
 
-        material_ids = set()
-        for model in self._selected_models_recursive():
-            for region in model.selected_regions():
-                for perm in region.selected_permutations():
-                    for mesh in perm._permutation.get_meshes(model._model):
-                        for segment in mesh.segments:
-                            material_ids.add(segment.material_index)
-
-        for id in material_ids:
+        for id in self.stats.material_indices():
             yield (id, self._scene.material_pool[id])
 
     def selected_textures(self) -> Iterator[Tuple[int, Texture]]:
         ''' Iterates over tuples of (texture_index, texture) only for textures in use by selected meshes '''
 
-        texture_ids = set()
-        for _, mat in self.selected_materials():
-            for t in mat.texture_mappings:
-                texture_ids.add(t.texture_index)
-
-        for id in texture_ids:
+        for id in self.stats.texture_indices():
             yield (id, self._scene.texture_pool[id])
 
+    def selected_buffers(self) -> Tuple[Set[int], Set[int]]:
+        ''' Gets the indices of the vertex buffers and index buffers used by selected meshes '''
+
+        vertex_buffers, index_buffers = set(), set()
+        i = self._bits.find(1)
+        while i >= 0:
+            leaf = self._leaves[i]
+            if type(leaf) == PermutationFilter:
+                for mesh in leaf._permutation.get_meshes(leaf._model_filter._model):
+                    vertex_buffers.add(mesh.vertex_buffer_index)
+                    index_buffers.add(mesh.index_buffer_index)
+            i = self._bits.find(1, i + 1)
+
+        # unused mesh slots can have negative buffer indices
+        vertex_buffers.discard(-1)
+        index_buffers.discard(-1)
+        return (vertex_buffers, index_buffers)
+
     def count_objects(self) -> int:
-        return sum(1 for _ in self._selected_models_recursive())
+        return self.stats.objects
 
     def count_materials(self) -> int:
-        return sum(1 for _ in self.selected_materials())
+        return self.stats.material_count
+
+    def count_textures(self) -> int:
+        return self.stats.texture_count
 
     def count_meshes(self) -> int:
-        count = 0
-        for m in self._selected_models_recursive():
-            for r in m.selected_regions():
-                for p in r.selected_permutations():
-                    count = count + p._permutation.mesh_count
-        return count
+        return self.stats.meshes
+
+    def count_vertices(self) -> int:
+        return self.stats.vertices
+
+    def count_triangles(self) -> int:
+        return self.stats.triangles
 
 
 class ModelFilter(IFilterNode):
@@ -252,22 +518,42 @@ class PermutationFilter(IFilterNode):
     _node_type: str = 'Permutation'
     _permutation: ModelPermutation
 
+    @property
+    def _model_filter(self) -> ModelFilter:
+        return cast(ModelFilter, self._parent._parent)
+
+    @property
+    def state(self) -> CheckState:
+        return CheckState.CHECKED if self._root._bits[self._leaf_start] else CheckState.UNCHECKED
+
+    @property
+    def selected(self) -> bool:
+        return self._root._bits[self._leaf_start] == 1
+
     def __init__(self, parent: IFilterNode, permutation: ModelPermutation):
         super().__init__(parent)
         self._permutation = permutation
         self.label = permutation.name
 
-    def _push_state(self):
-        model = cast(ModelFilter, self._parent._parent)
-        for s in model.permutation_sets:
-            if self in s._permutations:
-                s._refresh_state()
-                break
-
 
 class PermutationSetFilter(IFilterNode):
+    ''' Permutations that share a name across regions. The members are not contiguous so the set does not have a leaf range '''
+
     _node_type: str = 'Permutation Set'
     _permutations: List[PermutationFilter]
+    _leaf_indices: List[int]
+
+    @property
+    def state(self) -> CheckState:
+        bits = self._root._bits
+        checked = sum(bits[i] for i in self._leaf_indices)
+        if checked == 0:
+            return CheckState.UNCHECKED
+        return CheckState.CHECKED if checked == len(self._leaf_indices) else CheckState.PARTIAL
+
+    @property
+    def selected(self) -> bool:
+        return self.state != CheckState.UNCHECKED
 
     def __init__(self, parent: IFilterNode, permutations: List[PermutationFilter]):
         super().__init__(parent)
@@ -278,9 +564,11 @@ class PermutationSetFilter(IFilterNode):
         yield from self._permutations
 
     def toggle(self, state: Optional[Union[CheckState, int]] = None):
-        for p in self._permutations:
-            p.toggle(state)
-        self._refresh_state()
+        if type(state) == int:
+            state = CheckState(state)
+
+        if state == None:
+            state = CheckState.CHECKED if self.state != CheckState.CHECKED else CheckState.UNCHECKED
 
-    def _refresh_state(self, bubble: bool = True):
-        super()._refresh_state(False)
\ No newline at end of file
+        if state != CheckState.PARTIAL:
+            self._root._set_leaves(self._leaf_indices, state == CheckState.CHECKED)
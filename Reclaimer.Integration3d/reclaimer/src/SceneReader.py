@@ -1,7 +1,9 @@
-from typing import List, Dict, Tuple, Union, Callable, TypeVar
+from functools import partial
+from typing import List, Dict, Set, Tuple, Union, Iterable, Callable, Optional, TypeVar
 
 from .Types import *
 from .FileReader import FileReader
+from .DdsHeader import *
 from .DataBlock import DataBlock
 from .Scene import *
 from .Model import *
@@ -9,14 +11,34 @@ from .Material import *
 from .Vectors import VectorDescriptor
 from .VertexBuffer import *
 from .IndexBuffer import *
+from .Profiler import profiler
 
 __all__ = [
+    'ReadCancelled',
+    'SceneReadCallback',
     'SceneReader'
 ]
 
 T = TypeVar('T')
 
 
+class ReadCancelled(Exception):
+    ''' Raised by `SceneReader.open_scene()` when the callback requests cancellation '''
+
+
+class SceneReadCallback:
+    ''' Allows a caller to observe and cancel a scene read, typically from another thread '''
+
+    cancel_requested: bool = False
+
+    def check_cancelled(self):
+        if self.cancel_requested:
+            raise ReadCancelled()
+
+    def hierarchy_loaded(self, scene: Scene):
+        ''' Override in derived class. Called once the node hierarchy and model pool are available, before any buffers are read '''
+
+
 # helper functions #
 
 def _read_property_blocks(reader: FileReader, block: DataBlock) -> Dict[str, DataBlock]:
@@ -39,6 +61,20 @@ def _decode_block(reader: FileReader, block: DataBlock, read_func: Callable[[Fil
 def _decode_list(reader: FileReader, block: DataBlock, read_func: Callable[[FileReader, DataBlock], T]) -> List[T]:
     return [_decode_block(reader, b, read_func) for b in block.child_blocks]
 
+def _decode_pool(reader: FileReader, block: DataBlock, read_func: Callable[[FileReader, DataBlock], T], callback: SceneReadCallback) -> List[T]:
+    with profiler.measure(f'decode {block.code}'):
+        items = []
+        for b in block.child_blocks:
+            callback.check_cancelled()
+            items.append(_decode_block(reader, b, read_func))
+        return items
+
+def _decode_indexed(reader: FileReader, block: DataBlock, read_func: Callable[[FileReader, DataBlock], T]) -> List[T]:
+    items = _decode_list(reader, block, read_func)
+    for i, item in enumerate(items):
+        item.index = i
+    return items
+
 def _decode_data_block(reader: FileReader, block: DataBlock) -> Tuple[int, int]:
     reader.position = block.start_address
     size = reader.read_int32()
@@ -48,24 +84,45 @@ def _decode_data_block(reader: FileReader, block: DataBlock) -> Tuple[int, int]:
 
 # decode functions #
 
-def _read_scene(reader: FileReader, block: DataBlock) -> Scene:
-    scene = Scene()
-    scene.version = Version(reader.read_byte(), reader.read_byte(), reader.read_byte(), reader.read_byte())
-    scene.unit_scale = reader.read_float()
-    scene.world_matrix = reader.read_matrix3x3()
-    scene.name = reader.read_string()
+def _read_scene(fileName: str, callback: SceneReadCallback) -> Callable[[FileReader, DataBlock], Scene]:
+    def _read_scene(reader: FileReader, block: DataBlock) -> Scene:
+        scene = Scene()
+        scene._source_file = fileName
+        scene.version = Version(reader.read_byte(), reader.read_byte(), reader.read_byte(), reader.read_byte())
+        scene.unit_scale = reader.read_float()
+        scene.world_matrix = reader.read_matrix3x3()
+        scene.name = reader.read_string()
 
-    props = _read_property_blocks(reader, block)
-    scene.root_node = _decode_block(reader, props['NODE'], _read_node)
-    scene.model_pool = _decode_list(reader, props['MODL[]'], _read_model)
+        with profiler.measure('block parse'):
+            props = _read_property_blocks(reader, block)
+
+        with profiler.measure('decode NODE'):
+            scene.root_node = _decode_block(reader, props['NODE'], _read_node)
+
+        scene.model_pool = _decode_pool(reader, props['MODL[]'], _read_model, callback)
+        for i, model in enumerate(scene.model_pool):
+            model.index = i
+
+        callback.hierarchy_loaded(scene)
 
-    scene.vector_descriptor_pool = _decode_list(reader, props['VECD[]'], _read_vector_descriptor)
-    scene.vertex_buffer_pool = _decode_list(reader, props['VBUF[]'], _read_vertex_buffer(scene))
-    scene.index_buffer_pool = _decode_list(reader, props['IBUF[]'], _read_index_buffer)
-    scene.material_pool = _decode_list(reader, props['MATL[]'], _read_material)
-    scene.texture_pool = _decode_list(reader, props['BITM[]'], _read_texture)
+        scene.vector_descriptor_pool = _decode_pool(reader, props['VECD[]'], _read_vector_descriptor, callback)
+
+        # only the buffer headers are read here, the data is read by SceneReader.load_buffers() once the selection is known
+        scene._vertex_buffer_blocks = props['VBUF[]'].child_blocks
+        scene._index_buffer_blocks = props['IBUF[]'].child_blocks
+        scene.vertex_buffer_pool = _decode_pool(reader, props['VBUF[]'], _read_vertex_buffer_header, callback)
+        scene.index_buffer_pool = _decode_pool(reader, props['IBUF[]'], _read_index_buffer_header, callback)
+
+        for i, vb in enumerate(scene.vertex_buffer_pool):
+            vb._loader = _vertex_buffer_loader(scene, i)
+        for i, ib in enumerate(scene.index_buffer_pool):
+            ib._loader = _index_buffer_loader(scene, i)
+        scene.material_pool = _decode_pool(reader, props['MATL[]'], _read_material, callback)
+        scene.texture_pool = _decode_pool(reader, props['BITM[]'], _read_texture, callback)
+
+        return scene
 
-    return scene
+    return _read_scene
 
 def _read_node(reader: FileReader, block: DataBlock):
     node = SceneGroup()
@@ -105,17 +162,18 @@ def _read_model(reader: FileReader, block: DataBlock) -> Model:
     model = Model()
     _read_base_props(reader, model)
     props = _read_property_blocks(reader, block)
-    model.regions = _decode_list(reader, props['REGN[]'], _read_region)
+    model.regions = _decode_indexed(reader, props['REGN[]'], _read_region)
     model.markers = _decode_list(reader, props['MARK[]'], _read_marker)
     model.bones = _decode_list(reader, props['BONE[]'], _read_bone)
     model.meshes = _decode_list(reader, props['MESH[]'], _read_mesh)
+    model.index_bones()
     return model
 
 def _read_region(reader: FileReader, block: DataBlock) -> ModelRegion:
     region = ModelRegion()
     region.name = reader.read_string()
     props = _read_property_blocks(reader, block)
-    region.permutations = _decode_list(reader, props['PERM[]'], _read_permutation)
+    region.permutations = _decode_indexed(reader, props['PERM[]'], _read_permutation)
     return region
 
 def _read_permutation(reader: FileReader, block: DataBlock) -> ModelPermutation:
@@ -204,12 +262,15 @@ def _read_texture(reader: FileReader, block: DataBlock) -> Texture:
 
     return texture
 
-def _read_index_buffer(reader: FileReader, block: DataBlock) -> IndexBuffer:
+def _read_index_buffer_header(reader: FileReader, block: DataBlock) -> IndexBuffer:
     layout = IndexLayout(reader.read_byte())
     width = reader.read_byte()
     count = reader.read_int32()
-    data = reader.read_bytes(width * count)
-    return IndexBuffer(layout, width, data)
+    return IndexBuffer(layout, width, count=count)
+
+def _read_index_buffer_data(buf: IndexBuffer, reader: FileReader, block: DataBlock):
+    reader.position = block.start_address + 6 # skip layout, width and count
+    buf.set_data(reader.read_bytes(buf.width * buf.count))
 
 def _read_vector_descriptor(reader: FileReader, block: DataBlock) -> VectorDescriptor:
     datatype = reader.read_byte()
@@ -221,65 +282,121 @@ def _read_vector_descriptor(reader: FileReader, block: DataBlock) -> VectorDescr
     return VectorDescriptor(datatype, size, dimensions)
 
 
-def _read_vertex_buffer(scene: Scene) -> Callable[[FileReader, DataBlock], VertexBuffer]:
-    def _read_vertex_buffer(reader: FileReader, block: DataBlock) -> VertexBuffer:
-        buf = VertexBuffer()
-        buf.count = reader.read_int32()
-        channel_blocks = _read_remaining_blocks(reader, block)
-        channel_buffers = {
-            'POSN': [],
-            'TEXC': [],
-            'NORM': [],
-            'TANG': [],
-            'BNRM': [],
-            'BLID': [],
-            'BLWT': [],
-            'COLR': []
-        }
-
-        for b in channel_blocks:
-            reader.position = b.start_address
-            descriptor_index = reader.read_int32()
-            descriptor = scene.vector_descriptor_pool[descriptor_index]
-            data = reader.read_bytes(b.end_address - reader.position)
-            channel = VectorBuffer(descriptor, buf.count, data)
-            channel_buffers[b.code].append(channel)
-
-        buf.position_channels = channel_buffers['POSN']
-        buf.texcoord_channels = channel_buffers['TEXC']
-        buf.normal_channels = channel_buffers['NORM']
-        buf.blendindex_channels = channel_buffers['BLID']
-        buf.blendweight_channels = channel_buffers['BLWT']
-        buf.color_channels = channel_buffers['COLR']
-
-        return buf
-
-    return _read_vertex_buffer
+def _read_vertex_buffer_header(reader: FileReader, block: DataBlock) -> VertexBuffer:
+    buf = VertexBuffer()
+    buf.count = reader.read_int32()
+    return buf
+
+def _read_vertex_buffer_data(scene: Scene, buf: VertexBuffer, channels: Set[str], reader: FileReader, block: DataBlock):
+    reader.position = block.start_address + 4 # skip count
+
+    # this only reads the channel block headers, blocks for unwanted channels are skipped without reading their data
+    channel_blocks = _read_remaining_blocks(reader, block)
+    channel_buffers = { code: [] for code in channels }
+
+    for b in channel_blocks:
+        if b.code not in channel_buffers:
+            continue
+
+        reader.position = b.start_address
+        descriptor_index = reader.read_int32()
+        descriptor = scene.vector_descriptor_pool[descriptor_index]
+        data = reader.read_bytes(b.end_address - reader.position)
+        channel = VectorBuffer(descriptor, buf.count, data)
+        channel_buffers[b.code].append(channel)
+
+    buf.set_channels(channel_buffers)
+
+# fallbacks for buffers that are accessed without being loaded up front
+
+def _vertex_buffer_loader(scene: Scene, index: int) -> Callable[[VertexBuffer, Set[str]], None]:
+    return lambda _, channels: SceneReader.load_buffers(scene, [index], [], channels)
+
+def _index_buffer_loader(scene: Scene, index: int) -> Callable[[IndexBuffer], None]:
+    return lambda _: SceneReader.load_buffers(scene, [], [index])
 
 
 class SceneReader:
     @staticmethod
-    def open_scene(fileName: str) -> Scene:
-        reader = FileReader(fileName)
-        rootBlock = DataBlock(reader)
+    def open_scene(fileName: str, callback: Optional[SceneReadCallback] = None) -> Scene:
+        ''' Reads a scene from file. Raises `ReadCancelled` if the callback requests cancellation before the read completes '''
 
-        if rootBlock.code != 'RMF!' or rootBlock.is_list or reader.position != rootBlock.end_address:
-            raise Exception('Not a valid RMF file')
+        if not callback:
+            callback = SceneReadCallback()
 
-        scene = _decode_block(reader, rootBlock, _read_scene)
-        reader.close()
+        # the import resets the profiler later on, so the read timings are kept with the scene
+        with profiler.capture() as read_timings:
+            with profiler.measure('file open'):
+                reader = FileReader(fileName)
 
-        scene._source_file = fileName
+            try:
+                rootBlock = DataBlock(reader)
+                if rootBlock.code != 'RMF!' or rootBlock.is_list or reader.position != rootBlock.end_address:
+                    raise Exception('Not a valid RMF file')
+
+                scene = _decode_block(reader, rootBlock, _read_scene(fileName, callback))
+            finally:
+                reader.close()
+
+        scene._read_timings = read_timings
         return scene
 
     @staticmethod
-    def read_texture(scene: Scene, texture: Texture) -> Union[bytes, None]:
+    def load_buffers(scene: Scene, vertex_buffer_indices: Iterable[int], index_buffer_indices: Iterable[int], channels: Optional[Set[str]] = None):
+        '''
+        Reads the data for the specified vertex and index buffers in file order. Buffers that are already loaded are skipped.
+        `channels` is a set of vertex channel block codes to read, defaulting to `DEFAULT_CHANNELS`.
+        '''
+
+        if channels is None:
+            channels = DEFAULT_CHANNELS
+
+        tasks = []
+        for i in set(vertex_buffer_indices):
+            vb = scene.vertex_buffer_pool[i]
+            if not vb.has_channels(channels):
+                tasks.append((scene._vertex_buffer_blocks[i], partial(_read_vertex_buffer_data, scene, vb, channels)))
+        for i in set(index_buffer_indices):
+            ib = scene.index_buffer_pool[i]
+            if not ib.loaded:
+                tasks.append((scene._index_buffer_blocks[i], partial(_read_index_buffer_data, ib)))
+
+        if not tasks:
+            return
+
+        # reading in address order keeps the file access sequential
+        tasks.sort(key=lambda t: t[0].start_address)
+
+        reader = FileReader(scene._source_file)
+        try:
+            for block, read_func in tasks:
+                read_func(reader, block)
+        finally:
+            reader.close()
+
+    @staticmethod
+    def read_texture(scene: Scene, texture: Texture, max_resolution: int = 0) -> Union[bytes, None]:
+        '''
+        Reads the data for an embedded texture. If `max_resolution` is set and the texture is a DDS file with mip levels,
+        only the largest mip level that fits within that resolution is read, and it is returned as a DDS file of its own.
+        '''
+
         if texture.size == 0:
             return None
 
         reader = FileReader(scene._source_file)
-        reader.seek(texture.address, 0)
-        result = reader.read_bytes(texture.size)
-        reader.close()
-
-        return result
\ No newline at end of file
+        try:
+            if max_resolution > 0:
+                reader.seek(texture.address, 0)
+                header = DdsHeader.parse(reader.read_bytes(min(texture.size, DDS_MAX_HEADER_SIZE)))
+                level = header.select_level(max_resolution) if header else 0
+
+                # the base level comes first, so skip straight past it to the selected level
+                if level > 0 and header.level_offset(level + 1) <= texture.size:
+                    reader.seek(texture.address + header.level_offset(level), 0)
+                    return header.pack_level(level, reader.read_bytes(header.level_size(level)))
+
+            reader.seek(texture.address, 0)
+            return reader.read_bytes(texture.size)
+        finally:
+            reader.close()
\ No newline at end of file
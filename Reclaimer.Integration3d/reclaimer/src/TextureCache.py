@@ -0,0 +1,94 @@
+import os
+import struct
+from typing import Tuple, Optional
+
+from .ImportLog import logger
+from .ImportOptions import ImportOptions
+from .DiskCache import DiskCache
+from .Scene import Scene
+from .Material import Texture
+
+__all__ = [
+    'TextureCache'
+]
+
+# small files mapping the location of an embedded texture to the hash of its content
+_REF_EXT = '.ref'
+
+
+def _get_extension(data: bytes) -> str:
+    if data[:4] == b'\x89PNG':
+        return '.png'
+    if data[:2] == b'BM':
+        return '.bmp'
+    return '.dds'
+
+
+class TextureCache:
+    '''
+    Stores embedded textures on disk as individual image files keyed by the hash of their content, so the host application can load them by path.
+    Each texture location (source file, address and resolution limit) also gets a reference to its content hash, so importing an unchanged file
+    again finds the cached image without reading the texture data, and identical textures from different files share a single image file.
+    Images that are found or stored are kept until `release()` is called, so the host application can still load them once every texture has been read.
+    '''
+
+    _cache: DiskCache
+
+    _instance: Optional['TextureCache'] = None
+
+    def __init__(self, directory: str, max_size: int):
+        self._cache = DiskCache(directory, max_size)
+
+    @staticmethod
+    def for_options(options: ImportOptions) -> Optional['TextureCache']:
+        ''' Gets the shared cache for the directory in the import options, or `None` if the cache is disabled '''
+
+        if not options.TEXTURE_CACHE_DIR:
+            return None
+
+        max_size = options.TEXTURE_CACHE_SIZE * 1024 * 1024
+        instance = TextureCache._instance
+        if instance is None or instance._cache.directory != options.TEXTURE_CACHE_DIR:
+            instance = TextureCache._instance = TextureCache(options.TEXTURE_CACHE_DIR, max_size)
+        instance._cache.max_size = max_size
+        return instance
+
+    def find(self, scene: Scene, texture: Texture, max_resolution: int) -> Optional[Tuple[str, str]]:
+        ''' Gets the (content hash, path) of the cached image for an embedded texture, or `None` if it has not been cached '''
+
+        ref_path = self._cache.get(_get_location_key(scene, texture, max_resolution), _REF_EXT)
+        if not ref_path:
+            return None
+
+        try:
+            with open(ref_path, 'r') as f:
+                content_hash, ext = f.read().split()
+        except (OSError, ValueError):
+            logger.debug('ignoring unreadable texture cache file %s', ref_path, exc_info=True)
+            return None
+
+        self._cache.pin(content_hash, ext)
+        path = self._cache.get(content_hash, ext)
+        return (content_hash, path) if path else None
+
+    def store(self, scene: Scene, texture: Texture, max_resolution: int, data: bytes) -> Tuple[str, str]:
+        ''' Writes the image for an embedded texture to the cache, unless identical content is already cached, and returns its (content hash, path) '''
+
+        content_hash, ext = DiskCache.hash(data), _get_extension(data)
+        self._cache.pin(content_hash, ext)
+        path = self._cache.get(content_hash, ext) or self._cache.put(content_hash, ext, lambda f: f.write(data))
+        self._cache.put(_get_location_key(scene, texture, max_resolution), _REF_EXT, lambda f: f.write(f'{content_hash} {ext}'.encode()))
+        return (content_hash, path)
+
+    def release(self):
+        ''' Allows the images used by the current import to be deleted again once the cache is over its size limit '''
+        self._cache.unpin_all()
+
+
+def _get_location_key(scene: Scene, texture: Texture, max_resolution: int) -> str:
+    source = os.path.normcase(os.path.abspath(scene._source_file))
+    stat = os.stat(source)
+    return DiskCache.hash(
+        source.encode(),
+        struct.pack('<qqqqi', stat.st_size, stat.st_mtime_ns, texture.address, texture.size, max_resolution)
+    )
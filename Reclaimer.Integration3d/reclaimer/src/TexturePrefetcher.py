@@ -0,0 +1,203 @@
+import os
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Tuple, Iterable, Optional
+
+from .BitmapIndex import BitmapIndex
+from .ImportLog import logger
+from .ImportOptions import ImportOptions
+from .Profiler import profiler
+from .Scene import Scene
+from .Material import Texture
+from .SceneReader import SceneReader
+from .TextureCache import TextureCache
+
+__all__ = [
+    'TextureData',
+    'TexturePrefetcher'
+]
+
+_READ_CHUNK_SIZE = 1024 * 1024
+_MISSING_LIST_LIMIT = 20 # max texture names to list in the missing texture summary
+_EMBEDDED_READ_AHEAD = 2 # max embedded textures held in memory per worker before they are requested
+
+
+@dataclass
+class TextureData:
+    index: int = -1
+    path: Optional[str] = None # the source file for external textures, or the cached file for embedded textures if the texture cache is enabled
+    data: Optional[bytes] = None # the pixel data for embedded textures if the texture cache is disabled
+    content_hash: Optional[str] = None # the hash of the pixel data for embedded textures in the texture cache
+    exists: bool = True # false if the source file for an external texture could not be read
+
+
+class TexturePrefetcher:
+    '''
+    Reads the textures for an import on a thread pool ahead of time, so creating the images on the main thread does not wait for disk access.
+    Embedded texture data is read from the source file and held until it is requested, staying only a few textures ahead of the requests so
+    the data for every texture is not held at once. External texture files are read and discarded, which warms the OS file cache for when the
+    host application loads them, and also finds any missing files without the host having to fail to load them.
+    External texture paths are resolved against a shared index of the bitmap folder on the same threads, and missing textures are reported together.
+    If the texture cache is enabled, embedded textures are extracted to it on the same threads and are loaded by path instead.
+    '''
+
+    _scene: Scene
+    _options: ImportOptions
+    _cache: Optional[TextureCache]
+    _executor: ThreadPoolExecutor = None
+    _futures: Dict[int, Future]
+    _backlog: Dict[int, Texture] # embedded textures waiting for space in the read-ahead window, in the order they will be requested
+    _read_ahead: int = 0
+    _embedded: int = 0 # embedded textures that have been submitted but not requested yet
+    _paths: Dict[int, Optional[str]] # resolved external texture paths, `None` if the texture was not found
+    _resolved: Optional[Future] = None # resolves the external texture paths on the thread pool
+
+    def __init__(self, scene: Scene, options: ImportOptions):
+        self._scene = scene
+        self._options = options
+        self._cache = TextureCache.for_options(options)
+        self._futures = dict()
+        self._backlog = dict()
+        self._paths = dict()
+
+    def start(self, textures: Iterable[Tuple[int, Texture]], workers: int):
+        '''
+        Starts resolving the path for each external texture and reading each texture in the background using `workers` threads.
+        If there are no workers the paths are resolved immediately instead. Textures should be provided in the order they will be requested, since embedded textures are only read a few at a time ahead of the requests.
+        '''
+
+        textures = list(textures)
+
+        if workers <= 0:
+            self.resolve(textures)
+            return
+
+        # the bitmap folder may be on a network share, so it is indexed on the pool rather than holding up the import
+        # this is submitted first so it starts before any of the reads that depend on it
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='rmf texture')
+        self._resolved = self._executor.submit(self.resolve, textures)
+        self._read_ahead = workers * _EMBEDDED_READ_AHEAD
+        for i, texture in textures:
+            if i in self._futures or i in self._backlog:
+                continue
+            if texture.size > 0:
+                self._backlog[i] = texture
+            else:
+                self._futures[i] = self._executor.submit(self._read, i, texture)
+
+        self._fill()
+
+    def resolve(self, textures: Iterable[Tuple[int, Texture]]):
+        '''
+        Finds the files for a set of external textures using the shared index of the bitmap folder, trying each of the configured extensions
+        and ignoring case. Any textures that could not be found are written to the log as one summary.
+        '''
+
+        OPTIONS = self._options
+        external = [(i, t) for i, t in textures if t.size == 0 and i not in self._paths]
+        if not external or not OPTIONS.BITMAP_ROOT:
+            return
+
+        if os.path.isdir(OPTIONS.BITMAP_ROOT):
+            with profiler.measure('texture index'):
+                index = BitmapIndex.for_root(OPTIONS.BITMAP_ROOT)
+                extensions = OPTIONS.texture_extensions()
+                for i, texture in external:
+                    self._paths[i] = index.find(texture.name, extensions)
+        else:
+            for i, _ in external:
+                self._paths[i] = None
+
+        missing = sorted({ t.name for i, t in external if self._paths[i] is None })
+        if missing:
+            names = ', '.join(missing[:_MISSING_LIST_LIMIT])
+            if len(missing) > _MISSING_LIST_LIMIT:
+                names += f', ... ({len(missing) - _MISSING_LIST_LIMIT} more)'
+            logger.warning('%d of %d textures were not found in %s: %s', len(missing), len({ t.name for _, t in external }), OPTIONS.BITMAP_ROOT, names)
+
+    def get(self, index: int) -> TextureData:
+        ''' Gets the data for a texture, waiting for it to be read if necessary. Textures that were not prefetched are read immediately '''
+
+        self._backlog.pop(index, None)
+        future = self._futures.pop(index, None)
+        if future is not None and self._scene.texture_pool[index].size > 0:
+            self._embedded -= 1
+            self._fill()
+
+        if future is not None and not future.cancelled():
+            return future.result()
+        return self._read(index, self._scene.texture_pool[index])
+
+    def stop(self):
+        '''
+        Cancels any textures that have not started reading yet and discards any data that has not been requested.
+        Cached images used by this import can be evicted from the texture cache again after this.
+        '''
+
+        if self._executor:
+            for future in self._futures.values():
+                future.cancel()
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._futures.clear()
+        self._backlog.clear()
+        self._resolved = None
+
+        if self._cache:
+            self._cache.release()
+        self._embedded = 0
+
+    def _fill(self):
+        # submit the next embedded textures until the read-ahead window is full
+        while self._backlog and self._embedded < self._read_ahead:
+            i = next(iter(self._backlog))
+            self._futures[i] = self._executor.submit(self._read, i, self._backlog.pop(i))
+            self._embedded += 1
+
+    def _read(self, index: int, texture: Texture) -> TextureData:
+        if texture.size > 0:
+            return self._read_embedded(index, texture)
+
+        resolved = self._resolved
+        if resolved is not None and not resolved.cancelled():
+            try:
+                resolved.result()
+            except Exception:
+                logger.debug('unable to resolve texture paths', exc_info=True)
+
+        if index in self._paths:
+            path = self._paths[index]
+            if path is None:
+                # already reported as missing, so there is no need to try to open it
+                return TextureData(index, path=self._options.texture_path(texture), exists=False)
+        else:
+            path = self._options.texture_path(texture)
+
+        try:
+            with open(path, 'rb') as f:
+                while f.read(_READ_CHUNK_SIZE):
+                    pass
+        except OSError:
+            return TextureData(index, path=path, exists=False)
+
+        return TextureData(index, path=path)
+
+    def _read_embedded(self, index: int, texture: Texture) -> TextureData:
+        scene, budget = self._scene, self._options.TEXTURE_BUDGET
+
+        if self._cache:
+            cached = self._cache.find(scene, texture, budget)
+            if cached:
+                content_hash, path = cached
+                return TextureData(index, path=path, content_hash=content_hash)
+
+        data = SceneReader.read_texture(scene, texture, budget)
+
+        if self._cache:
+            try:
+                content_hash, path = self._cache.store(scene, texture, budget, data)
+                return TextureData(index, path=path, content_hash=content_hash)
+            except OSError:
+                logger.debug('unable to write texture cache file for %s', texture.name, exc_info=True)
+
+        return TextureData(index, data=data)
@@ -5,6 +5,11 @@ from typing import List, Tuple, Union, Iterable, Callable
 
 from .Types import IVector
 
+try:
+    import numpy
+except ImportError:
+    numpy = None # decode_array() is unavailable, vectors can still be decoded individually
+
 __all__ = [
     'DescriptorFlags',
     'BitConfig',
@@ -19,6 +24,12 @@ _integer_formats = {
     4: 'I'
 }
 
+_array_formats = {
+    1: '<u1',
+    2: '<u2',
+    4: '<u4'
+}
+
 def _get_vector_bytes(data: bytes, vector_index: int, vector_size: int) -> bytes:
     ''' Gets the subset of bytes that correspond to the vector at the specified index '''
     byte_index = vector_index * vector_size
@@ -70,6 +81,17 @@ class BitConfig:
             value = -(value & self.signExtend) | (value & (self.signExtend - 1))
         return value / self.scale if self.normalized else value
 
+    def get_array(self, bits: 'numpy.ndarray') -> 'numpy.ndarray':
+        ''' Equivalent to `get_value()` for every element of an integer array '''
+        bits = bits.astype(numpy.int64)
+        value = (bits >> self.offset) & self.lengthMask
+        if self.signMode == DescriptorFlags.SIGN_SHIFTED:
+            value = value - int(self.scale)
+        elif self.signMode == DescriptorFlags.SIGN_EXTENDED:
+            negative = (bits & self.signMask) > 0
+            value = numpy.where(negative, -(value & self.signExtend) | (value & (self.signExtend - 1)), value)
+        return value / self.scale if self.normalized else value
+
 
 class NormalisedVector(IVector):
     ''' A vector consisting of separate integer values that are normalised into floats '''
@@ -168,6 +190,44 @@ class VectorDescriptor:
     def decode(self, data: bytes, vector_index: int) -> Iterable[float]:
         return self._decode_func(data, vector_index)
 
+    @property
+    def layout(self) -> Tuple[int, int, Tuple[DimensionConfig, ...]]:
+        ''' Gets a value that is equal for any descriptors that decode the same data to the same values '''
+        return (self._datatype, self._size, tuple(tuple(d) for d in self._dimensions))
+
+    @property
+    def dimensions(self) -> int:
+        return self._count if self._datatype != DataType.PACKED else len(self._bitmasks)
+
+    @property
+    def array_dtype(self) -> str:
+        ''' Gets the element type of the arrays returned by `decode_array()` '''
+        if self._datatype == DataType.REAL or any(b.normalized for b in self._bitmasks):
+            return 'float32'
+        return 'int32'
+
+    def decode_array(self, data: bytes, count: int) -> 'numpy.ndarray':
+        '''
+        Decodes `count` vectors at once into a 2D array with a row per vector, giving the same values as `decode()`.
+        The array is float32 unless the values are unnormalised integers (such as blend indices), in which case it is int32.
+        Requires numpy.
+        '''
+
+        if numpy is None:
+            raise Exception('numpy is not available')
+
+        if self._datatype == DataType.REAL:
+            return numpy.frombuffer(data, '<f4', count * self._count).reshape(count, self._count).copy()
+
+        if self._datatype == DataType.INTEGER:
+            values = numpy.frombuffer(data, _array_formats[self._size], count * self._count).reshape(count, self._count)
+            columns = [b.get_array(values[:, i]) for i, b in enumerate(self._bitmasks)]
+        else:
+            values = numpy.frombuffer(data, _array_formats[self._size], count)
+            columns = [b.get_array(values) for b in self._bitmasks]
+
+        return numpy.stack(columns, axis=1).astype(self.array_dtype)
+
     def __str__(self) -> str:
         value_bits = self._size * 8
         value_count = self._count
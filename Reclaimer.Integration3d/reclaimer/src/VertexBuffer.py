@@ -1,23 +1,100 @@
 import itertools
-from typing import List, Tuple, Iterator, Iterable, Callable
+from typing import List, Dict, Set, Tuple, Iterator, Iterable, Callable, Optional
 from collections.abc import Sequence
 
-from .Vectors import VectorDescriptor
+from .Vectors import VectorDescriptor, numpy
 
 __all__ = [
+    'ALL_CHANNELS',
+    'DEFAULT_CHANNELS',
     'VertexBuffer',
     'VectorBuffer'
 ]
 
+ALL_CHANNELS = frozenset(('POSN', 'TEXC', 'NORM', 'TANG', 'BNRM', 'BLID', 'BLWT', 'COLR'))
+
+# tangents and binormals are not used by the importers, so they are only read if something asks for them
+DEFAULT_CHANNELS = ALL_CHANNELS - {'TANG', 'BNRM'}
+
 
 class VertexBuffer:
     count: int
-    position_channels: List['VectorBuffer']
-    texcoord_channels: List['VectorBuffer']
-    normal_channels: List['VectorBuffer']
-    blendindex_channels: List['VectorBuffer']
-    blendweight_channels: List['VectorBuffer']
-    color_channels: List['VectorBuffer']
+    _channels: Dict[str, List['VectorBuffer']] = None # keyed by block code, only contains the channels that have been read
+    _loader: Callable[['VertexBuffer', Set[str]], None] = None # reads channels on first access if they were not provided up front
+
+    @property
+    def loaded(self) -> bool:
+        return self._channels is not None
+
+    def has_channels(self, codes: Set[str]) -> bool:
+        return self._channels is not None and all(c in self._channels for c in codes)
+
+    @property
+    def position_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('POSN')
+
+    @property
+    def texcoord_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('TEXC')
+
+    @property
+    def normal_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('NORM')
+
+    @property
+    def blendindex_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('BLID')
+
+    @property
+    def blendweight_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('BLWT')
+
+    @property
+    def color_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('COLR')
+
+    @property
+    def tangent_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('TANG')
+
+    @property
+    def binormal_channels(self) -> List['VectorBuffer']:
+        return self._get_channels('BNRM')
+
+    def set_channels(self, channels: Dict[str, List['VectorBuffer']]):
+        ''' Adds or replaces the channels for each code in `channels`. Codes that are not included are left unchanged '''
+        if self._channels is None:
+            self._channels = dict()
+        self._channels.update(channels)
+
+    def loaded_channels(self) -> Iterator['VectorBuffer']:
+        ''' Iterates every channel that has been read so far without reading any others '''
+        if self._channels is not None:
+            for channels in self._channels.values():
+                yield from channels
+
+    @property
+    def loaded_size(self) -> int:
+        ''' Gets the number of bytes of vertex data currently held in memory '''
+        if self._channels is None:
+            return 0
+        return sum(c.size for c in self.loaded_channels())
+
+    def release(self):
+        ''' Drops the vertex data so it will be read again on next access. Buffers without a loader are left unchanged '''
+        if self._loader:
+            self._channels = None
+
+    def _get_channels(self, code: str) -> List['VectorBuffer']:
+        if self._channels is None or code not in self._channels:
+            if self._loader:
+                self._loader(self, {code})
+            elif self._channels is None:
+                raise Exception('Vertex buffer data has not been loaded')
+            else:
+                # buffers without a loader were given all of their channels up front
+                return []
+        return self._channels[code]
 
     def enumerate_blendpairs(self) -> Iterator[Tuple[int, Iterable[float], Iterable[float]]]:
         '''
@@ -49,6 +126,7 @@ class VectorBuffer(Sequence):
     _count: int
     _decode: Callable[[bytes, int], Iterable[float]]
     _descriptor: VectorDescriptor
+    _array: 'numpy.ndarray' = None # the decoded vectors, if they have been decoded in bulk
 
     def __init__(self, descriptor: VectorDescriptor, count: int, data: bytes):
         self._descriptor = descriptor
@@ -58,7 +136,40 @@ class VectorBuffer(Sequence):
     def __getitem__(self, i: int) -> Iterable[float]:
         if i < 0 or i >= self._count:
             raise IndexError('Index out of range')
+        if self._array is not None:
+            return self._array[i].tolist()
         return self._descriptor.decode(self._binary, i)
 
     def __len__(self) -> int:
-        return self._count
\ No newline at end of file
+        return self._count
+
+    @property
+    def descriptor(self) -> VectorDescriptor:
+        return self._descriptor
+
+    @property
+    def data(self) -> bytes:
+        return self._binary
+
+    @property
+    def decoded(self) -> bool:
+        return self._array is not None
+
+    @property
+    def size(self) -> int:
+        # memory mapped arrays are paged in by the OS so they are not counted
+        if self._array is None or isinstance(self._array, numpy.memmap):
+            return len(self._binary)
+        return len(self._binary) + self._array.nbytes
+
+    def set_array(self, array: Optional['numpy.ndarray']):
+        ''' Provides the decoded vectors as an array with a row per vector, as returned by `VectorDescriptor.decode_array()`. Pass `None` to discard them '''
+        if array is not None and len(array) != self._count:
+            raise Exception('Array length does not match vector count')
+        self._array = array
+
+    def to_array(self) -> 'numpy.ndarray':
+        ''' Gets the vectors as an array with a row per vector, decoding them in bulk if necessary. Requires numpy '''
+        if self._array is None:
+            self._array = self._descriptor.decode_array(self._binary, self._count)
+        return self._array
\ No newline at end of file
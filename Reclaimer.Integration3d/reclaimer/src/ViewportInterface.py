@@ -7,6 +7,7 @@ from .Model import *
 from .Material import *
 from .Types import *
 from .Progress import *
+from .TexturePrefetcher import TexturePrefetcher
 
 __all__ = [
     'MeshKey',
@@ -46,7 +47,7 @@ class ViewportInterface(Generic[TMaterial, TCollection, TMatrix, TModelState, TR
     def post_import(self):
         ...
 
-    def init_materials(self) -> None:
+    def init_materials(self, textures: TexturePrefetcher) -> None:
         ...
 
     def create_material(self, material: Material) -> TMaterial:
@@ -58,6 +59,14 @@ class ViewportInterface(Generic[TMaterial, TCollection, TMatrix, TModelState, TR
     def create_collection(self, display_name: str, parent: TCollection) -> TCollection:
         ...
 
+    def create_prototype_collection(self, display_name: str) -> TCollection:
+        ''' Creates a hidden collection to build a model into, so it can be instanced by each placement of the model '''
+        ...
+
+    def create_model_instance(self, prototype: TModelState, collection: TCollection, display_name: str, world_transform: TMatrix) -> None:
+        ''' Creates an instance of a model that was built into a prototype collection, placed at `world_transform` '''
+        ...
+
     def identity_transform(self) -> TMatrix:
         ...
 
@@ -86,4 +95,8 @@ class ViewportInterface(Generic[TMaterial, TCollection, TMatrix, TModelState, TR
         ...
 
     def build_mesh(self, model_state: TModelState, region_group: TRegionGroup, world_transform: TMatrix, mesh: Mesh, mesh_key: MeshKey, display_name: str) -> None:
+        ...
+
+    def create_instances(self, model_state: TModelState, region_group: TRegionGroup, meshes: List[Tuple[Mesh, MeshKey]], instances: List[Tuple[str, TMatrix]]) -> None:
+        ''' Creates a lightweight instance of a set of meshes that have already been built for each (display_name, world_transform) in `instances` '''
         ...
\ No newline at end of file
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from ..src.BitmapIndex import BitmapIndex
+
+class Test_BitmapIndex(unittest.TestCase):
+    def test_find(self):
+        with tempfile.TemporaryDirectory() as dir:
+            os.makedirs(os.path.join(dir, 'Levels', 'Bitmaps'))
+            for name in ('Levels/Bitmaps/Rock.TIF', 'Levels/Bitmaps/rock.png', 'Levels/Bitmaps/grass.dds', 'sky.v2.tif'):
+                with open(os.path.join(dir, name), 'wb'):
+                    pass
+
+            index = BitmapIndex(dir)
+            self.assertEqual(len(index), 4)
+
+            # case insensitive, with either path separator
+            self.assertEqual(index.find('levels\\bitmaps\\rock', ['tif']), os.path.join(dir, 'Levels', 'Bitmaps', 'Rock.TIF'))
+
+            # extensions are tried in order
+            self.assertEqual(index.find('levels/bitmaps/rock', ['png', 'tif']), os.path.join(dir, 'Levels', 'Bitmaps', 'rock.png'))
+            self.assertEqual(index.find('levels/bitmaps/grass', ['tif', 'dds']), os.path.join(dir, 'Levels', 'Bitmaps', 'grass.dds'))
+            self.assertIsNone(index.find('levels/bitmaps/grass', ['tif']))
+
+            # names with dots are tried in full before their extension is replaced
+            self.assertEqual(index.find('sky.v2', ['tif']), os.path.join(dir, 'sky.v2.tif'))
+            self.assertEqual(index.find('levels/bitmaps/rock.tga', ['png']), os.path.join(dir, 'Levels', 'Bitmaps', 'rock.png'))
+
+            found = index.find_all(['levels/bitmaps/rock', 'missing'], ['tif'])
+            self.assertIsNotNone(found['levels/bitmaps/rock'])
+            self.assertIsNone(found['missing'])
+
+            # the shared index is reused for the same folder
+            shared = BitmapIndex.for_root(dir)
+            self.assertIs(BitmapIndex.for_root(dir), shared)
+            self.assertFalse(shared.is_stale())
+
+            # files added after it was built are not probed for, the index is rebuilt once the folder changes instead
+            path = os.path.join(dir, 'Levels', 'Bitmaps', 'missing.tif')
+            with open(path, 'wb'):
+                pass
+            folder = os.path.dirname(path)
+            os.utime(folder, ns=(0, os.stat(folder).st_mtime_ns + 1000000000))
+            self.assertIsNone(shared.find('levels/bitmaps/missing', ['tif']))
+            self.assertTrue(shared.is_stale())
+
+            rebuilt = BitmapIndex.for_root(dir)
+            self.assertIsNot(rebuilt, shared)
+            self.assertEqual(rebuilt.find('levels/bitmaps/missing', ['tif']), path)
+            self.assertIs(BitmapIndex.for_root(dir), rebuilt)
+            BitmapIndex._instance = None
+
+if __name__ == '__main__':
+    unittest.main()
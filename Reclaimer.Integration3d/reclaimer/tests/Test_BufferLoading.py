@@ -0,0 +1,223 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+from typing import Callable, List, Tuple
+from ..src import SceneReader as scene_reader
+from ..src.FileReader import FileReader
+from ..src.SceneReader import SceneReader
+from ..src.VertexBuffer import ALL_CHANNELS
+from ..src.ImportOptions import ImportOptions
+
+def _string(text: str) -> bytes:
+    data = text.encode()
+    return struct.pack('<i', len(data)) + data
+
+def _int32(*values: int) -> bytes:
+    return struct.pack(f'<{len(values)}i', *values)
+
+def _float(*values: float) -> bytes:
+    return struct.pack(f'<{len(values)}f', *values)
+
+class _RmfWriter:
+    ''' Writes just enough of an RMF file to exercise the buffer reads '''
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes):
+        self.data += data
+
+    def block(self, code: str, write_payload: Callable[['_RmfWriter'], None]):
+        self.data += code.encode()
+        address = len(self.data)
+        self.data += bytes(4)
+        write_payload(self)
+        struct.pack_into('<i', self.data, address, len(self.data))
+
+    def block_list(self, code: str, blocks: List[Tuple[str, Callable[['_RmfWriter'], None]]]):
+        self.data += b'list'
+        address = len(self.data)
+        self.data += bytes(4)
+        self.data += code.encode() + _int32(len(blocks))
+        for child_code, write_payload in blocks:
+            self.block(child_code, write_payload)
+        struct.pack_into('<i', self.data, address, len(self.data))
+
+BUFFER_COUNT = 3
+VERTEX_COUNT = 4
+
+# channel code, descriptor index, value written to every component of buffer k
+_CHANNELS = [
+    ('POSN', 0, lambda k: float(k)),
+    ('NORM', 0, lambda k: 1.0),
+    ('TANG', 0, lambda k: 2.0),
+    ('BNRM', 0, lambda k: 3.0),
+    ('TEXC', 1, lambda k: 0.5),
+    ('COLR', 0, lambda k: 0.25)
+]
+
+def _write_rmf(fileName: str):
+    ''' One model with a mesh per buffer. Every vertex in buffer k has position (k, k, k) and every index is k '''
+
+    def write_vertex_buffer(k: int):
+        def write(w: _RmfWriter):
+            w.write(_int32(VERTEX_COUNT))
+            for code, descriptor, value in _CHANNELS:
+                size = 3 if descriptor == 0 else 2
+                w.block(code, lambda w: w.write(_int32(descriptor) + _float(*[value(k)] * (size * VERTEX_COUNT))))
+        return ('VBUF', write)
+
+    def write_index_buffer(k: int):
+        return ('IBUF', lambda w: w.write(bytes([3, 2]) + _int32(6) + struct.pack('<6H', *[k] * 6)))
+
+    def write_mesh(k: int):
+        def write(w: _RmfWriter):
+            w.write(_int32(k, k, -1) + _float(*[0] * 24))
+            w.block_list('MSEG', [('MSEG', lambda w: w.write(_int32(0, 6, -1)))])
+        return ('MESH', write)
+
+    def write_region(w: _RmfWriter):
+        w.write(_string('body'))
+        w.block_list('PERM', [('PERM', lambda w, k=k: w.write(_string(f'p{k}') + b'\x00' + _int32(k, 1) + _float(*[0] * 12))) for k in range(BUFFER_COUNT)])
+
+    def write_model(w: _RmfWriter):
+        w.write(_string('crate') + _int32(0))
+        w.block_list('REGN', [('REGN', write_region)])
+        w.block_list('MARK', [])
+        w.block_list('BONE', [])
+        w.block_list('MESH', [write_mesh(k) for k in range(BUFFER_COUNT)])
+
+    def write_node(w: _RmfWriter):
+        w.write(_string('root') + _int32(1))
+        w.block('MOD*', lambda w: w.write(_int32(0)))
+
+    def write_scene(w: _RmfWriter):
+        w.write(bytes([1, 0, 0, 0]) + _float(1.0) + _float(1, 0, 0, 0, 1, 0, 0, 0, 1) + _string('test'))
+        w.block('NODE', write_node)
+        w.block_list('MODL', [('MODL', write_model)])
+        w.block_list('VECD', [
+            ('VECD', lambda w: w.write(bytes([0, 4]) + _int32(3) + bytes([0, 32] * 3))),
+            ('VECD', lambda w: w.write(bytes([0, 4]) + _int32(2) + bytes([0, 32] * 2)))
+        ])
+        w.block_list('VBUF', [write_vertex_buffer(k) for k in range(BUFFER_COUNT)])
+        w.block_list('IBUF', [write_index_buffer(k) for k in range(BUFFER_COUNT)])
+        w.block_list('MATL', [])
+        w.block_list('BITM', [])
+
+    writer = _RmfWriter()
+    writer.block('RMF!', write_scene)
+    with open(fileName, 'wb') as f:
+        f.write(writer.data)
+
+class _RecordingReader(FileReader):
+    ''' Records every reader that gets opened and the addresses it reads data from '''
+
+    instances = []
+
+    def __init__(self, fileName: str):
+        super().__init__(fileName)
+        self.reads = []
+        _RecordingReader.instances.append(self)
+
+    def read_bytes(self, length: int) -> bytes:
+        self.reads.append(self.position)
+        return super().read_bytes(length)
+
+class Test_BufferLoading(unittest.TestCase):
+    def setUp(self):
+        fd, self.fileName = tempfile.mkstemp(suffix='.rmf')
+        os.close(fd)
+        _write_rmf(self.fileName)
+
+    def tearDown(self):
+        os.remove(self.fileName)
+
+    def _open_eager(self):
+        scene = SceneReader.open_scene(self.fileName)
+        SceneReader.load_buffers(scene, range(BUFFER_COUNT), range(BUFFER_COUNT), ALL_CHANNELS)
+        return scene
+
+    def test_selective_load(self):
+        eager = self._open_eager()
+        scene = SceneReader.open_scene(self.fileName)
+
+        # only the headers are read up front
+        self.assertEqual([vb.count for vb in scene.vertex_buffer_pool], [VERTEX_COUNT] * BUFFER_COUNT)
+        self.assertEqual([ib.count for ib in scene.index_buffer_pool], [6] * BUFFER_COUNT)
+        self.assertFalse(any(vb.loaded for vb in scene.vertex_buffer_pool))
+        self.assertFalse(any(ib.loaded for ib in scene.index_buffer_pool))
+
+        # the selected buffers are read in address order by a reader of their own, and the rest stay unloaded
+        _RecordingReader.instances = []
+        with mock.patch.object(scene_reader, 'FileReader', _RecordingReader):
+            SceneReader.load_buffers(scene, [2, 0], [2, 0])
+
+        self.assertEqual(len(_RecordingReader.instances), 1)
+        reads = _RecordingReader.instances[0].reads
+        self.assertEqual(reads, sorted(reads))
+
+        # index data follows the layout, width and count, and the TANG and BNRM blocks are skipped without reading their data
+        for k in (0, 2):
+            self.assertIn(scene._index_buffer_blocks[k].start_address + 6, reads)
+        self.assertEqual(len(reads), 2 * 4 + 2)
+
+        for k in (0, 2):
+            vb, expected_vb = scene.vertex_buffer_pool[k], eager.vertex_buffer_pool[k]
+            self.assertTrue(vb.loaded)
+            self.assertEqual(list(vb._channels['POSN'][0]), list(expected_vb.position_channels[0]))
+            self.assertEqual(list(vb._channels['NORM'][0]), list(expected_vb.normal_channels[0]))
+            self.assertEqual(list(vb._channels['TEXC'][0]), list(expected_vb.texcoord_channels[0]))
+            self.assertEqual(list(vb.position_channels[0][0]), [float(k)] * 3)
+
+            ib, expected_ib = scene.index_buffer_pool[k], eager.index_buffer_pool[k]
+            self.assertTrue(ib.loaded)
+            self.assertEqual(ib.data, expected_ib.data)
+            self.assertEqual(ib.indices, [k] * 6)
+
+        self.assertFalse(scene.vertex_buffer_pool[1].loaded)
+        self.assertFalse(scene.index_buffer_pool[1].loaded)
+
+        # buffers that are already loaded are not read again
+        _RecordingReader.instances = []
+        with mock.patch.object(scene_reader, 'FileReader', _RecordingReader):
+            SceneReader.load_buffers(scene, [0], [0])
+        self.assertFalse(_RecordingReader.instances)
+
+    def test_lazy_channels(self):
+        eager = self._open_eager()
+        scene = SceneReader.open_scene(self.fileName)
+
+        options = ImportOptions()
+        options.IMPORT_COLORS = False
+        channels = options.vertex_channels()
+        SceneReader.load_buffers(scene, [0], [], channels)
+
+        # only the channels the options ask for are read
+        vb, expected = scene.vertex_buffer_pool[0], eager.vertex_buffer_pool[0]
+        self.assertTrue(vb.has_channels(channels))
+        self.assertFalse(vb.has_channels({'COLR'}))
+        self.assertEqual(set(vb._channels), channels)
+
+        # the rest are read on first access, each by a reader of its own
+        for name, code in (('tangent_channels', 'TANG'), ('binormal_channels', 'BNRM'), ('color_channels', 'COLR')):
+            _RecordingReader.instances = []
+            with mock.patch.object(scene_reader, 'FileReader', _RecordingReader):
+                actual = getattr(vb, name)
+            self.assertEqual(len(_RecordingReader.instances), 1)
+            self.assertEqual(len(_RecordingReader.instances[0].reads), 1)
+            self.assertIn(code, vb._channels)
+            self.assertEqual([list(v) for v in actual[0]], [list(v) for v in getattr(expected, name)[0]])
+
+        # channels that were read already are not read again
+        _RecordingReader.instances = []
+        with mock.patch.object(scene_reader, 'FileReader', _RecordingReader):
+            vb.tangent_channels
+            vb.position_channels
+        self.assertFalse(_RecordingReader.instances)
+        self.assertEqual(list(vb.tangent_channels[0][0]), [2.0] * 3)
+        self.assertEqual(list(vb.color_channels[0][0]), [0.25] * 3)
+
+if __name__ == '__main__':
+    unittest.main()
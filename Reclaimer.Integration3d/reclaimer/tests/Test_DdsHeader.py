@@ -0,0 +1,59 @@
+import os
+import struct
+import tempfile
+import unittest
+from ..src.Scene import *
+from ..src.Material import Texture
+from ..src.SceneReader import SceneReader
+from ..src.DdsHeader import DdsHeader
+
+def _create_dds(width: int, height: int, mip_count: int) -> bytes:
+    ''' A DXT1 texture where every byte of each mip level is the index of that level '''
+
+    header = bytearray(128)
+    header[:4] = b'DDS '
+    struct.pack_into('<7I', header, 4, 124, 0x1 | 0x2 | 0x4 | 0x1000 | 0x20000 | 0x80000, height, width, max(1, width // 4) * max(1, height // 4) * 8, 0, mip_count)
+    struct.pack_into('<2I4s', header, 76, 32, 0x4, b'DXT1')
+    struct.pack_into('<I', header, 108, 0x1000 | 0x8 | 0x400000)
+
+    data = bytes(header)
+    for level in range(mip_count):
+        w, h = max(1, width >> level), max(1, height >> level)
+        data += bytes([level]) * (max(1, (w + 3) // 4) * max(1, (h + 3) // 4) * 8)
+    return data
+
+class Test_DdsHeader(unittest.TestCase):
+    def test_levels(self):
+        header = DdsHeader.parse(_create_dds(64, 32, 7))
+        self.assertEqual((header.width, header.height, header.mip_count), (64, 32, 7))
+        self.assertEqual(header.level_size(0), 16 * 8 * 8)
+        self.assertEqual(header.level_offset(1), 128 + 16 * 8 * 8)
+        self.assertEqual(header.select_level(64), 0)
+        self.assertEqual(header.select_level(20), 2)
+        self.assertEqual(header.select_level(0), 6)
+
+        self.assertIsNone(DdsHeader.parse(b'not a dds file' * 20))
+
+    def test_read_texture(self):
+        with tempfile.TemporaryDirectory() as dir:
+            dds = _create_dds(64, 64, 7)
+            source = os.path.join(dir, 'scene.rmf')
+            with open(source, 'wb') as f:
+                f.write(b'header' + dds)
+
+            scene = Scene()
+            scene._source_file = source
+            texture = Texture()
+            texture.address = 6
+            texture.size = len(dds)
+
+            self.assertEqual(SceneReader.read_texture(scene, texture), dds)
+            self.assertEqual(SceneReader.read_texture(scene, texture, 64), dds)
+
+            data = SceneReader.read_texture(scene, texture, 16)
+            header = DdsHeader.parse(data)
+            self.assertEqual((header.width, header.height, header.mip_count), (16, 16, 1))
+            self.assertEqual(data[128:], bytes([2]) * (4 * 4 * 8))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import struct
+import unittest
+from ..src.Scene import *
+from ..src.Vectors import VectorDescriptor, DataType, DescriptorFlags, numpy
+from ..src.VertexBuffer import VertexBuffer, VectorBuffer
+from ..src.IndexBuffer import IndexBuffer, IndexLayout
+from ..src.DecodePool import DecodePool
+
+STRIP = [0, 1, 2, 3, 3, 4, 5, 5, 6, 7, 8, 9]
+
+def _create_scene() -> Scene:
+    descriptor = VectorDescriptor(DataType.PACKED, 4, [(DescriptorFlags.NORMALIZED | DescriptorFlags.SIGN_EXTENDED, 10)] * 3)
+    data = struct.pack('<10I', *(i * 0x01234567 & 0xFFFFFFFF for i in range(10)))
+
+    vb = VertexBuffer()
+    vb.count = 10
+    vb.set_channels({ 'NORM': [VectorBuffer(descriptor, 10, data)] })
+
+    scene = Scene()
+    scene.vertex_buffer_pool = [vb]
+    scene.index_buffer_pool = [IndexBuffer(IndexLayout.TRIANGLE_STRIP, 2, struct.pack(f'<{len(STRIP)}H', *STRIP))]
+    return scene
+
+@unittest.skipIf(numpy is None, 'numpy is not available')
+class Test_DecodePool(unittest.TestCase):
+    def test_triangle_array(self):
+        for layout in [IndexLayout.TRIANGLE_LIST, IndexLayout.TRIANGLE_STRIP]:
+            buffer = IndexBuffer(layout, 2, struct.pack(f'<{len(STRIP)}H', *STRIP))
+            for offset, count in [(0, -1), (0, 6), (3, 9)]:
+                expected = list(buffer.get_triangles(offset, count))
+                self.assertEqual(list(map(tuple, buffer.get_triangle_array(offset, count).tolist())), expected)
+
+    def test_decode(self):
+        scene = _create_scene()
+        channel = scene.vertex_buffer_pool[0].normal_channels[0]
+        index_buffer = scene.index_buffer_pool[0]
+        expected_vectors = [list(channel[i]) for i in range(len(channel))]
+        expected_triangles = list(index_buffer.get_triangles(2, 10))
+
+        pool = DecodePool(2)
+        try:
+            batch = pool.submit(scene, [0], { 0: [(2, 10)] })
+            self.assertEqual(batch.collect(), [channel])
+            self.assertTrue(channel.decoded)
+            for i, v in enumerate(expected_vectors):
+                for a, b in zip(channel[i], v):
+                    self.assertAlmostEqual(a, b, places=5)
+            self.assertEqual(list(index_buffer.get_triangles(2, 10)), expected_triangles)
+        finally:
+            pool.close()
+
+        # the shared arrays are discarded when the pool is closed
+        self.assertFalse(channel.decoded)
+        self.assertEqual(list(index_buffer.get_triangles(2, 10)), expected_triangles)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import time
+import struct
+import tempfile
+import unittest
+from ..src.Vectors import VectorDescriptor, DataType, DescriptorFlags, numpy
+from ..src.VertexBuffer import VectorBuffer
+from ..src.IndexBuffer import IndexBuffer, IndexLayout
+from ..src.DiskCache import DiskCache
+from ..src.ImportOptions import ImportOptions
+from ..src.GeometryCache import GeometryCache
+
+SIGN_NORM = DescriptorFlags.NORMALIZED | DescriptorFlags.SIGN_EXTENDED
+
+DESCRIPTORS = [
+    VectorDescriptor(DataType.REAL, 4, [(0, 32)] * 3),
+    VectorDescriptor(DataType.INTEGER, 2, [(DescriptorFlags.NORMALIZED, 16)] * 2),
+    VectorDescriptor(DataType.INTEGER, 1, [(0, 8)] * 4), # blend indices
+    VectorDescriptor(DataType.PACKED, 4, [(SIGN_NORM, 10), (SIGN_NORM, 11), (SIGN_NORM, 11)]),
+    VectorDescriptor(DataType.PACKED, 4, [(DescriptorFlags.NORMALIZED | DescriptorFlags.SIGN_SHIFTED, 10)] * 3 + [(DescriptorFlags.NORMALIZED, 2)])
+]
+
+def _create_data(count: int) -> bytes:
+    return struct.pack(f'<{count * 3}I', *((i * 2654435761) & 0x7F7FFFFF for i in range(count * 3)))
+
+@unittest.skipIf(numpy is None, 'numpy is not available')
+class Test_GeometryCache(unittest.TestCase):
+    def test_decode_array(self):
+        data = _create_data(8)
+        for descriptor in DESCRIPTORS:
+            array = descriptor.decode_array(data, 8)
+            self.assertEqual(array.shape, (8, descriptor.dimensions))
+            for i in range(8):
+                expected = list(descriptor.decode(data, i))
+                for a, b in zip(array[i].tolist(), expected):
+                    self.assertAlmostEqual(a, b, places=5, msg=str(descriptor))
+
+    def test_cached_arrays(self):
+        with tempfile.TemporaryDirectory() as dir:
+            options = ImportOptions()
+            options.GEOMETRY_CACHE_DIR = dir
+            cache = GeometryCache.for_options(options)
+
+            data = _create_data(8)
+            first = VectorBuffer(DESCRIPTORS[3], 8, data)
+            cache.decode(first)
+            self.assertEqual(len(os.listdir(dir)), 1)
+
+            # the same data in another buffer is read from the cache
+            second = VectorBuffer(DESCRIPTORS[3], 8, data)
+            cache.decode(second)
+            self.assertIsInstance(second._array, numpy.memmap)
+            self.assertEqual(list(second[5]), list(first[5]))
+            del second
+
+            # the same data with a different layout is not
+            cache.decode(VectorBuffer(DESCRIPTORS[0], 8, data))
+            self.assertEqual(len(os.listdir(dir)), 2)
+            GeometryCache._instance = None
+
+    def test_cached_triangles(self):
+        with tempfile.TemporaryDirectory() as dir:
+            cache = GeometryCache(dir, 1024 * 1024)
+            data = struct.pack('<8H', 0, 1, 2, 3, 3, 4, 5, 6)
+
+            first = IndexBuffer(IndexLayout.TRIANGLE_STRIP, 2, data)
+            expected = list(first.get_triangles(0, 8))
+            first.set_triangles(0, 8, first.get_triangle_array(0, 8))
+            cache.store_triangles(first, 0, 8)
+
+            # the same indices in another buffer are read from the cache
+            second = IndexBuffer(IndexLayout.TRIANGLE_STRIP, 2, data)
+            self.assertTrue(cache.load_triangles(second, 0, 8))
+            self.assertIsInstance(second._triangles[(0, 8)], numpy.memmap)
+            self.assertEqual(list(second.get_triangles(0, 8)), expected)
+            self.assertFalse(cache.load_triangles(second, 2, 6))
+            second.set_triangles(0, 8, None)
+            del second
+
+    def test_disk_cache_eviction(self):
+        with tempfile.TemporaryDirectory() as dir:
+            cache = DiskCache(dir, 250)
+            keys = [DiskCache.hash(bytes([i])) for i in range(3)]
+            cache.put(keys[0], '.bin', lambda f: f.write(bytes(100)))
+            cache.put(keys[1], '.bin', lambda f: f.write(bytes(100)))
+
+            # using the first file makes the second one the least recently used
+            time.sleep(0.01)
+            self.assertIsNotNone(cache.get(keys[0], '.bin'))
+            cache.put(keys[2], '.bin', lambda f: f.write(bytes(100)))
+
+            self.assertIsNone(cache.get(keys[1], '.bin'))
+            self.assertIsNotNone(cache.get(keys[0], '.bin'))
+            self.assertEqual(cache.total_size, 200)
+
+            # the index is rebuilt from the directory
+            self.assertEqual(DiskCache(dir, 250).total_size, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import logging
+import unittest
+from ..src.ImportLog import ImportLog, logger
+
+class Test_ImportLog(unittest.TestCase):
+    def test_counts_without_output(self):
+        formatted = []
+
+        class Name:
+            def __str__(self):
+                formatted.append(self)
+                return 'name'
+
+        log = ImportLog()
+        log.configure(logging.INFO)
+        for _ in range(5):
+            log.object('meshes', 'creating mesh %s', Name())
+
+        self.assertEqual(log._counts['meshes'], 5)
+        self.assertEqual(formatted, []) # message args should never be formatted
+
+    def test_rate_limit(self):
+        log = ImportLog()
+        log.configure(logging.DEBUG, max_per_second=3)
+        with self.assertLogs(logger, logging.DEBUG) as captured:
+            for i in range(10):
+                log.object('meshes', 'creating mesh %03d', i)
+        self.assertEqual(len(captured.records), 3)
+        self.assertEqual(log._counts['meshes'], 10)
+        self.assertEqual(log._suppressed['meshes'], 7)
+
+    def test_summary(self):
+        log = ImportLog()
+        log.configure(logging.INFO)
+        log.object('materials', 'creating material: %s', 'a')
+        log.object('materials', 'creating material: %s', 'b')
+        with self.assertLogs(logger, logging.INFO) as captured:
+            log.summary()
+        self.assertEqual(captured.records[0].getMessage(), 'materials: 2')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from ..src.Material import *
+from ..src.MaterialSignature import material_signature
+
+def _create_material(name: str, texture_index: int, tiling = (1, 1)) -> Material:
+    material = Material()
+    material.name = name
+    material.alpha_mode = ALPHA_MODE.OPAQUE
+    material.texture_mappings = [TextureMapping(TEXTURE_USAGE.DIFFUSE, ChannelFlags.DEFAULT, texture_index, ChannelFlags.DEFAULT, tiling)]
+    material.tints = [TintColor('albedo', ChannelFlags.DEFAULT, (255, 255, 255, 255))]
+    return material
+
+class Test_MaterialSignature(unittest.TestCase):
+    def test_signature(self):
+        a = _create_material('a', 0)
+        b = _create_material('b', 0)
+        self.assertEqual(material_signature(a), material_signature(b))
+
+        self.assertNotEqual(material_signature(a), material_signature(_create_material('a', 1)))
+        self.assertNotEqual(material_signature(a), material_signature(_create_material('a', 0, (2, 2))))
+
+        b.alpha_mode = ALPHA_MODE.CLIP
+        self.assertNotEqual(material_signature(a), material_signature(b))
+
+        # textures from different scenes can be compared by their content instead of their index
+        keys = ['rock', 'rock']
+        self.assertEqual(material_signature(a, keys.__getitem__), material_signature(_create_material('c', 1), keys.__getitem__))
+
+if __name__ == '__main__':
+    unittest.main()
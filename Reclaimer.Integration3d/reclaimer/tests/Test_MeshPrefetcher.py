@@ -0,0 +1,76 @@
+import struct
+import unittest
+from ..src.Scene import *
+from ..src.Model import Mesh, MeshSegment
+from ..src.Vectors import VectorDescriptor, DataType, numpy
+from ..src.VertexBuffer import VertexBuffer, VectorBuffer
+from ..src.IndexBuffer import IndexBuffer, IndexLayout
+from ..src.MeshPrefetcher import MeshPrefetcher
+
+def _create_mesh(vertex_buffer_index: int, index_start: int) -> Mesh:
+    mesh = Mesh()
+    mesh.vertex_buffer_index = vertex_buffer_index
+    mesh.index_buffer_index = 0
+    mesh.segments = [MeshSegment(index_start, 6, -1)]
+    return mesh
+
+def _create_scene() -> Scene:
+    ''' Two vertex buffers and one index buffer that is shared by every mesh '''
+
+    scene = Scene()
+    scene.vertex_buffer_pool = []
+    for _ in range(2):
+        vb = VertexBuffer()
+        vb.count = 4
+        vb.set_channels({ 'POSN': [VectorBuffer(VectorDescriptor(DataType.REAL, 4, [(0, 32)] * 3), 4, struct.pack('<12f', *range(12)))] })
+        scene.vertex_buffer_pool.append(vb)
+    scene.index_buffer_pool = [IndexBuffer(IndexLayout.TRIANGLE_LIST, 2, struct.pack('<12H', *([0, 1, 2, 2, 1, 3] * 2)))]
+    return scene
+
+@unittest.skipIf(numpy is None, 'numpy is not available')
+class Test_MeshPrefetcher(unittest.TestCase):
+    def test_prefetch(self):
+        scene = _create_scene()
+        meshes = [_create_mesh(0, 0), _create_mesh(1, 0), _create_mesh(0, 6)]
+        keys = [(0, i, -1) for i in range(len(meshes))]
+        positions = scene.vertex_buffer_pool[0].position_channels[0]
+        index_buffer = scene.index_buffer_pool[0]
+
+        # the repeated key is an instance of the first mesh, so it is not prepared again
+        prefetcher = MeshPrefetcher(scene, list(zip(keys, meshes)) + [(keys[0], meshes[0])], 1)
+        prefetcher.start()
+        try:
+            prefetcher.wait(keys[0])
+            self.assertTrue(positions.decoded)
+            self.assertTrue(index_buffer.has_triangles(0, 6))
+            self.assertEqual(list(index_buffer.get_triangles(meshes[0])), [(0, 1, 2), (2, 1, 3)])
+
+            # the first vertex buffer is still needed by the third mesh
+            prefetcher.done(keys[0], meshes[0])
+            self.assertTrue(positions.decoded)
+
+            for key, mesh in zip(keys[1:], meshes[1:]):
+                prefetcher.wait(key)
+                prefetcher.done(key, mesh)
+
+            self.assertFalse(positions.decoded)
+            self.assertFalse(index_buffer.has_triangles(0, 6))
+
+            prefetcher.wait(keys[0])
+            self.assertFalse(positions.decoded)
+        finally:
+            prefetcher.stop()
+
+    def test_stop(self):
+        scene = _create_scene()
+        meshes = [_create_mesh(0, 0), _create_mesh(1, 0), _create_mesh(0, 6)]
+
+        # the thread is waiting for the main thread to catch up, so stopping has to wake it
+        prefetcher = MeshPrefetcher(scene, [((0, i, -1), m) for i, m in enumerate(meshes)], 1)
+        prefetcher.start()
+        prefetcher.wait((0, 0, -1))
+        prefetcher.stop()
+        self.assertFalse(prefetcher._thread.is_alive())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+from ..src.Profiler import ImportProfiler
+
+class Test_Profiler(unittest.TestCase):
+    def test_phase_totals(self):
+        profiler = ImportProfiler()
+        profiler.add('file open', 0.5)
+        profiler.add('mesh geometry', 0.25, 'brute', (0, 1, -1))
+        profiler.add('mesh geometry', 0.75, 'brute', (0, 2, -1))
+
+        totals = { r.phase: r for r in profiler.phase_totals() }
+        self.assertEqual(totals['file open'].count, 1)
+        self.assertEqual(totals['mesh geometry'].count, 2)
+        self.assertAlmostEqual(totals['mesh geometry'].elapsed, 1.0)
+
+    def test_slowest_meshes(self):
+        profiler = ImportProfiler()
+        profiler.add('mesh geometry', 0.1, 'brute', (0, 0, -1))
+        profiler.add('mesh geometry', 0.2, 'brute', (0, 1, -1))
+        profiler.add('mesh skin', 0.3, 'brute', (0, 0, -1))
+
+        meshes = profiler.mesh_totals()
+        self.assertEqual(meshes[0][0].mesh_key, (0, 0, -1))
+        self.assertAlmostEqual(meshes[0][0].elapsed, 0.4)
+
+        report = json.loads(profiler.to_json(top_n=1))
+        self.assertEqual(len(report['slowest_meshes']), 1)
+        self.assertEqual(report['slowest_meshes'][0]['mesh_key'], [0, 0, -1])
+        self.assertIn('mesh skin', report['slowest_meshes'][0]['phases'])
+
+    def test_measure(self):
+        profiler = ImportProfiler()
+        with profiler.measure('bones', 'brute'):
+            pass
+
+        records = profiler.records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].model, 'brute')
+        self.assertEqual(records[0].count, 1)
+        self.assertIn('bones', profiler.format_table())
+
+    def test_capture(self):
+        profiler = ImportProfiler()
+        profiler.add('file open', 0.5)
+        with profiler.capture() as captured:
+            profiler.add('file open', 0.25)
+            profiler.add('block parse', 0.125)
+
+        # only the time added inside the context is captured, and the existing timings are kept
+        self.assertEqual([(r.phase, r.elapsed, r.count) for r in captured], [('file open', 0.25, 1), ('block parse', 0.125, 1)])
+        self.assertEqual(len(profiler.records()), 2)
+        self.assertAlmostEqual(profiler.records()[0].elapsed, 0.75)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from ..src.ImportOptions import ImportOptions
+from ..src.Progress import ProgressCallback
+
+class StubFilter:
+    def count_objects(self) -> int:
+        return 2
+
+    def count_materials(self) -> int:
+        return 0
+
+    def count_meshes(self) -> int:
+        return 3
+
+    def count_vertices(self) -> int:
+        return 100
+
+    def count_triangles(self) -> int:
+        return 100
+
+class CountingCallback(ProgressCallback):
+    refresh_count: int = 0
+
+    def _refresh(self):
+        self.refresh_count += 1
+
+class Test_Progress(unittest.TestCase):
+    def test_refresh_is_coalesced(self):
+        callback = CountingCallback(StubFilter(), ImportOptions())
+        callback.refresh_interval = 60.0
+
+        for _ in range(1000):
+            callback.increment_objects()
+
+        self.assertEqual(callback.refresh_count, 1)
+        self.assertEqual(callback.object_progress, 1000)
+
+        callback.complete()
+        self.assertEqual(callback.refresh_count, 2)
+
+        # nothing pending so nothing more to deliver
+        callback.complete()
+        self.assertEqual(callback.refresh_count, 2)
+
+    def test_weighted_progress(self):
+        callback = CountingCallback(StubFilter(), ImportOptions())
+
+        callback.increment_meshes(90, 90)
+        self.assertEqual(callback.mesh_percent, 0.33)
+        self.assertEqual(callback.work_percent, 0.9)
+
+        callback.increment_meshes(5, 5)
+        callback.increment_meshes(5, 5)
+        self.assertEqual(callback.work_percent, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from ..src.Scene import *
+from ..src.Material import *
+
+def _create_texture(name: str) -> Texture:
+    texture = Texture()
+    texture.name = name
+    return texture
+
+class Test_Scene(unittest.TestCase):
+    def test_texture_lookups(self):
+        scene = Scene()
+        scene.texture_pool = [_create_texture('blend'), _create_texture('rock'), _create_texture('rock_normal')]
+
+        material = Material()
+        material.texture_mappings = [
+            TextureMapping(TEXTURE_USAGE.BLEND, ChannelFlags.DEFAULT, 0),
+            TextureMapping(TEXTURE_USAGE.DIFFUSE, ChannelFlags.RED, 1),
+            TextureMapping(TEXTURE_USAGE.SPECULAR, ChannelFlags.RED, 1),
+            TextureMapping(TEXTURE_USAGE.NORMAL, ChannelFlags.RED, 2)
+        ]
+
+        lookups = scene.get_texture_lookups(material)
+        self.assertIs(scene.get_texture_lookups(material), lookups)
+        self.assertEqual(set(lookups.keys()), { ChannelFlags.DEFAULT, ChannelFlags.RED })
+
+        texture, usages = lookups[ChannelFlags.RED][1]
+        self.assertIs(texture, scene.texture_pool[1])
+        self.assertEqual(list(usages.keys()), [TEXTURE_USAGE.DIFFUSE, TEXTURE_USAGE.SPECULAR])
+
+        for channel in (ChannelFlags.DEFAULT, ChannelFlags.RED, ChannelFlags.GREEN):
+            self.assertEqual(scene.create_texture_lookup(material, channel), lookups.get(channel, dict()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import os
+import tempfile
+import unittest
+from typing import Tuple, Optional
+from ..src.Scene import *
+from ..src.Model import *
+from ..src.Types import Matrix4x4_IDENTITY
+from ..src.VertexBuffer import VertexBuffer
+from ..src.IndexBuffer import IndexBuffer, IndexLayout
+from ..src.ImportOptions import ImportOptions
+from ..src.Progress import ProgressCallback
+from ..src.SceneFilter import SceneFilter, CheckState
+from ..src.SceneBuilder import SceneBuilder
+from ..src.ViewportInterface import *
+from ..src.SceneReader import SceneReader
+from ..src.Profiler import profiler
+from .Test_BufferLoading import _write_rmf
+
+class _RecordingInterface(ViewportInterface):
+    ''' Records the meshes and instances that get created '''
+
+    def __init__(self):
+        self.meshes = []
+        self.instances = []
+        self.prototypes = []
+        self.model_instances = []
+
+    def init_model(self, model, filter, collection, display_name):
+        return ModelState(model, filter, display_name)
+
+    def create_transform(self, transform, bone_mode = False):
+        return transform
+
+    def apply_transform(self, model_state, world_transform):
+        pass
+
+    def build_mesh(self, model_state, region_group, world_transform, mesh, mesh_key, display_name):
+        self.meshes.append(mesh_key)
+
+    def create_instances(self, model_state, region_group, meshes, instances):
+        self.instances.append(([key for _, key in meshes], [name for name, _ in instances]))
+
+    def create_prototype_collection(self, display_name):
+        self.prototypes.append(display_name)
+        return display_name
+
+    def create_model_instance(self, prototype, collection, display_name, world_transform):
+        self.model_instances.append((prototype.display_name, display_name))
+
+    def identity_transform(self):
+        return Matrix4x4_IDENTITY
+
+    def invert_transform(self, transform):
+        return transform
+
+    def multiply_transform(self, a, b):
+        return b
+
+def _create_mesh(index: int) -> Mesh:
+    mesh = Mesh()
+    mesh.vertex_buffer_index = index
+    mesh.index_buffer_index = index
+    mesh.bone_index = -1
+    mesh.segments = [MeshSegment(0, 6, -1)]
+    return mesh
+
+def _create_permutation(name: str, mesh_index: int, instanced: bool) -> ModelPermutation:
+    perm = ModelPermutation()
+    perm.name = name
+    perm.index = 0
+    perm.instanced = instanced
+    perm.mesh_index = mesh_index
+    perm.mesh_count = 1
+    perm.transform = Matrix4x4_IDENTITY
+    return perm
+
+def _create_placement(name: str) -> Placement:
+    placement = Placement()
+    placement.name = name
+    placement.transform = Matrix4x4_IDENTITY
+    placement.object = ModelRef(0)
+    return placement
+
+def _create_scene(options: ImportOptions, placements: int = 0) -> Scene:
+    '''
+    One model with a region of two instanced permutations that share a mesh, and one permutation with its own mesh.
+    The model is either referenced directly or by a number of placements.
+    '''
+
+    region = ModelRegion()
+    region.name = 'body'
+    region.index = 0
+    region.permutations = [_create_permutation('a', 0, True), _create_permutation('b', 0, True), _create_permutation('c', 1, False)]
+    for i, p in enumerate(region.permutations):
+        p.index = i
+
+    model = Model()
+    model.name = 'crate'
+    model.index = 0
+    model.regions = [region]
+    model.markers = []
+    model.bones = []
+    model.meshes = [_create_mesh(0), _create_mesh(1)]
+
+    root = SceneGroup()
+    root.name = 'root'
+    root.child_groups = []
+    root.child_objects = [_create_placement(f'p{i}') for i in range(placements)] if placements else [ModelRef(0)]
+
+    scene = Scene()
+    scene.name = 'test'
+    scene.unit_scale = 1.0
+    scene.world_matrix = Matrix4x4_IDENTITY
+    scene.root_node = root
+    scene.model_pool = [model]
+    scene.vertex_buffer_pool = []
+    scene.index_buffer_pool = []
+    for _ in range(2):
+        vb = VertexBuffer()
+        vb.count = 4
+        vb.set_channels({ code: [] for code in options.vertex_channels() })
+        scene.vertex_buffer_pool.append(vb)
+        scene.index_buffer_pool.append(IndexBuffer(IndexLayout.TRIANGLE_LIST, 2, bytes(12)))
+    scene.material_pool = []
+    scene.texture_pool = []
+    return scene
+
+def _build(scene: Scene, options: ImportOptions, filter: Optional[SceneFilter] = None) -> Tuple[_RecordingInterface, ProgressCallback]:
+    interface = _RecordingInterface()
+    filter = filter or SceneFilter(scene)
+    progress = ProgressCallback(filter, options)
+
+    builder = SceneBuilder(interface, scene, filter, options, progress)
+    tasks = builder.begin_create_scene()
+    while not tasks.finished():
+        tasks.execute_next()
+    builder.end_create_scene()
+
+    return interface, progress
+
+class Test_SceneBuilder(unittest.TestCase):
+    def test_instance_permutations(self):
+        options = ImportOptions()
+        options.TIMING_REPORT = False
+
+        interface, progress = _build(_create_scene(options), options)
+        self.assertEqual(len(interface.meshes), 3)
+        self.assertFalse(interface.instances)
+
+        # the second instanced permutation becomes an instance of the first
+        options.INSTANCE_PERMUTATIONS = True
+        interface, progress = _build(_create_scene(options), options)
+        self.assertEqual(interface.meshes, [(0, 0, -1), (0, 1, -1)])
+        self.assertEqual(interface.instances, [([(0, 0, -1)], ['body:b'])])
+        self.assertEqual(progress.mesh_progress, progress.mesh_count)
+        self.assertEqual(progress.vertex_progress, progress.vertex_count)
+
+    def test_instance_models(self):
+        options = ImportOptions()
+        options.TIMING_REPORT = False
+
+        interface, progress = _build(_create_scene(options, 3), options)
+        self.assertEqual(len(interface.meshes), 9)
+        self.assertFalse(interface.model_instances)
+
+        # the model is only built once, and every placement is an instance of it
+        options.INSTANCE_MODELS = True
+        interface, progress = _build(_create_scene(options, 3), options)
+        self.assertEqual(len(interface.meshes), 3)
+        self.assertEqual(interface.prototypes, ['crate'])
+        self.assertEqual(interface.model_instances, [('crate', 'p0'), ('crate', 'p1'), ('crate', 'p2')])
+        self.assertEqual(progress.mesh_progress, progress.mesh_count)
+        self.assertEqual(progress.object_progress, progress.object_count)
+
+        # placements with a different selection need their own prototype
+        scene = _create_scene(options, 2)
+        filter = SceneFilter(scene)
+        filter.models[1].regions[0].permutations[2].toggle(CheckState.UNCHECKED)
+        interface, progress = _build(scene, options, filter)
+        self.assertEqual(len(interface.prototypes), 2)
+        self.assertEqual(progress.mesh_progress, progress.mesh_count)
+
+    def test_read_timings(self):
+        options = ImportOptions()
+        options.TIMING_REPORT = False
+
+        fd, fileName = tempfile.mkstemp(suffix='.rmf')
+        os.close(fd)
+        try:
+            _write_rmf(fileName)
+            scene = SceneReader.open_scene(fileName)
+
+            # the scene is read before the import starts, but the read timings are still part of the report
+            profiler.reset()
+            interface, progress = _build(scene, options)
+            self.assertEqual(len(interface.meshes), 3)
+            table = profiler.format_table()
+            for phase in ('file open', 'block parse', 'decode NODE', 'decode MODL[]'):
+                self.assertIn(phase, table)
+            self.assertNotIn('(cached)', table)
+
+            # importing the same scene again reports them as cached
+            _build(scene, options)
+            self.assertIn('file open (cached)', profiler.format_table())
+        finally:
+            os.remove(fileName)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from ..src.Scene import *
+from ..src.VertexBuffer import VertexBuffer, VectorBuffer
+from ..src.IndexBuffer import IndexBuffer, IndexLayout
+from ..src.SceneCache import SceneCache
+
+def _create_scene(size: int) -> Scene:
+    ''' A scene with one vertex buffer holding `size` bytes of data that can be read again after being released '''
+
+    def load(buf, channels):
+        buf.set_channels({ 'POSN': [VectorBuffer(None, 1, bytes(size))] })
+
+    vb = VertexBuffer()
+    vb.count = 1
+    vb._loader = load
+    load(vb, None)
+
+    scene = Scene()
+    scene.vertex_buffer_pool = [vb]
+    scene.index_buffer_pool = [IndexBuffer(IndexLayout.TRIANGLE_LIST, 2, bytes(6))]
+    return scene
+
+class Test_SceneCache(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self._dir.name, f'{i}.rmf')
+            with open(path, 'wb') as f:
+                f.write(bytes(4))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_reuse(self):
+        cache = SceneCache()
+        scene = _create_scene(100)
+        cache.add(self.paths[0], scene)
+        self.assertIs(cache.get(self.paths[0]), scene)
+        self.assertIsNone(cache.get(self.paths[1]))
+
+        # a modified file must be read again
+        with open(self.paths[0], 'ab') as f:
+            f.write(bytes(4))
+        self.assertIsNone(cache.get(self.paths[0]))
+        self.assertEqual(len(cache), 0)
+
+    def test_eviction(self):
+        cache = SceneCache(max_size=250)
+        scenes = [_create_scene(100) for _ in self.paths]
+        for path, scene in zip(self.paths, scenes):
+            cache.add(path, scene)
+
+        # the index buffers have no loader so they are kept, but they still count towards the size
+        self.assertIsNone(cache.get(self.paths[0]))
+        self.assertFalse(scenes[0].vertex_buffer_pool[0].loaded)
+        self.assertTrue(scenes[0].index_buffer_pool[0].loaded)
+        self.assertIs(cache.get(self.paths[2]), scenes[2])
+        self.assertLessEqual(cache.size(), 250)
+
+        # released buffers are read again on access
+        self.assertEqual(scenes[0].vertex_buffer_pool[0].position_channels[0].size, 100)
+
+if __name__ == '__main__':
+    unittest.main()
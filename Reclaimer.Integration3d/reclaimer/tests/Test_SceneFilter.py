@@ -0,0 +1,155 @@
+import base64
+import unittest
+import zlib
+from ..src.Scene import *
+from ..src.Model import *
+from ..src.Material import *
+from ..src.VertexBuffer import VertexBuffer
+from ..src.IndexBuffer import IndexBuffer, IndexLayout
+from ..src.SceneFilter import *
+from ..src.SceneFilter import CheckState
+
+def _create_mesh(index: int, material_index: int) -> Mesh:
+    mesh = Mesh()
+    mesh.vertex_buffer_index = index
+    mesh.index_buffer_index = index
+    mesh.segments = [MeshSegment(0, 6, material_index)]
+    return mesh
+
+def _create_permutation(name: str, mesh_index: int) -> ModelPermutation:
+    perm = ModelPermutation()
+    perm.name = name
+    perm.mesh_index = mesh_index
+    perm.mesh_count = 1
+    return perm
+
+def _create_region(name: str, permutations: list) -> ModelRegion:
+    region = ModelRegion()
+    region.name = name
+    region.permutations = permutations
+    return region
+
+def _create_material(*texture_indices: int) -> Material:
+    material = Material()
+    material.texture_mappings = [TextureMapping(texture_index=i) for i in texture_indices]
+    return material
+
+def _create_scene() -> Scene:
+    ''' Two placements of one model with regions body(base, damaged) and head(base) '''
+
+    model = Model()
+    model.name = 'crate'
+    model.regions = [
+        _create_region('body', [_create_permutation('base', 0), _create_permutation('damaged', 1)]),
+        _create_region('head', [_create_permutation('base', 2)])
+    ]
+    model.meshes = [_create_mesh(0, 0), _create_mesh(1, 1), _create_mesh(2, 0)]
+
+    child = SceneGroup()
+    child.name = 'child'
+    child.child_groups = []
+    child.child_objects = [ModelRef(0)]
+
+    root = SceneGroup()
+    root.name = 'root'
+    root.child_groups = [child]
+    root.child_objects = [ModelRef(0)]
+
+    scene = Scene()
+    scene.name = 'test'
+    scene.root_node = root
+    scene.model_pool = [model]
+    scene.vertex_buffer_pool = []
+    scene.index_buffer_pool = []
+    for i in range(3):
+        vb = VertexBuffer()
+        vb.count = 4
+        scene.vertex_buffer_pool.append(vb)
+        scene.index_buffer_pool.append(IndexBuffer(IndexLayout.TRIANGLE_LIST, 2, bytes(12)))
+    scene.material_pool = [_create_material(0, 1), _create_material(1)]
+    scene.texture_pool = [Texture(), Texture()]
+    return scene
+
+class Test_SceneFilter(unittest.TestCase):
+    def test_initial_totals(self):
+        filter = SceneFilter(_create_scene())
+        self.assertEqual(filter.count_objects(), 2)
+        self.assertEqual(filter.count_meshes(), 6)
+        self.assertEqual(filter.count_vertices(), 24)
+        self.assertEqual(filter.count_triangles(), 12)
+        self.assertEqual([i for i, _ in filter.selected_materials()], [0, 1])
+        self.assertEqual([i for i, _ in filter.selected_textures()], [0, 1])
+
+    def test_toggle_updates_totals(self):
+        filter = SceneFilter(_create_scene())
+        filter.models[0].toggle(CheckState.UNCHECKED)
+        self.assertEqual(filter.count_objects(), 1)
+        self.assertEqual(filter.count_meshes(), 3)
+
+        # remove the only permutation that uses material 1
+        filter.groups[0].models[0].regions[0].permutations[1].toggle(CheckState.UNCHECKED)
+        self.assertEqual(filter.count_meshes(), 2)
+        self.assertEqual(filter.count_triangles(), 4)
+        self.assertEqual([i for i, _ in filter.selected_materials()], [0])
+        self.assertEqual([i for i, _ in filter.selected_textures()], [0, 1])
+
+        filter.toggle(CheckState.UNCHECKED)
+        self.assertEqual(filter.count_objects(), 0)
+        self.assertEqual(filter.count_meshes(), 0)
+        self.assertEqual(filter.count_materials(), 0)
+        self.assertEqual(filter.count_textures(), 0)
+
+        filter.toggle(CheckState.CHECKED)
+        self.assertEqual(filter.count_objects(), 2)
+        self.assertEqual(filter.count_meshes(), 6)
+        self.assertEqual(filter.count_materials(), 2)
+
+    def test_permutation_set_toggle(self):
+        filter = SceneFilter(_create_scene())
+        model = filter.models[0]
+        base = next(s for s in model.permutation_sets if s.label == 'base')
+        base.toggle(CheckState.UNCHECKED)
+        self.assertEqual(filter.count_meshes(), 4)
+        self.assertEqual(model.regions[1].state, CheckState.UNCHECKED)
+        self.assertEqual(model.state, CheckState.PARTIAL)
+
+    def test_partial_state(self):
+        filter = SceneFilter(_create_scene())
+        model = filter.models[0]
+        model.regions[0].permutations[0].toggle()
+        self.assertEqual(model.regions[0].state, CheckState.PARTIAL)
+        self.assertEqual(model.state, CheckState.PARTIAL)
+        self.assertEqual(filter.state, CheckState.PARTIAL)
+        self.assertEqual(filter.groups[0].state, CheckState.CHECKED)
+
+        model.regions[0].toggle(CheckState.UNCHECKED)
+        model.regions[1].toggle(CheckState.UNCHECKED)
+        self.assertFalse(model.selected)
+        self.assertEqual(filter.count_objects(), 1)
+
+    def test_preset(self):
+        filter = SceneFilter(_create_scene())
+        filter.models[0].regions[1].toggle(CheckState.UNCHECKED)
+        filter.groups[0].models[0].regions[0].permutations[1].toggle(CheckState.UNCHECKED)
+        preset = filter.export_preset()
+
+        other = SceneFilter(_create_scene())
+        other.import_preset(preset)
+        self.assertEqual(other.export_preset(), preset)
+        self.assertEqual(other.count_meshes(), filter.count_meshes())
+        self.assertEqual(other.count_materials(), filter.count_materials())
+
+        scene = _create_scene()
+        scene.model_pool[0].regions[1].name = 'legs'
+        with self.assertRaises(Exception):
+            SceneFilter(scene).import_preset(preset)
+
+        # a truncated preset is rejected without changing the selection
+        count, signature, _ = preset.split(':')
+        truncated = f'{count}:{signature}:{base64.b64encode(zlib.compress(b"")).decode("ascii")}'
+        with self.assertRaises(Exception):
+            other.import_preset(truncated)
+        self.assertEqual(other.export_preset(), preset)
+
+if __name__ == '__main__':
+    unittest.main()
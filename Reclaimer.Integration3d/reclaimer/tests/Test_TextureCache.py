@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from ..src.Scene import *
+from ..src.Material import Texture
+from ..src.ImportOptions import ImportOptions
+from ..src.TextureCache import TextureCache
+from ..src.TexturePrefetcher import TexturePrefetcher
+
+def _create_texture(name: str, address: int, size: int) -> Texture:
+    texture = Texture()
+    texture.name = name
+    texture.address = address
+    texture.size = size
+    return texture
+
+class Test_TextureCache(unittest.TestCase):
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as dir:
+            source = os.path.join(dir, 'scene.rmf')
+            with open(source, 'wb') as f:
+                f.write(b'DDS first' + b'DDS first')
+
+            scene = Scene()
+            scene._source_file = source
+            scene.texture_pool = [_create_texture('a', 0, 9), _create_texture('b', 9, 9)]
+
+            cache = TextureCache(os.path.join(dir, 'cache'), 1024)
+            self.assertIsNone(cache.find(scene, scene.texture_pool[0], 0))
+
+            content_hash, path = cache.store(scene, scene.texture_pool[0], 0, b'DDS first')
+            self.assertTrue(path.endswith('.dds'))
+            self.assertEqual(cache.find(scene, scene.texture_pool[0], 0), (content_hash, path))
+
+            # the same content at a different location shares the cached file
+            self.assertEqual(cache.store(scene, scene.texture_pool[1], 0, b'DDS first'), (content_hash, path))
+
+            # a different resolution limit is a different texture
+            self.assertIsNone(cache.find(scene, scene.texture_pool[0], 256))
+
+    def test_release(self):
+        with tempfile.TemporaryDirectory() as dir:
+            source = os.path.join(dir, 'scene.rmf')
+            with open(source, 'wb') as f:
+                f.write(bytes(64))
+
+            scene = Scene()
+            scene._source_file = source
+            scene.texture_pool = [_create_texture(str(i), i * 16, 16) for i in range(2)]
+
+            # images used by the current import are kept even when the cache is over its size limit
+            cache = TextureCache(os.path.join(dir, 'cache'), 64)
+            paths = [cache.store(scene, t, 0, b'DDS ' + bytes([i]) * 60)[1] for i, t in enumerate(scene.texture_pool)]
+            self.assertTrue(all(os.path.exists(p) for p in paths))
+
+            cache.release()
+            self.assertLessEqual(cache._cache.total_size, 64)
+            self.assertFalse(all(os.path.exists(p) for p in paths))
+
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as dir:
+            source = os.path.join(dir, 'scene.rmf')
+            with open(source, 'wb') as f:
+                f.write(b'headerDDS pixels')
+
+            scene = Scene()
+            scene._source_file = source
+            scene.texture_pool = [_create_texture('embedded', 6, 10)]
+
+            options = ImportOptions()
+            options.TEXTURE_CACHE_DIR = os.path.join(dir, 'cache')
+
+            for _ in range(2):
+                prefetcher = TexturePrefetcher(scene, options)
+                texture_data = prefetcher.get(0)
+                self.assertIsNone(texture_data.data)
+                with open(texture_data.path, 'rb') as f:
+                    self.assertEqual(f.read(), b'DDS pixels')
+
+            TextureCache._instance = None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from ..src.Scene import *
+from ..src.Material import Texture
+from ..src.ImportOptions import ImportOptions
+from ..src.TexturePrefetcher import TexturePrefetcher
+
+def _create_texture(name: str, address: int = 0, size: int = 0) -> Texture:
+    texture = Texture()
+    texture.name = name
+    texture.address = address
+    texture.size = size
+    return texture
+
+class Test_TexturePrefetcher(unittest.TestCase):
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as dir:
+            source = os.path.join(dir, 'scene.rmf')
+            with open(source, 'wb') as f:
+                f.write(b'headerPIXELS')
+            with open(os.path.join(dir, 'found.tif'), 'wb') as f:
+                f.write(bytes(16))
+
+            scene = Scene()
+            scene._source_file = source
+            scene.texture_pool = [_create_texture('embedded', 6, 6), _create_texture('found'), _create_texture('missing')]
+
+            options = ImportOptions()
+            options.BITMAP_ROOT = dir
+
+            prefetcher = TexturePrefetcher(scene, options)
+            prefetcher.start(enumerate(scene.texture_pool[:2]), 2)
+            try:
+                self.assertEqual(prefetcher.get(0).data, b'PIXELS')
+                self.assertTrue(prefetcher.get(1).exists)
+                self.assertEqual(prefetcher.get(1).path, os.path.join(dir, 'found.tif'))
+
+                # textures that were not prefetched are read on request
+                self.assertFalse(prefetcher.get(2).exists)
+            finally:
+                prefetcher.stop()
+
+    def test_read_ahead(self):
+        with tempfile.TemporaryDirectory() as dir:
+            source = os.path.join(dir, 'scene.rmf')
+            with open(source, 'wb') as f:
+                f.write(b'ABCDEFGH')
+
+            scene = Scene()
+            scene._source_file = source
+            scene.texture_pool = [_create_texture(f'embedded{i}', i * 2, 2) for i in range(4)]
+
+            # embedded textures are only read a few at a time ahead of the requests
+            prefetcher = TexturePrefetcher(scene, ImportOptions())
+            prefetcher.start(enumerate(scene.texture_pool), 1)
+            try:
+                self.assertEqual(sorted(prefetcher._futures), [0, 1])
+                self.assertEqual(prefetcher.get(0).data, b'AB')
+                self.assertEqual(sorted(prefetcher._futures), [1, 2])
+
+                # requests out of order are read immediately
+                self.assertEqual(prefetcher.get(3).data, b'GH')
+                self.assertEqual([prefetcher.get(i).data for i in (1, 2)], [b'CD', b'EF'])
+                self.assertFalse(prefetcher._futures)
+            finally:
+                prefetcher.stop()
+
+    def test_resolve(self):
+        with tempfile.TemporaryDirectory() as dir:
+            os.makedirs(os.path.join(dir, 'Bitmaps'))
+            with open(os.path.join(dir, 'Bitmaps', 'Found.PNG'), 'wb') as f:
+                f.write(bytes(16))
+
+            scene = Scene()
+            scene.texture_pool = [_create_texture('bitmaps\\found'), _create_texture('missing1'), _create_texture('missing2')]
+
+            options = ImportOptions()
+            options.BITMAP_ROOT = dir
+
+            # every missing texture is reported in a single message
+            prefetcher = TexturePrefetcher(scene, options)
+            with self.assertLogs('reclaimer', 'WARNING') as logs:
+                prefetcher.start(enumerate(scene.texture_pool), 0)
+            self.assertEqual(len(logs.output), 1)
+            self.assertIn('2 of 3', logs.output[0])
+
+            self.assertEqual(prefetcher.get(0).path, os.path.join(dir, 'Bitmaps', 'Found.PNG'))
+            self.assertFalse(prefetcher.get(1).exists)
+
+if __name__ == '__main__':
+    unittest.main()
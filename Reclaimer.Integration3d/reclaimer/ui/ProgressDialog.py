@@ -5,6 +5,7 @@ from ..src.Progress import *
 from ..src.Scene import *
 from ..src.SceneFilter import *
 from ..src.ImportOptions import *
+from ..src.ImportLog import logger
 
 from PySide2 import QtCore, QtWidgets
 from PySide2.QtUiTools import QUiLoader
@@ -13,6 +14,9 @@ __all__ = [
     'ProgressDialog'
 ]
 
+# the mesh progress bar shows weighted progress rather than a mesh count
+WORK_RESOLUTION = 100
+
 
 class ProgressDialog(QtWidgets.QDialog, ProgressCallback):
     _scene: Scene
@@ -48,22 +52,23 @@ class ProgressDialog(QtWidgets.QDialog, ProgressCallback):
             cast(QtWidgets.QLayout, self._widget.meshes_layout).setEnabled(False)
 
         self._widget.progressBar_materials.setMaximum(self.material_count)
-        self._widget.progressBar_meshes.setMaximum(self.mesh_count)
+        self._widget.progressBar_meshes.setMaximum(WORK_RESOLUTION if self.mesh_count else 0)
         self._widget.progressBar_objects.setMaximum(self.object_count)
         self._refresh()
 
         self._connect()
 
     def complete(self):
+        ProgressCallback.complete(self)
         self.accept()
 
     def _refresh(self):
         self._widget.progressBar_materials.setValue(self.material_progress)
-        self._widget.progressBar_meshes.setValue(self.mesh_progress)
+        self._widget.progressBar_meshes.setValue(int(self.work_percent * WORK_RESOLUTION))
         self._widget.progressBar_objects.setValue(self.object_progress)
 
         self._widget.label_materials_progress.setText(f'{self.material_progress} / {self.material_count} ({self.material_percent:.0%})')
-        self._widget.label_meshes_progress.setText(f'{self.mesh_progress} / {self.mesh_count} ({self.mesh_percent:.0%})')
+        self._widget.label_meshes_progress.setText(f'{self.mesh_progress} / {self.mesh_count} ({self.work_percent:.0%})')
         self._widget.label_objects_progress.setText(f'{self.object_progress} / {self.object_count} ({self.object_percent:.0%})')
 
     def _connect(self):
@@ -76,6 +81,6 @@ class ProgressDialog(QtWidgets.QDialog, ProgressCallback):
 
     def onDialogResult(self, result: QtWidgets.QDialog.DialogCode):
         ''' Override in a base class to be notified when the dialog result is received '''
-        print(f'objects: {self.object_progress} / {self.object_count}')
-        print(f'materials: {self.material_progress} / {self.material_count}')
-        print(f'meshes: {self.mesh_progress} / {self.mesh_count}')
\ No newline at end of file
+        logger.info('objects: %d / %d', self.object_progress, self.object_count)
+        logger.info('materials: %d / %d', self.material_progress, self.material_count)
+        logger.info('meshes: %d / %d', self.mesh_progress, self.mesh_count)
\ No newline at end of file
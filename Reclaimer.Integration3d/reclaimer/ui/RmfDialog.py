@@ -1,7 +1,10 @@
-from typing import Any, Tuple, cast, Iterator, Optional
+import threading
+from typing import Any, Tuple, cast, Dict, List, Optional
 
 from .. import ui
-from ..src.SceneReader import SceneReader
+from ..src.ImportLog import logger
+from ..src.SceneReader import *
+from ..src.SceneCache import scene_cache
 from ..src.Scene import *
 from ..src.Model import *
 from ..src.ImportOptions import *
@@ -17,73 +20,188 @@ __all__ = [
 CheckState = QtCore.Qt.CheckState
 CheckStates = [CheckState.Unchecked, CheckState.PartiallyChecked, CheckState.Checked]
 
-def _enumerate_children_recursive(tree: QtWidgets.QTreeWidget) -> Iterator['CustomTreeItem']:
-    def enumerate_recursive(item: QtWidgets.QTreeWidgetItem):
-        yield item
-        for i in range(item.childCount()):
-            yield from enumerate_recursive(item.child(i))
 
-    for i in range(tree.topLevelItemCount()):
-        yield from enumerate_recursive(tree.topLevelItem(i))
+class FilterTreeModel(QtCore.QAbstractItemModel):
+    '''
+    Exposes the nodes of a `SceneFilter` to a `QTreeView` without creating an item per node.
+    Child lists are only built when the view asks for them, which is typically when a node is expanded.
+    '''
 
+    HEADERS = ['Name', 'Type']
 
-class CustomTreeItem(QtWidgets.QTreeWidgetItem):
-    SYSTEM_TYPE: int = 0
-    USER_TYPE: int = 1000
+    checkStateToggled = QtCore.Signal()
 
-    _isRefreshing: bool = False
-    dataContext: IFilterNode
+    _scene_filter: SceneFilter
+    _permutation_view: bool
+    _children: Dict[int, List[IFilterNode]]
+    _rows: Dict[int, int]
+
+    def __init__(self, scene_filter: SceneFilter, permutation_view: bool, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._scene_filter = scene_filter
+        self._permutation_view = permutation_view
+        self._children = dict()
+        self._rows = dict()
+
+    def _get_node(self, index: QtCore.QModelIndex) -> IFilterNode:
+        return index.internalPointer() if index.isValid() else self._scene_filter
+
+    def _get_children(self, node: IFilterNode) -> List[IFilterNode]:
+        children = self._children.get(id(node))
+        if children is not None:
+            return children
+
+        if isinstance(node, FilterGroup):
+            children = list(node.groups) + list(node.models)
+        elif type(node) == ModelFilter:
+            children = list(node.permutation_sets if self._permutation_view else node.regions)
+        elif type(node) == RegionFilter and not self._permutation_view:
+            children = list(node.permutations)
+        else:
+            children = []
 
-    def __init__(self, parent, data_context: IFilterNode):
-        super().__init__(parent, type=CustomTreeItem.USER_TYPE)
-        self.dataContext = data_context
-        self._refreshState()
+        # sort by name from level 2 onwards
+        if node is not self._scene_filter:
+            children.sort(key=lambda n: n.label or '')
 
-    def setData(self, column: int, role: int, value: Any):
-        ''' Override setData() to push UI state to underlying model when checkState changes '''
+        for i, c in enumerate(children):
+            self._rows[id(c)] = i
 
-        super().setData(column, role, value)
+        self._children[id(node)] = children
+        return children
 
-        if self._isRefreshing or column != 0 or role != QtCore.Qt.CheckStateRole:
-            return
+    def index(self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        children = self._get_children(self._get_node(parent))
+        if row < 0 or row >= len(children) or column < 0 or column >= len(FilterTreeModel.HEADERS):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        parent = cast(IFilterNode, index.internalPointer())._parent
+        if parent is None or parent is self._scene_filter:
+            return QtCore.QModelIndex()
+
+        # the parent's row was recorded when its own parent's children were listed
+        return self.createIndex(self._rows[id(parent)], 0, parent)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._get_children(self._get_node(parent)))
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return len(FilterTreeModel.HEADERS)
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole) -> Any:
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return FilterTreeModel.HEADERS[section]
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsUserCheckable
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
 
-        self.dataContext.toggle(int(self.checkState(0)))
+        node = cast(IFilterNode, index.internalPointer())
+        if role == QtCore.Qt.DisplayRole:
+            return node.label if index.column() == 0 else node.node_type
+        if role == QtCore.Qt.CheckStateRole and index.column() == 0:
+            return CheckStates[node.state.value]
+        return None
 
-        # refresh ancestors
-        p = self.parent()
-        while isinstance(p, CustomTreeItem):
-            p._refreshState()
-            p = p.parent()
+    def setData(self, index: QtCore.QModelIndex, value: Any, role: int = QtCore.Qt.EditRole) -> bool:
+        ''' Pushes check state changes to the underlying filter '''
 
-        # refresh descendants
-        for c in self._enumerateDescendants():
-            c._refreshState()
+        if not index.isValid() or index.column() != 0 or role != QtCore.Qt.CheckStateRole:
+            return False
 
-    def _enumerateDescendants(self) -> Iterator['CustomTreeItem']:
-        for i in range(self.childCount()):
-            c = self.child(i)
-            if isinstance(c, CustomTreeItem):
-                yield c
-                yield from CustomTreeItem._enumerateDescendants(c)
+        cast(IFilterNode, index.internalPointer()).toggle(CheckStates.index(CheckState(value)))
+        self.checkStateToggled.emit()
+        return True
 
-    def _refreshState(self):
-        ''' Update UI state to match underlying model '''
-        self._isRefreshing = True
-        self.setCheckState(0, CheckStates[self.dataContext.state.value])
-        self._isRefreshing = False
+    def refresh(self):
+        ''' Notifies views that the check state of any node may have changed '''
+
+        # check states are derived from the filter when painted, so repainting the rows is enough
+        rows = self.rowCount()
+        if rows > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(rows - 1, self.columnCount() - 1), [QtCore.Qt.CheckStateRole])
+
+
+class SceneLoader(QtCore.QObject, SceneReadCallback):
+    ''' Reads a scene on a worker thread. Signals are delivered on the thread that owns the loader '''
+
+    hierarchyLoaded = QtCore.Signal(object)
+    loaded = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    _filepath: str
+    _thread: threading.Thread
+
+    def __init__(self, filepath: str, parent: Optional[QtCore.QObject] = None):
+        QtCore.QObject.__init__(self, parent)
+        self._filepath = filepath
+        self._thread = threading.Thread(target=self._run, name='rmf loader', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def hierarchy_loaded(self, scene: Scene):
+        self.hierarchyLoaded.emit(scene)
+
+    def _run(self):
+        options = ImportOptions()
+        scene_cache.max_size = options.SCENE_CACHE_SIZE * 1024 * 1024
+        if options.SCENE_CACHE_SIZE <= 0:
+            scene_cache.clear()
+
+        scene = scene_cache.get(self._filepath)
+        if scene is not None:
+            logger.info('using cached scene for %s', self._filepath)
+            self.hierarchy_loaded(scene)
+            self.loaded.emit(scene)
+            return
+
+        try:
+            scene = SceneReader.open_scene(self._filepath, self)
+        except ReadCancelled:
+            logger.info('cancelled loading %s', self._filepath)
+            return
+        except Exception as e:
+            logger.exception('failed to load %s', self._filepath)
+            self.failed.emit(str(e))
+            return
+
+        if options.SCENE_CACHE_SIZE > 0:
+            scene_cache.add(self._filepath, scene)
+
+        self.loaded.emit(scene)
 
 
 class RmfDialog(QtWidgets.QDialog):
-    _scene: Scene
-    _scene_filter: SceneFilter
+    _scene: Scene = None
+    _scene_filter: SceneFilter = None
+    _loader: SceneLoader
     _widget: QtWidgets.QWidget
-    _objectTreeWidget: QtWidgets.QTreeWidget
-    _permTreeWidget: QtWidgets.QTreeWidget
+    _objectTreeView: QtWidgets.QTreeView
+    _permTreeView: QtWidgets.QTreeView
+    _objectModel: FilterTreeModel = None
+    _permModel: FilterTreeModel = None
 
     @property
-    def _current_tree(self) -> QtWidgets.QTreeWidget:
+    def _current_tree(self) -> QtWidgets.QTreeView:
         idx = cast(QtWidgets.QTabWidget, self._widget.tabWidget).currentIndex()
-        return self._objectTreeWidget if idx == 0 else self._permTreeWidget
+        return self._objectTreeView if idx == 0 else self._permTreeView
 
     def __init__(self, filepath: str, parent: Optional[QtWidgets.QWidget] = None, flags: QtCore.Qt.WindowFlags = QtCore.Qt.WindowFlags(), stylesheet: Optional[str] = None):
         super().__init__(parent, flags)
@@ -98,8 +216,8 @@ class RmfDialog(QtWidgets.QDialog):
         if stylesheet:
             ui.set_stylesheet(widget, stylesheet)
 
-        self._objectTreeWidget = cast(QtWidgets.QTreeWidget, widget.objectTreeWidget)
-        self._permTreeWidget = cast(QtWidgets.QTreeWidget, widget.permutationTreeWidget)
+        self._objectTreeView = cast(QtWidgets.QTreeView, widget.objectTreeView)
+        self._permTreeView = cast(QtWidgets.QTreeView, widget.permutationTreeView)
 
         layout = QtWidgets.QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -112,25 +230,49 @@ class RmfDialog(QtWidgets.QDialog):
         self.setWindowFlags(QtCore.Qt.Dialog | QtCore.Qt.MSWindowsFixedSizeDialogHint)
         self.setWindowFlag(QtCore.Qt.WindowContextHelpButtonHint, False)
 
-        self._scene = SceneReader.open_scene(filepath)
-        self._scene_filter = SceneFilter(self._scene)
+        self._load_options(ImportOptions())
+        self._connect()
+        self._setLoading(True)
+
+        # the scene is parsed in the background so the dialog can be shown immediately
+        # the loader has no parent so it outlives the dialog if the dialog is destroyed while the thread is still running
+        self._loader = SceneLoader(filepath)
+        self._loader.hierarchyLoaded.connect(self._onHierarchyLoaded)
+        self._loader.loaded.connect(self._onSceneLoaded)
+        self._loader.failed.connect(self._onLoadFailed)
+        self._loader.start()
+
+    def _setLoading(self, loading: bool):
+        for button in [self._widget.toolButton_checkAll, self._widget.toolButton_uncheckAll]:
+            button.setEnabled(not loading)
+        self._widget.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(not loading)
+        if loading:
+            self._widget.label_selectionSummary.setText('Loading...')
+
+    def _onHierarchyLoaded(self, scene: Scene):
+        # the trees can be shown as soon as the models are known; the buffers are still being read
+        self._scene_filter = SceneFilter(scene)
+
+        self._objectModel = FilterTreeModel(self._scene_filter, False, self)
+        self._permModel = FilterTreeModel(self._scene_filter, True, self)
+        self._objectModel.checkStateToggled.connect(self._onCheckStateToggled)
+        self._permModel.checkStateToggled.connect(self._onCheckStateToggled)
+
+        for tree, model in [(self._objectTreeView, self._objectModel), (self._permTreeView, self._permModel)]:
+            tree.setModel(model)
+            tree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
 
-        for tree in [self._objectTreeWidget, self._permTreeWidget]:
-            self._create_hierarchy(tree)
+            # only expand top level items to begin with
+            for i in range(model.rowCount()):
+                tree.expand(model.index(i, 0))
 
-        # only expand top level items to begin with
-        # sort by name from level 2 onwards
-        for tree in [self._objectTreeWidget, self._permTreeWidget]:
-            tree.collapseAll()
-            for item in self._enumerate_toplevel_items(tree):
-                item.setExpanded(True)
-                item.sortChildren(0, QtCore.Qt.SortOrder.AscendingOrder)
+    def _onSceneLoaded(self, scene: Scene):
+        self._scene = scene
+        self._setLoading(False)
+        self._refreshSummary()
 
-            tree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
-            self.check_all(tree, CheckState.Checked)
-
-        self._load_options(ImportOptions())
-        self._connect()
+    def _onLoadFailed(self, message: str):
+        self._widget.label_selectionSummary.setText(f'Failed to load scene: {message}')
 
     def _load_options(self, options: ImportOptions):
         self._widget.checkBox_importBones.setChecked(options.IMPORT_BONES)
@@ -155,6 +297,7 @@ class RmfDialog(QtWidgets.QDialog):
         self._widget.tabWidget.currentChanged.connect(self._onTabChanged)
         self._widget.buttonBox.accepted.connect(self.accept)
         self._widget.buttonBox.rejected.connect(self.reject)
+        self.finished.connect(self._onFinished)
         self.finished.connect(self.onDialogResult)
 
     def _browseBitmaps(self):
@@ -163,43 +306,38 @@ class RmfDialog(QtWidgets.QDialog):
         if dir:
             self._widget.lineEdit_bitmapsFolder.setText(dir)
 
+    def _onFinished(self, result: QtWidgets.QDialog.DialogCode):
+        # stop reading if the dialog was closed before the scene finished loading
+        self._loader.cancel()
+
     def _onTabChanged(self, index: int):
-        for item in _enumerate_children_recursive(self._current_tree):
-            item._refreshState()
-
-    def _enumerate_toplevel_items(self, tree: QtWidgets.QTreeWidget) -> Iterator['CustomTreeItem']:
-        for i in range(tree.topLevelItemCount()):
-            yield tree.topLevelItem(i)
-
-    def check_all(self, tree: QtWidgets.QTreeWidget, state: CheckState):
-        for item in self._enumerate_toplevel_items(tree):
-            item.setCheckState(0, state)
-
-    def _create_hierarchy(self, tree: QtWidgets.QTreeWidget):
-        def build_treeitem(parent: Any, node: IFilterNode) -> CustomTreeItem:
-            item = CustomTreeItem(parent, node)
-            item.setText(0, node.label)
-            item.setText(1, node.node_type)
-
-            if type(node) == FilterGroup:
-                item.addChildren([build_treeitem(item, o) for o in node.groups])
-                item.addChildren([build_treeitem(item, o) for o in node.models])
-
-            if tree == self._objectTreeWidget:
-                if type(node) == ModelFilter:
-                    item.addChildren([build_treeitem(item, o) for o in node.regions])
-
-                if type(node) == RegionFilter:
-                    item.addChildren([build_treeitem(item, o) for o in node.permutations])
-            else:
-                if type(node) == ModelFilter:
-                    item.addChildren([build_treeitem(item, o) for o in node.permutation_sets])
-
-            return item
-
-        tree.clear()
-        tree.addTopLevelItems([build_treeitem(tree, o) for o in self._scene_filter.groups])
-        tree.addTopLevelItems([build_treeitem(tree, o) for o in self._scene_filter.models])
+        model = self._current_tree.model()
+        if model:
+            cast(FilterTreeModel, model).refresh()
+
+    def _onCheckStateToggled(self):
+        # both views share the same filter, so a toggle in one can change states in the other
+        self._objectModel.refresh()
+        self._permModel.refresh()
+        self._refreshSummary()
+
+    def _refreshSummary(self):
+        # totals depend on the buffer pools, so they are not available until loading completes
+        if not self._scene:
+            return
+
+        stats = self._scene_filter.stats
+        self._widget.label_selectionSummary.setText(
+            f'{stats.objects:,} objects, {stats.meshes:,} meshes, {stats.triangles:,} triangles, {stats.material_count:,} materials'
+        )
+
+    def check_all(self, tree: QtWidgets.QTreeView, state: CheckState):
+        if not self._scene_filter:
+            return
+
+        # toggling the root is a single range operation on the filter
+        self._scene_filter.toggle(CheckStates.index(state))
+        self._onCheckStateToggled()
 
     def get_import_options(self) -> Tuple[Scene, SceneFilter, ImportOptions]:
         options = ImportOptions()